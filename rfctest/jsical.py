@@ -1,23 +1,27 @@
 from __future__ import annotations
 
 import collections
-import copy
-import itertools
+import datetime
+import functools
 import json
 import re
 import uuid
 
 
-from collections import UserList
+from collections.abc import Iterable, Iterator
 from dataclasses import dataclass, field
 from operator import itemgetter
 
+from . import jsoncodec
+from .recur import RecurrenceError, RecurrenceSet
+from .tzindex import TimeZoneResolver
+
 
 class ParseError(ValueError):
     pass
 
 
-@dataclass
+@dataclass(frozen=True)
 class Parameter:
     name: str
     value: str
@@ -25,29 +29,31 @@ class Parameter:
     def __str__(self):
         return f"{self.name}={self.value}"
 
-    def normalize(self):
-        self.name = self.name.upper()
-        if not self.value:
-            return
-        if self.value[0] != '"':
-            if any(c in ":;,." or c.isspace() for c in self.value):
+    def normalized(self) -> Parameter:
+        name = self.name.upper()
+        value = self.value
+        if value and value[0] != '"':
+            if any(c in ":;,." or c.isspace() for c in value):
                 # Non-standard: quote any non-quoted string
                 # that either must be quoted or is likely
                 # to be quoted by most iCalendar generator
-                self.value = '"' + self.value + '"'
+                value = '"' + value + '"'
             else:
-                self.value = self.value.upper()
+                value = value.upper()
+        if name == self.name and value == self.value:
+            return self
+        return Parameter(name, value)
 
     @staticmethod
     def _sortkey(param):
         return (param.name, param.value)
 
 
-@dataclass
+@dataclass(frozen=True)
 class Property:
     name: str
     value: str
-    params: list[Parameter] = field(default_factory=list)
+    params: tuple[Parameter, ...] = ()
 
     def __str__(self):
         params = "".join(f";{p}" for p in self.params)
@@ -61,21 +67,22 @@ class Property:
             [Parameter._sortkey(param) for param in prop.params],
         )
 
-    def normalize(self):
-        self.name = self.name.upper()
+    def normalized(self) -> Property:
+        name = self.name.upper()
         # Normalize parameters
-        for param in self.params:
-            param.normalize()
-        self.params.sort(key=Parameter._sortkey)
+        params = sorted(
+            (param.normalized() for param in self.params), key=Parameter._sortkey
+        )
         # Remove VALUE parameters for default types
         default_types = {
             "COLOR": "TEXT",
         }
-        default_type = default_types.get(self.name)
+        default_type = default_types.get(name)
         if default_type:
-            self.params = [
-                p for p in self.params if p.name != "VALUE" or p.value != default_type
-            ]
+            params = [p for p in params if p.name != "VALUE" or p.value != default_type]
+        if name == self.name and _same_items(params, self.params):
+            return self
+        return Property(name, self.value, params=tuple(params))
 
     @classmethod
     def parse(cls, line: str) -> Property:
@@ -100,100 +107,216 @@ class Property:
         if s[0] != ":":
             raise ParseError(f"iCalendar: missing property value: {line}")
         value = s[1:]
-        return Property(name, value, params=params)
+        return Property(name, value, params=tuple(params))
+
+
+def _same_items(a, b) -> bool:
+    """Returns True if sequences a and b contain the identical objects."""
+    return len(a) == len(b) and all(x is y for x, y in zip(a, b))
+
+
+def _sorted(items: list, key=None) -> list:
+    """Returns items sorted, or items itself if they already are."""
+    vals = sorted(items, key=key)
+    return items if _same_items(vals, items) else vals
+
+
+# Maximum octets of a content line, excluding the line break
+ICAL_LINE_LENGTH = 75
+# Approximate size of the chunks generated by Component.iter_ical
+ICAL_CHUNK_SIZE = 64 * 1024
+
+
+def fold_line(line: str) -> bytes:
+    """Encodes and folds a content line and terminates it with CRLF.
+
+    Lines are folded at ICAL_LINE_LENGTH octets, but never within
+    a multi-octet UTF-8 sequence."""
+    data = line.encode()
+    if len(data) <= ICAL_LINE_LENGTH:
+        return data + b"\r\n"
+    parts = []
+    start = 0
+    limit = ICAL_LINE_LENGTH
+    while len(data) - start > limit:
+        end = start + limit
+        # Back up to the first octet of a UTF-8 sequence.
+        while data[end] & 0xC0 == 0x80:
+            end -= 1
+        parts.append(data[start:end])
+        start = end
+        # Continuation lines start with a space.
+        limit = ICAL_LINE_LENGTH - 1
+    parts.append(data[start:])
+    return b"\r\n ".join(parts) + b"\r\n"
 
 
 @dataclass
 class Component:
+    """An iCalendar component.
+
+    Components are built by parsing, but must not be modified after
+    that. Instead, methods such as normalized and with_default_props
+    derive new components, which share any unchanged properties and
+    subcomponents with their origin.
+
+    A component indexes its properties and subcomponents by their
+    uppercase name. Use add_prop and add_comp to build a component,
+    rather than appending to its props and comps lists."""
+
     name: str
     props: list[Property] = field(default_factory=list)
     comps: list[Component] = field(default_factory=list)
     allow_any: bool = False
+    prop_index: dict[str, list[tuple[int, Property]]] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    """Properties by name, each with its index in props"""
+    comp_index: dict[str, list[tuple[int, Component]]] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    """Subcomponents by name, each with its index in comps"""
+
+    def __post_init__(self):
+        for i, prop in enumerate(self.props):
+            self.prop_index.setdefault(prop.name.upper(), []).append((i, prop))
+        for i, comp in enumerate(self.comps):
+            self.comp_index.setdefault(comp.name.upper(), []).append((i, comp))
+
+    def add_prop(self, prop: Property):
+        self.prop_index.setdefault(prop.name.upper(), []).append(
+            (len(self.props), prop)
+        )
+        self.props.append(prop)
 
-    def format(self, include_any=True) -> str:
-        linegen = [
-            [f"BEGIN:{self.name}"],
-            map(str, self.props),
-            (comp.format(include_any) for comp in self.comps),
-            [f"END:{self.name}"],
-        ]
+    def add_comp(self, comp: Component):
+        self.comp_index.setdefault(comp.name.upper(), []).append(
+            (len(self.comps), comp)
+        )
+        self.comps.append(comp)
+
+    def has_prop(self, name: str) -> bool:
+        return name in self.prop_index
+
+    def has_comp(self, name: str) -> bool:
+        return name in self.comp_index
+
+    def get_props(self, name: str) -> list[Property]:
+        return [prop for _, prop in self.prop_index.get(name, [])]
+
+    def get_value(self, name: str, default: str = None) -> str:
+        """Returns the value of the first property with this name."""
+        props = self.prop_index.get(name)
+        return props[0][1].value if props else default
+
+    def lines(self, include_any=True) -> Iterator[str]:
+        """Generates the unfolded content lines of this component."""
+        yield f"BEGIN:{self.name}"
+        yield from map(str, self.props)
+        for comp in self.comps:
+            yield from comp.lines(include_any)
         if include_any and self.allow_any:
-            linegen.insert(-1, ["..."])
-        return "\r\n".join(itertools.chain(*linegen))
+            yield "..."
+        yield f"END:{self.name}"
+
+    def format(self, include_any=True) -> str:
+        return "\r\n".join(self.lines(include_any))
+
+    def iter_ical(self, chunk_size=ICAL_CHUNK_SIZE) -> Iterator[bytes]:
+        """Generates the iCalendar data of this component.
+
+        Lines are folded and encoded as defined in RFC 5545, Section 3.1,
+        and joined into chunks of about chunk_size bytes."""
+        chunk = []
+        size = 0
+        for line in self.lines(include_any=False):
+            data = fold_line(line)
+            chunk.append(data)
+            size += len(data)
+            if size >= chunk_size:
+                yield b"".join(chunk)
+                chunk.clear()
+                size = 0
+        if chunk:
+            yield b"".join(chunk)
+
+    def write_ical(self, file, chunk_size=ICAL_CHUNK_SIZE):
+        """Writes the iCalendar data of this component to binary file."""
+        for chunk in self.iter_ical(chunk_size):
+            file.write(chunk)
 
     def to_ical(self) -> str:
-        return self.format(include_any=False)
+        return b"".join(self.iter_ical()).decode()
 
     def __str__(self):
         return self.format(include_any=True)
 
     @staticmethod
     def _sortkey(comp):
-        uids = list(filter(lambda prop: prop.name == "UID", comp.props))
-        uid = uids[0].value if uids else ""
-        recurids = list(filter(lambda prop: prop.name == "RECURRENCE-ID", comp.props))
-        recurid = recurids[0].value if recurids else ""
-        seqs = list(filter(lambda prop: prop.name == "SEQUENCE", comp.props))
-        seq = seqs[0].value if seqs else ""
-        jsids = list(filter(lambda prop: prop.name == "JSID", comp.props))
-        jsid = jsids[0].value if jsids else ""
-        return (comp.name, uid, recurid, seq, jsid)
-
-    def normalize(self):
-        self.name = self.name.upper()
-        for prop in self.props:
-            prop.normalize()
-        self.props.sort(key=Property._sortkey)
-        for comp in self.comps:
-            comp.normalize()
-        self.comps.sort(key=Component._sortkey)
+        return (
+            comp.name,
+            comp.get_value("UID", ""),
+            comp.get_value("RECURRENCE-ID", ""),
+            comp.get_value("SEQUENCE", ""),
+            comp.get_value("JSID", ""),
+        )
 
-    def with_default_props(self) -> Component:
-        vobj = copy.deepcopy(self)
-        if vobj.name == "VCALENDAR" and not vobj.comps:
-            vobj.comps.append(Component("VEVENT"))
-        comps = [vobj]
-        while comps:
-            comp = comps.pop()
-            comps.extend(comp.comps)
-            have_props = set(prop.name.upper() for prop in comp.props)
-            have_comps = set(comp.name.upper() for comp in comp.comps)
-
-            def add_default(prop):
-                if not prop.name in have_props:
-                    comp.props.append(prop)
-
-            if comp.name == "VCALENDAR":
-                add_default(Property("PRODID", "-//FOO//bar//EN"))
-                add_default(Property("VERSION", "2.0"))
-            elif comp.name == "VEVENT" or comp.name == "VTODO":
-                add_default(Property("DTSTAMP", "20060102T030405Z"))
-                add_default(Property("UID", f"{uuid.uuid4()}"))
-                if comp.name == "VEVENT":
-                    add_default(Property("DTSTART", "20060102T030405Z"))
-                if "ATTENDEE" in have_props:
-                    add_default(
-                        Property("ORGANIZER", f"mailto:{uuid.uuid4()}@example.com")
-                    )
-                elif "ORGANIZER" in have_props and not "PARTICIPANT" in have_comps:
-                    add_default(
-                        Property("ATTENDEE", f"mailto:{uuid.uuid4()}@example.com")
-                    )
-            elif comp.name == "DAYLIGHT" or comp.name == "STANDARD":
-                add_default(Property("TZOFFSETFROM", "-0400"))
-                add_default(Property("TZOFFSETTO", "-0300"))
-                add_default(Property("DTSTART", "20010503T000000"))
-            elif comp.name == "PARTICIPANT":
-                add_default(Property("UID", f"{uuid.uuid4()}"))
-            elif comp.name == "VTIMEZONE":
-                add_default(Property("TZID", f"{uuid.uuid4()}"))
-            elif comp.name == "VALARM":
-                add_default(Property("TRIGGER", "PT0S"))
+    def normalized(self) -> Component:
+        name = self.name.upper()
+        props = sorted(
+            (prop.normalized() for prop in self.props), key=Property._sortkey
+        )
+        comps = sorted(
+            (comp.normalized() for comp in self.comps), key=Component._sortkey
+        )
+        if (
+            name == self.name
+            and _same_items(props, self.props)
+            and _same_items(comps, self.comps)
+        ):
+            return self
+        return Component(name, props=props, comps=comps, allow_any=self.allow_any)
 
-        return vobj
+    def with_default_props(self) -> Component:
+        comps = self.comps
+        if self.name == "VCALENDAR" and not comps:
+            comps = [Component("VEVENT")]
+        comps = [comp.with_default_props() for comp in comps]
+        props = list(self.props)
+
+        def add_default(prop):
+            if not self.has_prop(prop.name):
+                props.append(prop)
+
+        if self.name == "VCALENDAR":
+            add_default(Property("PRODID", "-//FOO//bar//EN"))
+            add_default(Property("VERSION", "2.0"))
+        elif self.name == "VEVENT" or self.name == "VTODO":
+            add_default(Property("DTSTAMP", "20060102T030405Z"))
+            add_default(Property("UID", f"{uuid.uuid4()}"))
+            if self.name == "VEVENT":
+                add_default(Property("DTSTART", "20060102T030405Z"))
+            if self.has_prop("ATTENDEE"):
+                add_default(Property("ORGANIZER", f"mailto:{uuid.uuid4()}@example.com"))
+            elif self.has_prop("ORGANIZER") and not self.has_comp("PARTICIPANT"):
+                add_default(Property("ATTENDEE", f"mailto:{uuid.uuid4()}@example.com"))
+        elif self.name == "DAYLIGHT" or self.name == "STANDARD":
+            add_default(Property("TZOFFSETFROM", "-0400"))
+            add_default(Property("TZOFFSETTO", "-0300"))
+            add_default(Property("DTSTART", "20010503T000000"))
+        elif self.name == "PARTICIPANT":
+            add_default(Property("UID", f"{uuid.uuid4()}"))
+        elif self.name == "VTIMEZONE":
+            add_default(Property("TZID", f"{uuid.uuid4()}"))
+        elif self.name == "VALARM":
+            add_default(Property("TRIGGER", "PT0S"))
+
+        if _same_items(props, self.props) and _same_items(comps, self.comps):
+            return self
+        return Component(self.name, props=props, comps=comps, allow_any=self.allow_any)
 
     def to_vcalendar(self) -> Component:
-        vobj = copy.deepcopy(self)
+        vobj = self
         default_parent = {
             "AVAILABLE": "VAVAILABILITY",
             "DAYLIGHT": "VTIMEZONE",
@@ -211,9 +334,7 @@ class Component:
             "VTODO": "VCALENDAR",
         }
         while parent_name := default_parent.get(vobj.name):
-            parent = Component(parent_name, allow_any=True)
-            parent.comps.append(vobj)
-            vobj = parent
+            vobj = Component(parent_name, comps=[vobj], allow_any=True)
         if vobj.name != "VCALENDAR":
             vobj = Component("VCALENDAR", comps=[vobj])
         return vobj
@@ -241,7 +362,7 @@ class Component:
                 continue
             prop = Property.parse(line)
             if prop.name == "BEGIN":
-                comp.comps.append(Component(prop.value))
+                comp.add_comp(Component(prop.value))
                 stack.append(comp)
                 comp = comp.comps[-1]
             elif prop.name == "END":
@@ -251,7 +372,7 @@ class Component:
                     )
                 comp = stack.pop()
             else:
-                comp.props.append(prop)
+                comp.add_prop(prop)
         comp = stack[0]
         if len(comp.comps) == 1 and not comp.props:
             comp = comp.comps[0]
@@ -335,65 +456,60 @@ class ComponentDiff:
     add_comp_b: list[int]
     add_prop_b: list[int]
 
-    def __init__(self, a: Component, b: Component):
-        a = copy.deepcopy(a)
-        a.normalize()
-
-        b = copy.deepcopy(b)
-        b.normalize()
-
-        a_props = collections.defaultdict(list)
-        for p in enumerate(a.props):
-            a_props[p[1].name].append(p)
-        a_props.pop("JSID", None)
-
-        b_props = collections.defaultdict(list)
-        for p in enumerate(b.props):
-            b_props[p[1].name].append(p)
-        b_props.pop("JSID", None)
-
-        a_comps = collections.defaultdict(list)
-        for p in enumerate(a.comps):
-            a_comps[p[1].name].append(p)
+    def __init__(
+        self,
+        a: Component,
+        b: Component,
+        normalized=False,
+        timezones: tuple[TimeZoneResolver, TimeZoneResolver] = None,
+    ):
+        if not normalized:
+            a = a.normalized()
+            b = b.normalized()
+        if timezones is None:
+            timezones = (
+                TimeZoneResolver.from_component(a),
+                TimeZoneResolver.from_component(b),
+            )
 
-        b_comps = collections.defaultdict(list)
-        for p in enumerate(b.comps):
-            b_comps[p[1].name].append(p)
+        a_props = a.prop_index
+        b_props = b.prop_index
+        a_comps = a.comp_index
+        b_comps = b.comp_index
+        ignore_props = {"JSID"}
 
-        def _aonly(a, b):
+        def _aonly(a, b, ignore=()):
             l = []
-            for k in set(a.keys()) - set(b.keys()):
-                l.extend([t[0] for t in a[k]])
+            for k in a.keys() - b.keys():
+                if k not in ignore:
+                    l.extend([t[0] for t in a[k]])
             return l
 
-        self.del_prop_a = _aonly(a_props, b_props)
+        self.del_prop_a = _aonly(a_props, b_props, ignore_props)
         self.del_comp_a = _aonly(a_comps, b_comps)
         if not a.allow_any:
-            self.add_prop_b = _aonly(b_props, a_props)
+            self.add_prop_b = _aonly(b_props, a_props, ignore_props)
             self.add_comp_b = _aonly(b_comps, a_comps)
         else:
             self.add_prop_b = []
             self.add_comp_b = []
 
         self.diff_comps = []
-        for name in set(a_comps.keys()) & set(b_comps.keys()):
-            for (idx_a, comp_a), (idx_b, comp_b) in zip(a_comps[name], b_comps[name]):
-                diff = ComponentDiff(comp_a, comp_b)
+        for name in a_comps.keys() & b_comps.keys():
+            pairs, rest_a, rest_b = ComponentDiff._match_comps(
+                a_comps[name], b_comps[name], timezones
+            )
+            for (idx_a, comp_a), (idx_b, comp_b) in pairs:
+                diff = ComponentDiff(
+                    comp_a, comp_b, normalized=True, timezones=timezones
+                )
                 if not diff.empty():
                     self.diff_comps.append((idx_a, idx_b, diff))
-            len_a = len(a_comps[name])
-            len_b = len(b_comps[name])
-            if len_a > len_b:
-                self.del_comp_a.extend(
-                    idx for (idx, comp) in a_comps[name][len_a - len_b :]
-                )
-            elif len_b > len_a:
-                self.add_comp_b.extend(
-                    idx for (idx, comp) in b_comps[name][len_b - len_a :]
-                )
+            self.del_comp_a.extend(idx for (idx, comp) in rest_a)
+            self.add_comp_b.extend(idx for (idx, comp) in rest_b)
 
         self.diff_props = []
-        for name in set(a_props.keys()) & set(b_props.keys()):
+        for name in (a_props.keys() & b_props.keys()) - ignore_props:
             for (idx_a, prop_a), (idx_b, prop_b) in zip(a_props[name], b_props[name]):
                 diff = PropertyDiff(prop_a, prop_b)
                 if not diff.empty():
@@ -409,6 +525,9 @@ class ComponentDiff:
                     idx for (idx, prop) in b_props[name][len_b - len_a :]
                 )
 
+        self._ignore_equal_recurrences(a, b, timezones)
+        self._ignore_equal_datetimes(a, b, timezones)
+
         self.del_prop_a.sort()
         self.del_comp_a.sort()
         self.add_prop_b.sort()
@@ -416,6 +535,141 @@ class ComponentDiff:
         self.diff_comps.sort(key=lambda v: (v[0], v[1]))
         self.diff_props.sort(key=lambda v: (v[0], v[1]))
 
+    @staticmethod
+    def _comp_key(comp: Component, tzs: TimeZoneResolver) -> tuple | None:
+        """Returns the key that identifies a component among its siblings,
+        or None if it has neither UID, RECURRENCE-ID nor JSID."""
+        uid = comp.get_value("UID")
+        recurrence_id = None
+        props = comp.prop_index.get("RECURRENCE-ID")
+        if props:
+            prop = props[0][1]
+            # Match instances in different time zones by their UTC time.
+            recurrence_id = ComponentDiff._to_utc(prop, tzs) or prop.value
+        # JSID may be omitted if it equals the UID.
+        jsid = comp.get_value("JSID", uid)
+        if uid is None and recurrence_id is None and jsid is None:
+            return None
+        return (uid, recurrence_id, jsid)
+
+    @staticmethod
+    def _match_comps(
+        comps_a: list[tuple[int, Component]],
+        comps_b: list[tuple[int, Component]],
+        timezones: tuple[TimeZoneResolver, TimeZoneResolver],
+    ) -> tuple[list, list, list]:
+        """Pairs subcomponents of the same name.
+
+        Components with equal keys are paired first, in linear time. The
+        remaining components, such as those without key, are paired in
+        order. Returns the pairs and the unpaired components of a and b."""
+        keyed_b = {}
+        for item in comps_b:
+            key = ComponentDiff._comp_key(item[1], timezones[1])
+            if key is not None:
+                keyed_b.setdefault(key, collections.deque()).append(item)
+        pairs = []
+        rest_a = []
+        paired_b = set()
+        for item in comps_a:
+            key = ComponentDiff._comp_key(item[1], timezones[0])
+            candidates = keyed_b.get(key) if key is not None else None
+            if candidates:
+                item_b = candidates.popleft()
+                pairs.append((item, item_b))
+                paired_b.add(item_b[0])
+            else:
+                rest_a.append(item)
+        rest_b = [item for item in comps_b if item[0] not in paired_b]
+        pairs.extend(zip(rest_a, rest_b))
+        n = min(len(rest_a), len(rest_b))
+        return pairs, rest_a[n:], rest_b[n:]
+
+    # Properties that define the recurrence set, besides DTSTART
+    RECURRENCE_PROPS = ("RRULE", "RDATE", "EXDATE", "EXRULE")
+
+    def _ignore_equal_recurrences(
+        self,
+        a: Component,
+        b: Component,
+        timezones: tuple[TimeZoneResolver, TimeZoneResolver],
+    ):
+        """Drops differences in recurrence properties if both components
+        have the same occurrences and rule bounds, e.g. for differently
+        written rules. Only properties of the same name may differ."""
+        if any(
+            (name in a.prop_index) != (name in b.prop_index)
+            for name in ComponentDiff.RECURRENCE_PROPS
+        ):
+            return
+        recur_a = set(
+            idx
+            for name in ComponentDiff.RECURRENCE_PROPS
+            for idx, _ in a.prop_index.get(name, [])
+        )
+        recur_b = set(
+            idx
+            for name in ComponentDiff.RECURRENCE_PROPS
+            for idx, _ in b.prop_index.get(name, [])
+        )
+        if not (
+            recur_a.intersection(self.del_prop_a)
+            or recur_b.intersection(self.add_prop_b)
+            or any(idx_a in recur_a for idx_a, _, _ in self.diff_props)
+        ):
+            return
+        try:
+            # An example may omit DTSTART, but the rules still must match.
+            dtstart = b.get_props("DTSTART")
+            recur_set_a = RecurrenceSet.from_component(
+                a, start=dtstart[0] if dtstart else None, timezones=timezones[0]
+            )
+            recur_set_b = RecurrenceSet.from_component(b, timezones=timezones[1])
+            if recur_set_a.bounds() != recur_set_b.bounds():
+                return
+            if recur_set_a.expand() != recur_set_b.expand():
+                return
+        except RecurrenceError:
+            return
+        self.del_prop_a = [idx for idx in self.del_prop_a if idx not in recur_a]
+        self.add_prop_b = [idx for idx in self.add_prop_b if idx not in recur_b]
+        self.diff_props = [d for d in self.diff_props if d[0] not in recur_a]
+
+    # Properties with a single DATE-TIME value that may have a TZID
+    DATETIME_PROPS = ("DTSTART", "DTEND", "DUE", "RECURRENCE-ID")
+
+    def _ignore_equal_datetimes(
+        self,
+        a: Component,
+        b: Component,
+        timezones: tuple[TimeZoneResolver, TimeZoneResolver],
+    ):
+        """Drops differences in date-time properties that denote the same
+        UTC time, e.g. for local times in different time zones."""
+
+        to_utc = ComponentDiff._to_utc
+
+        def same_instant(idx_a, idx_b, diff):
+            prop_a = a.props[idx_a]
+            if prop_a.name not in ComponentDiff.DATETIME_PROPS:
+                return False
+            prop_b = b.props[idx_b]
+            # Only the value and TZID may differ.
+            params = [prop_a.params[i] for i in diff.del_param_a]
+            params.extend(prop_b.params[i] for i in diff.add_param_b)
+            params.extend(prop_a.params[i] for i, _ in diff.diff_params)
+            if any(param.name != "TZID" for param in params):
+                return False
+            utc = to_utc(prop_a, timezones[0])
+            return utc is not None and utc == to_utc(prop_b, timezones[1])
+
+        self.diff_props = [d for d in self.diff_props if not same_instant(*d)]
+
+    @staticmethod
+    def _to_utc(prop: Property, tzs: TimeZoneResolver) -> datetime.datetime:
+        tzid = next((p.value for p in prop.params if p.name == "TZID"), None)
+        return tzs.to_utc(prop.value, tzid)
+
     def empty(self) -> bool:
         return (
             not self.del_comp_a
@@ -427,18 +681,87 @@ class ComponentDiff:
         )
 
 
-class JsonPath(UserList):
-    def __init__(self, data):
-        super().__init__(data)
+class JsonPath:
+    """The path of segments to a value in a JSON document.
+
+    Paths are immutable. A path links to its parent path, so the paths of
+    all members of an object share the path of the object, and adding a
+    segment costs one small object. The tuple of segments and the encoded
+    path are only built when needed, and then kept."""
+
+    __slots__ = ("parent", "name", "_len", "_segments", "_encoded")
+
+    def __init__(self, segments: Iterable[str] = ()):
+        segments = tuple(segments)
+        self.parent = JsonPath(segments[:-1]) if segments else None
+        """Path without the last segment, or None for the empty path"""
+        self.name = segments[-1] if segments else None
+        """Last segment, or None for the empty path"""
+        self._len = len(segments)
+        self._segments = segments
+        self._encoded = None if segments else ""
+
+    def child(self, name: str) -> JsonPath:
+        """Returns this path with one more segment."""
+        path = JsonPath.__new__(JsonPath)
+        path.parent = self
+        path.name = name
+        path._len = self._len + 1
+        path._segments = None
+        path._encoded = None
+        return path
+
+    def segments(self) -> tuple[str, ...]:
+        if self._segments is None:
+            names = []
+            path = self
+            while path._segments is None:
+                names.append(path.name)
+                path = path.parent
+            names.reverse()
+            self._segments = path._segments + tuple(names)
+        return self._segments
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __getitem__(self, index):
+        if index == -1 and self._len:
+            return self.name
+        return self.segments()[index]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.segments())
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, JsonPath):
+            return NotImplemented
+        return self is other or (
+            self._len == other._len and self.segments() == other.segments()
+        )
+
+    def __hash__(self) -> int:
+        return hash(self.segments())
+
+    def __reduce__(self):
+        return JsonPath, (self.segments(),)
+
+    def __repr__(self) -> str:
+        return f"JsonPath({list(self.segments())!r})"
 
     @classmethod
+    @functools.lru_cache(maxsize=1024)
     def decode(cls, s: str) -> JsonPath:
-        return JsonPath(
-            list(s.replace("~1", "/").replace("~0", "~") for s in s.split("/"))
-        )
+        return JsonPath(s.replace("~1", "/").replace("~0", "~") for s in s.split("/"))
 
     def encode(self) -> str:
-        return "/".join(s.replace("~", "~0").replace("/", "~1") for s in self.data)
+        if self._encoded is None:
+            name = self.name.replace("~", "~0").replace("/", "~1")
+            if self.parent._len:
+                self._encoded = f"{self.parent.encode()}/{name}"
+            else:
+                self._encoded = name
+        return self._encoded
 
 
 @dataclass
@@ -453,7 +776,7 @@ class JsonDiff:
     @classmethod
     def diff_json(cls, a: dict, b: dict) -> JsonDiff:
         missing, notequal, unexpected = JsonDiff._diff_jval(
-            a, b, JsonPath([]), JsonPath([])
+            a, b, JsonPath(), JsonPath()
         )
         return JsonDiff(missing, notequal, unexpected)
 
@@ -471,17 +794,25 @@ class JsonDiff:
             return [], [(apath, bpath)], []
         return [], [], []
 
+    @staticmethod
+    def _same_scalar(a, b) -> bool:
+        """Returns true if a and b are the same value other than an object
+        or array, so that diffing them needs no paths."""
+        return type(a) is type(b) and not isinstance(a, (dict, list)) and a == b
+
     @staticmethod
     def _diff_array(
         a: list, b: list, apath: JsonPath, bpath: JsonPath
     ) -> tuple[list[JsonPath], list[JsonPath], list[JsonPath]]:
         n = min(len(a), len(b))
-        missing = [apath + [f"{i}"] for i in range(n, len(a))]
-        unexpected = [bpath + [f"{i}"] for i in range(n, len(b))]
+        missing = [apath.child(f"{i}") for i in range(n, len(a))]
+        unexpected = [bpath.child(f"{i}") for i in range(n, len(b))]
         notequal = []
         for i in range(n):
+            if JsonDiff._same_scalar(a[i], b[i]):
+                continue
             miss, neq, unex = JsonDiff._diff_jval(
-                a[i], b[i], apath + [f"{i}"], bpath + [f"{i}"]
+                a[i], b[i], apath.child(f"{i}"), bpath.child(f"{i}")
             )
             missing.extend(miss)
             notequal.extend(neq)
@@ -492,24 +823,130 @@ class JsonDiff:
     def _diff_dict(
         a: dict, b: dict, apath: JsonPath, bpath: JsonPath
     ) -> tuple[list[JsonPath], list[JsonPath], list[JsonPath]]:
-        extra = a.pop("...", None)
+        extra = "..." in a
+        if extra:
+            a = {k: v for k, v in a.items() if k != "..."}
         akeys, both, bkeys = JsonDiff._split_keys(a, b, apath, bpath)
-        missing = [apath + [key] for key in akeys]
-        unexpected = [bpath + [key] for key in bkeys]
-        if extra is not None:
-            a["..."] = extra
-            unexpected.clear()
+        missing = [apath.child(key) for key in akeys]
+        unexpected = [] if extra else [bpath.child(key) for key in bkeys]
 
         notequal = []
         for akey, bkey in both:
+            if JsonDiff._same_scalar(a[akey], b[bkey]):
+                continue
             miss, neq, unex = JsonDiff._diff_jval(
-                a[akey], b[bkey], apath + [akey], bpath + [bkey]
+                a[akey], b[bkey], apath.child(akey), bpath.child(bkey)
             )
             missing.extend(miss)
             notequal.extend(neq)
             unexpected.extend(unex)
+
+        if missing or notequal or unexpected:
+            JsonDiff._ignore_equal_recurrences(
+                a, b, apath, bpath, missing, notequal, unexpected
+            )
+            JsonDiff._ignore_equal_datetimes(
+                a, b, apath, bpath, missing, notequal, unexpected
+            )
         return missing, notequal, unexpected
 
+    # Properties that define recurrence rules
+    RECURRENCE_KEYS = frozenset(
+        ("recurrenceRules", "recurrenceRule", "excludedRecurrenceRules")
+    )
+
+    @staticmethod
+    def _ignore_equal_recurrences(
+        a: dict,
+        b: dict,
+        apath: JsonPath,
+        bpath: JsonPath,
+        missing: list[JsonPath],
+        notequal: list[tuple[JsonPath]],
+        unexpected: list[JsonPath],
+    ):
+        """Drops differences in recurrence rules if both objects have the
+        same occurrences and rule bounds, e.g. for differently written
+        rules. Only the values of the same keys may differ."""
+        keys = JsonDiff.RECURRENCE_KEYS
+        if keys.isdisjoint(a) and keys.isdisjoint(b):
+            return
+        if keys.intersection(a) != keys.intersection(b):
+            return
+
+        def is_recur(path, base):
+            return len(path) > len(base) and path[len(base)] in keys
+
+        if not (
+            any(is_recur(p, apath) for p in missing)
+            or any(is_recur(pa, apath) for pa, _ in notequal)
+            or any(is_recur(p, bpath) for p in unexpected)
+        ):
+            return
+        try:
+            # An example may omit start, but the rules still must match.
+            recur_set_a = RecurrenceSet.from_json(a, start=b.get("start"))
+            recur_set_b = RecurrenceSet.from_json(b)
+            if recur_set_a.bounds() != recur_set_b.bounds():
+                return
+            if recur_set_a.expand() != recur_set_b.expand():
+                return
+        except RecurrenceError:
+            return
+        missing[:] = [p for p in missing if not is_recur(p, apath)]
+        notequal[:] = [neq for neq in notequal if not is_recur(neq[0], apath)]
+        unexpected[:] = [p for p in unexpected if not is_recur(p, bpath)]
+
+    # Local date-time properties and the property defining their time zone
+    DATETIME_KEYS = (
+        (("start", "due"), "timeZone"),
+        (("recurrenceId",), "recurrenceIdTimeZone"),
+    )
+
+    @staticmethod
+    def _ignore_equal_datetimes(
+        a: dict,
+        b: dict,
+        apath: JsonPath,
+        bpath: JsonPath,
+        missing: list[JsonPath],
+        notequal: list[tuple[JsonPath]],
+        unexpected: list[JsonPath],
+    ):
+        """Drops differences in date-times and their time zones if both
+        objects denote the same UTC times, e.g. for local times in
+        different time zones."""
+        timezones = None
+        for datetime_keys, tz_key in JsonDiff.DATETIME_KEYS:
+            keys = (*datetime_keys, tz_key)
+
+            def is_datetime(path, base):
+                return len(path) == len(base) + 1 and path[-1] in keys
+
+            if not (
+                any(is_datetime(p, apath) for p in missing)
+                or any(is_datetime(pa, apath) for pa, _ in notequal)
+                or any(is_datetime(p, bpath) for p in unexpected)
+            ):
+                continue
+            if timezones is None:
+                timezones = (
+                    TimeZoneResolver.from_json(a),
+                    TimeZoneResolver.from_json(b),
+                )
+            values = [key for key in datetime_keys if key in a or key in b]
+            if not values or not all(
+                isinstance(a.get(key), str)
+                and isinstance(b.get(key), str)
+                and (utc := timezones[0].to_utc(a[key], a.get(tz_key))) is not None
+                and utc == timezones[1].to_utc(b[key], b.get(tz_key))
+                for key in values
+            ):
+                continue
+            missing[:] = [p for p in missing if not is_datetime(p, apath)]
+            notequal[:] = [neq for neq in notequal if not is_datetime(neq[0], apath)]
+            unexpected[:] = [p for p in unexpected if not is_datetime(p, bpath)]
+
     @staticmethod
     def _split_keys(
         a: dict, b: dict, apath: JsonPath, bpath: JsonPath
@@ -524,7 +961,7 @@ class JsonDiff:
         Note that the keys in the middle list may differ for a and
         b for properties where the keys are of JSCalendar type Id."""
 
-        if len(apath) and len(bpath) and apath[-1] == bpath[-1]:
+        if apath.name is not None and apath.name == bpath.name:
             # Pair the following objects not by verbatim key
             # but by a key derived from their property values.
             objkeys = {
@@ -536,7 +973,7 @@ class JsonDiff:
                 "virtualLocations": lambda v: v.get("uri"),
                 "participants": lambda v: v.get("calendarAddress"),
             }
-            objkey = objkeys.get(apath[-1])
+            objkey = objkeys.get(apath.name)
             if objkey:
                 if len(a) == 1 and len(b) == 1:
                     return [], [(list(a)[0], list(b)[0])], []
@@ -565,17 +1002,23 @@ class JsonDiff:
 
     @staticmethod
     def _normalize(data):
+        """Returns the normalized value of data.
+
+        Data is not modified. Any of its values that already are normalized
+        are shared with the result, and data itself is returned if nothing
+        needs to change."""
+
         # Traverse lists
         if isinstance(data, list):
-            for v in data:
-                JsonDiff._normalize(v)
-            return
+            vals = [JsonDiff._normalize(v) for v in data]
+            return data if _same_items(vals, data) else vals
 
         # Ignore basic types
         if not isinstance(data, dict):
-            return
+            return data
 
         typ = data.get("@type")
+        norm = dict(data)
         # Special-case recurrence rules
         if typ == "RecurrenceRule":
             for k in (
@@ -588,33 +1031,31 @@ class JsonDiff:
                 "bySecond",
                 "bySetPosition",
             ):
-                vals = data.get(k)
+                vals = norm.get(k)
                 if k == "byDay":
                     cmp = lambda x: (x.get("day"), x.get("nthOfPeriod", 0))
                 else:
                     cmp = None
                 try:
-                    data[k] = sorted(vals, key=cmp)
+                    norm[k] = _sorted(vals, key=cmp)
                 except (AttributeError, TypeError):
                     pass
         elif typ == "ICalComponent":
-            ical_props = data.get("properties")
+            ical_props = norm.get("properties")
             if ical_props:
                 # Sort jCal properties by name, value, value type
-                ical_props.sort(key=itemgetter(0, 3, 2))
-            ical_comps = data.get("components")
+                norm["properties"] = _sorted(ical_props, key=itemgetter(0, 3, 2))
+            ical_comps = norm.get("components")
             if ical_comps:
                 # Sort jCal components by name
-                ical_comps.sort(key=itemgetter(0))
+                norm["components"] = _sorted(ical_comps, key=itemgetter(0))
         elif typ == "Group":
-            entries = data.get("entries")
+            entries = norm.get("entries")
             if isinstance(entries, list):
-                pass
-                entries.sort(key=lambda e: (e.get("uid"), e.get("start")))
+                norm["entries"] = _sorted(
+                    entries, key=lambda e: (e.get("uid"), e.get("start"))
+                )
 
-        # Do not normalize localizations and recurrence overrides
-        localizations = data.pop("localizations", None)
-        recurrence_overrides = data.pop("recurrenceOverrides", None)
         # Remove default and optional null values
         common_default_values = {
             "description": "",
@@ -665,28 +1106,34 @@ class JsonDiff:
             "VirtualLocation": {"name": ""},
         }
         for k, v in default_values.get(typ, {}).items():
-            if k in data and data[k] == v:
-                del data[k]
+            if k in norm and norm[k] == v:
+                del norm[k]
 
-        # Normalize subobjects
-        for v in data.values():
-            JsonDiff._normalize(v)
+        # Normalize subobjects, but not localizations and recurrence overrides
+        for k, v in norm.items():
+            if k != "localizations" and k != "recurrenceOverrides":
+                norm[k] = JsonDiff._normalize(v)
+        for k in ("localizations", "recurrenceOverrides"):
+            if k in norm:
+                norm[k] = norm.pop(k)
 
-        # Add back localizations and recurrenceOverrides
-        if localizations is not None:
-            data["localizations"] = localizations
-        if recurrence_overrides is not None:
-            data["recurrenceOverrides"] = recurrence_overrides
+        if list(norm) == list(data) and all(v is data[k] for k, v in norm.items()):
+            return data
+        return norm
 
     @staticmethod
     def normalize_json(data: dict) -> dict:
-        data = copy.deepcopy(data)
-        JsonDiff._normalize(data)
-        return data
+        return JsonDiff._normalize(data)
 
 
 @dataclass
 class JObject:
+    """A JSCalendar object.
+
+    Its data must not be modified. Methods such as normalized and
+    with_default_props derive new objects, which share any unchanged
+    values with their origin."""
+
     data: dict
 
     def __init__(self, data):
@@ -696,7 +1143,7 @@ class JObject:
         return json.dumps(self.data, sort_keys=True, indent=2)
 
     def to_group(self) -> JObject:
-        data = copy.deepcopy(self.data)
+        data = self.data
         default_parent = {
             "AbsoluteTrigger": lambda d: {"@type": "Alert", "trigger": d},
             "Alert": lambda d: {"@type": "Event", "alerts": {"1": d}},
@@ -719,7 +1166,8 @@ class JObject:
         return JObject(data)
 
     def to_json(self) -> dict:
-        return copy.deepcopy(self.data)
+        """Returns the JSON data, which the caller must not modify."""
+        return self.data
 
     def diff_json(self, data: dict) -> JsonDiff:
         return JsonDiff.diff_json(self.data, data)
@@ -728,13 +1176,14 @@ class JObject:
         return JObject(JsonDiff.normalize_json(self.data))
 
     def with_default_props(self) -> JObject:
-        def add_default_props(jval: dict):
+        def add_default_props(jval):
             if isinstance(jval, list):
-                for v in jval:
-                    add_default_props(v)
+                vals = [add_default_props(v) for v in jval]
+                return jval if _same_items(vals, jval) else vals
             elif isinstance(jval, dict):
+                orig = jval
                 if "@type" in jval and "..." in jval:
-                    del jval["..."]
+                    jval = {k: v for k, v in jval.items() if k != "..."}
                     match jval.get("@type", None):
                         case "Alert":
                             if not "trigger" in jval:
@@ -765,12 +1214,13 @@ class JObject:
                             if not "updated" in jval:
                                 jval["updated"] = "2006-01-02T03:04:05Z"
                         # FIXME to be continued
-                for v in jval.values():
-                    add_default_props(v)
+                vals = {k: add_default_props(v) for k, v in jval.items()}
+                if jval is orig and all(v is jval[k] for k, v in vals.items()):
+                    return jval
+                return vals
+            return jval
 
-        data = copy.deepcopy(self.data)
-        add_default_props(data)
-        return JObject(data)
+        return JObject(add_default_props(self.data))
 
     @classmethod
     def parse(cls, s: str, default_type="Event") -> JObject:
@@ -778,7 +1228,7 @@ class JObject:
         if s[0] != "{":
             s = "{" + s + ',"...": ""' + "}"
         try:
-            data = json.loads(s)
+            data = jsoncodec.loads(s)
         except json.JSONDecodeError as e:
             raise ParseError(f"JSON: {e}") from e
         if not "@type" in data:
@@ -0,0 +1,42 @@
+"""Encodes and decodes JSON data exchanged with backends.
+
+If orjson is installed, it encodes and decodes the data, otherwise the
+json module of the standard library does. Data that orjson rejects, such
+as integers beyond 64 bits or NaN in JSON text, is handed to the json
+module instead. Decoding accepts any bytes-like data, including
+memoryviews, without copying it first. Formatted output, such as the
+normalized responses in reports and generated examples, is always written
+by the json module, so it does not depend on the installed packages."""
+
+from __future__ import annotations
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(data: bytes | bytearray | memoryview | str):
+    """Decodes JSON data."""
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    if isinstance(data, memoryview):
+        data = str(data, "utf-8")
+    return json.loads(data)
+
+
+def dumps(obj, sort_keys=False) -> bytes:
+    """Encodes obj as compact UTF-8 JSON data."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS if sort_keys else 0)
+        except orjson.JSONEncodeError:
+            pass
+    s = json.dumps(obj, sort_keys=sort_keys, ensure_ascii=False, separators=(",", ":"))
+    # Lone surrogates can only occur in strings, where they become escapes.
+    return s.encode("utf-8", "backslashreplace")
@@ -0,0 +1,240 @@
+"""Decodes and diffs JSCalendar Group responses while their bytes arrive.
+
+The decoder scans the bytes of a JSON object for the boundaries of its
+members and of the elements of its entries array, and only decodes a
+value once all of its bytes have arrived. It keeps no more than the
+bytes of the value in progress, so the entries of a large Group can be
+diffed one at a time while the response still downloads."""
+
+from __future__ import annotations
+
+import re
+
+from . import jsoncodec
+from .jsical import JsonDiff
+
+# Whitespace between JSON tokens
+_WS = re.compile(rb"[ \t\n\r]*")
+
+# A complete string
+_STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"', re.S)
+
+# Bytes up to the next bracket or incomplete string
+_PLAIN = re.compile(rb'(?:[^"{}\[\]]+|"[^"\\]*(?:\\.[^"\\]*)*")*', re.S)
+
+# Bytes of a number, true, false or null
+_SCALAR = re.compile(rb"[^,}\] \t\n\r]*")
+
+_QUOTE, _COLON, _COMMA = b'"', b":", b","
+_LBRACE, _RBRACE, _LBRACKET, _RBRACKET = b"{", b"}", b"[", b"]"
+
+
+class JsonStreamError(ValueError):
+    """The data is not a JSON object."""
+
+
+class GroupDecoder:
+    """Decodes a JSON object incrementally.
+
+    The elements of the array member named by array are returned by feed
+    as soon as they are complete, all other members are returned by
+    close."""
+
+    def __init__(self, array: str = "entries"):
+        self.array = array
+        self.members = {}
+        """Decoded members, except the array elements"""
+        self._buf = bytearray()
+        self._pos = 0
+        self._state = "start"
+        self._first = False
+        self._key = None
+        # Start, scan position and nesting depth of the value in
+        # progress, which may span several chunks of data.
+        self._value = None
+        self._scan = 0
+        self._depth = 0
+
+    def feed(self, data: bytes) -> list:
+        """Adds data and returns the array elements that it completes."""
+        self._buf += data
+        elements = []
+        self._parse(elements)
+        # Only keep the bytes of the value in progress.
+        keep = self._pos if self._value is None else self._value
+        if keep:
+            del self._buf[:keep]
+            self._pos -= keep
+            self._scan -= keep
+            if self._value is not None:
+                self._value = 0
+        return elements
+
+    def close(self) -> dict:
+        """Returns the members of the object, without array elements."""
+        if self._state != "end":
+            raise JsonStreamError("incomplete JSON object")
+        return self.members
+
+    def _decode(self, end: int):
+        start, self._value = self._value, None
+        self._pos = end
+        # Decode in place, and release the view before the buffer shrinks.
+        with memoryview(self._buf)[start:end] as data:
+            try:
+                return jsoncodec.loads(data)
+            except ValueError as e:
+                raise JsonStreamError(e) from e
+
+    def _value_end(self) -> int | None:
+        """Returns the end of the value in progress, or None if incomplete."""
+        buf = self._buf
+        pos = self._scan
+        if self._depth == 0:
+            c = buf[pos : pos + 1]
+            if c == _QUOTE:
+                m = _STRING.match(buf, pos)
+                return m.end() if m else None
+            if c != _LBRACE and c != _LBRACKET:
+                end = _SCALAR.match(buf, pos).end()
+                return end if end < len(buf) else None
+            self._depth = 1
+            pos += 1
+        while True:
+            pos = _PLAIN.match(buf, pos).end()
+            c = buf[pos : pos + 1]
+            if not c or c == _QUOTE:
+                # Wait for the rest of the data, or of an incomplete string.
+                self._scan = pos
+                return None
+            self._depth += 1 if c == _LBRACE or c == _LBRACKET else -1
+            pos += 1
+            if self._depth == 0:
+                return pos
+
+    def _parse(self, elements: list):
+        buf = self._buf
+        while True:
+            if self._value is None:
+                self._pos = _WS.match(buf, self._pos).end()
+                c = buf[self._pos : self._pos + 1]
+                if not c:
+                    return
+                state = self._state
+                if state == "start" or state == "end":
+                    if state == "end" or c != _LBRACE:
+                        raise JsonStreamError(f"unexpected {c!r} in JSON object")
+                    self._state = "key"
+                    self._first = True
+                    self._pos += 1
+                    continue
+                if state == "next" or state == "next_element":
+                    close = _RBRACE if state == "next" else _RBRACKET
+                    if c == _COMMA:
+                        self._state = "key" if state == "next" else "element"
+                        self._first = False
+                    elif c == close:
+                        self._state = "end" if state == "next" else "next"
+                    else:
+                        raise JsonStreamError(f"unexpected {c!r} in JSON object")
+                    self._pos += 1
+                    continue
+                if self._first and (
+                    (state == "key" and c == _RBRACE)
+                    or (state == "element" and c == _RBRACKET)
+                ):
+                    self._state = "end" if state == "key" else "next"
+                    self._pos += 1
+                    continue
+                if state == "colon":
+                    if c != _COLON:
+                        raise JsonStreamError(f"unexpected {c!r} in JSON object")
+                    self._state = "value"
+                    self._pos += 1
+                    continue
+                if state == "key" and c != _QUOTE:
+                    raise JsonStreamError(f"unexpected {c!r} in JSON object")
+                if state == "value" and self._key == self.array and c == _LBRACKET:
+                    self.members[self._key] = []
+                    self._state = "element"
+                    self._first = True
+                    self._pos += 1
+                    continue
+                self._value = self._scan = self._pos
+                self._depth = 0
+
+            end = self._value_end()
+            if end is None:
+                return
+            value = self._decode(end)
+            if self._state == "key":
+                self._key = value
+                self._state = "colon"
+            elif self._state == "value":
+                self.members[self._key] = value
+                self._state = "next"
+            else:
+                elements.append(value)
+                self._state = "next_element"
+
+
+class GroupStreamDiff:
+    """Tells if a JSCalendar Group response matches the expected group,
+    while the bytes of the response arrive.
+
+    Each entry of the response is normalized and diffed against the
+    expected entry with the same uid as soon as it is decoded, and then
+    discarded. The result equals the full diff of the normalized groups,
+    which pairs entries ordered by uid, if all entries have distinct
+    uids. Any difference only is detected, not recorded, so the caller
+    diffs the full response to report it."""
+
+    def __init__(self, expected: dict):
+        self.expected = {entry["uid"]: entry for entry in expected["entries"]}
+        self.rest = {k: v for k, v in expected.items() if k != "entries"}
+        self.matched = set()
+        self.decoder = GroupDecoder("entries")
+        self.ok = True
+        """False once the response is known to differ"""
+
+    @staticmethod
+    def supports(expected: dict) -> bool:
+        """Returns true if all expected entries have distinct uids."""
+        entries = expected.get("entries")
+        if not isinstance(entries, list) or not entries:
+            return False
+        uids = {entry.get("uid") for entry in entries if isinstance(entry, dict)}
+        return len(uids) == len(entries) and all(isinstance(u, str) for u in uids)
+
+    def feed(self, data: bytes):
+        """Diffs the entries that data completes."""
+        if not self.ok:
+            return
+        try:
+            entries = self.decoder.feed(data)
+        except JsonStreamError:
+            self.ok = False
+            return
+        for entry in entries:
+            uid = entry.get("uid") if isinstance(entry, dict) else None
+            expected = self.expected.get(uid) if isinstance(uid, str) else None
+            if expected is None or uid in self.matched:
+                self.ok = False
+                return
+            self.matched.add(uid)
+            if not JsonDiff.diff_json(expected, JsonDiff.normalize_json(entry)).empty():
+                self.ok = False
+                return
+
+    def close(self) -> bool:
+        """Returns true if the response matches the expected group."""
+        if not self.ok:
+            return False
+        try:
+            members = self.decoder.close()
+        except JsonStreamError:
+            return False
+        if len(self.matched) != len(self.expected):
+            return False
+        rest = {k: v for k, v in members.items() if k != "entries"}
+        return JsonDiff.diff_json(self.rest, JsonDiff.normalize_json(rest)).empty()
@@ -0,0 +1,140 @@
+"""Accounts the memory that each phase of a run allocates.
+
+The phases are the spans that the trace module records, such as test
+extraction, parsing, backend requests, normalization, diffing and
+reporting. For each phase name, the profile records how often it ran,
+the highest peak of traced memory above the memory in use when it
+started, and the memory it retained in total. Nested phases count
+towards their enclosing phase, too. Since all threads share the traced
+memory, phases are only accounted correctly when they run one at a time.
+
+The profile also lists the lines of this package that hold the most
+memory at the high-water mark of memory in use. Memory allocated by
+library code, such as the json module, counts towards the line of this
+package that called into the library."""
+
+from __future__ import annotations
+
+import collections
+import os
+import tracemalloc
+
+from dataclasses import asdict, dataclass
+
+MiB = 1 << 20
+
+TRACEBACK_FRAMES = 32
+"""Frames to keep per allocation to find the calling line of this package"""
+
+SNAPSHOT_GROWTH = 1.1
+"""Factor by which memory in use must grow to take another snapshot"""
+
+TOP_SITES = 20
+"""Number of allocation sites to report"""
+
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__)) + os.sep
+
+
+@dataclass
+class PhaseMemory:
+    """The memory accounted to all runs of a phase."""
+
+    name: str
+    count: int = 0
+    """Number of times the phase ran"""
+    peak: int = 0
+    """Highest peak of bytes in use above the bytes in use at its start"""
+    retained: int = 0
+    """Total bytes still in use at its end, less bytes in use at its start"""
+
+
+@dataclass
+class AllocationSite:
+    """A line of this package and the memory allocated from it."""
+
+    file: str
+    """File name relative to the package directory"""
+    line: int
+    size: int
+    """Bytes held by blocks allocated from this line"""
+    blocks: int
+
+
+class MemoryProfiler:
+    """Accounts memory per phase while tracemalloc traces allocations."""
+
+    def __init__(self):
+        tracemalloc.start(TRACEBACK_FRAMES)
+        self.phases: dict[str, PhaseMemory] = {}
+        self.peak = 0
+        """Highest bytes in use seen so far"""
+        # Bytes in use at the start and highest peak of each open phase
+        self._stack: list[list[int]] = []
+        self._snapshot = None
+        self._snapshot_size = 0
+
+    def enter(self):
+        """Starts accounting a phase."""
+        current, peak = tracemalloc.get_traced_memory()
+        self._add_peak(peak)
+        # The peak of an enclosing phase is kept on the stack meanwhile.
+        tracemalloc.reset_peak()
+        self._stack.append([current, current])
+
+    def exit(self, name: str):
+        """Stops accounting the phase that started last."""
+        current, peak = tracemalloc.get_traced_memory()
+        start, phase_peak = self._stack.pop()
+        phase_peak = max(phase_peak, peak)
+        self._add_peak(phase_peak)
+        phase = self.phases.get(name)
+        if phase is None:
+            phase = self.phases[name] = PhaseMemory(name)
+        phase.count += 1
+        phase.peak = max(phase.peak, phase_peak - start)
+        phase.retained += current - start
+        if current > self._snapshot_size * SNAPSHOT_GROWTH:
+            self._snapshot = tracemalloc.take_snapshot()
+            self._snapshot_size = current
+
+    def _add_peak(self, peak: int):
+        if self._stack:
+            self._stack[-1][1] = max(self._stack[-1][1], peak)
+        self.peak = max(self.peak, peak)
+
+    def sites(self, limit: int = TOP_SITES) -> list[AllocationSite]:
+        """Returns the lines of this package that held the most memory
+        when the most memory was in use at the end of a phase."""
+        if self._snapshot is None:
+            return []
+        sizes = collections.Counter()
+        blocks = collections.Counter()
+        for stat in self._snapshot.statistics("traceback"):
+            # Frames are ordered from the oldest call to the allocation.
+            for frame in reversed(list(stat.traceback)):
+                if frame.filename.startswith(_PACKAGE_DIR):
+                    site = (frame.filename[len(_PACKAGE_DIR) :], frame.lineno)
+                    sizes[site] += stat.size
+                    blocks[site] += stat.count
+                    break
+        return [
+            AllocationSite(file, line, size, blocks[(file, line)])
+            for (file, line), size in sizes.most_common(limit)
+        ]
+
+    def profile(self) -> dict:
+        """Returns the profile so far as JSON data."""
+        current, peak = tracemalloc.get_traced_memory()
+        self._add_peak(peak)
+        return {
+            "peak": self.peak,
+            "current": current,
+            "snapshot": self._snapshot_size,
+            "phases": [asdict(phase) for phase in self.phases.values()],
+            "sites": [asdict(site) for site in self.sites()],
+        }
+
+    def stop(self):
+        """Stops tracing allocations."""
+        self._snapshot = None
+        tracemalloc.stop()
@@ -0,0 +1,587 @@
+"""Expands iCalendar and JSCalendar recurrences to sets of occurrences.
+
+Recurrence rules are expanded one year at a time. For each year, the
+candidate days are filtered by the day-level BY* rule parts on precomputed
+per-year arrays of months, month days and weekdays, and only then combined
+with the time of day. Expansion always is bounded by a window end and a
+maximum number of occurrences. As defined in RFC 5545, Section 3.3.10,
+the start always is the first occurrence and counts towards COUNT.
+
+All date-times are compared as floating local time. A UTC UNTIL of a rule
+whose start has a time zone is converted to local time in that zone."""
+
+from __future__ import annotations
+
+import calendar
+import collections
+import dataclasses
+import datetime
+import functools
+import re
+
+from dataclasses import dataclass
+
+
+class RecurrenceError(ValueError):
+    pass
+
+
+FREQUENCIES = ("YEARLY", "MONTHLY", "WEEKLY", "DAILY", "HOURLY", "MINUTELY", "SECONDLY")
+YEARLY, MONTHLY, WEEKLY, DAILY, HOURLY, MINUTELY, SECONDLY = range(7)
+
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+
+# Years to expand recurrences without end
+RECURRENCE_WINDOW_YEARS = 10
+# Maximum number of occurrences to expand
+MAX_OCCURRENCES = 50000
+
+
+def parse_datetime(s: str) -> datetime.datetime:
+    """Parses an iCalendar DATE or DATE-TIME, or a JSCalendar date-time.
+
+    Any UTC designator is ignored. Dates are returned as midnight."""
+    m = re.fullmatch(
+        r"(\d{4})-?(\d{2})-?(\d{2})(?:T(\d{2}):?(\d{2}):?(\d{2})(?:\.\d+)?)?Z?",
+        s.strip(),
+    )
+    if not m:
+        raise RecurrenceError(f"invalid date-time: {s}")
+    try:
+        return datetime.datetime(*(int(v) for v in m.groups() if v is not None))
+    except ValueError as e:
+        raise RecurrenceError(f"invalid date-time: {s}") from e
+
+
+@dataclass(frozen=True)
+class _YearInfo:
+    year: int
+    first: int
+    """Ordinal of January 1st"""
+    length: int
+    month: tuple[int, ...]
+    """Month of each day of the year"""
+    mday: tuple[int, ...]
+    """Day of month of each day of the year"""
+    nmday: tuple[int, ...]
+    """Negative day of month of each day of the year"""
+    wday: tuple[int, ...]
+    """Weekday of each day of the year, Monday is 0"""
+    month_start: tuple[int, ...]
+    """Index of the first day of each month, and the length of the year"""
+
+
+@functools.lru_cache(maxsize=256)
+def _year_info(year: int) -> _YearInfo:
+    first = datetime.date(year, 1, 1).toordinal()
+    month, mday, nmday, month_start = [], [], [], []
+    for m in range(1, 13):
+        month_start.append(len(month))
+        days = calendar.monthrange(year, m)[1]
+        month.extend([m] * days)
+        mday.extend(range(1, days + 1))
+        nmday.extend(range(-days, 0))
+    length = len(month)
+    month_start.append(length)
+    wday0 = datetime.date(year, 1, 1).weekday()
+    wday = tuple((wday0 + i) % 7 for i in range(length))
+    return _YearInfo(
+        year,
+        first,
+        length,
+        tuple(month),
+        tuple(mday),
+        tuple(nmday),
+        wday,
+        tuple(month_start),
+    )
+
+
+def _week1_start(year: int, wkst: int) -> int:
+    """Returns the day index of the start of week number 1 in year.
+
+    Week number 1 is the first week starting on wkst with at least four
+    days in this year. The index is negative if it starts in the previous
+    year."""
+    yi = _year_info(year)
+    start = (wkst - yi.wday[0]) % 7
+    return start - 7 if start >= 4 else start
+
+
+def _num_weeks(year: int, wkst: int) -> int:
+    days = _year_info(year).length - _week1_start(year, wkst)
+    return days // 7 + (1 if days % 7 >= 4 else 0)
+
+
+@functools.lru_cache(maxsize=256)
+def _weekno_days(year: int, wkst: int, byweekno: tuple[int, ...]) -> frozenset[int]:
+    yi = _year_info(year)
+    week1 = _week1_start(year, wkst)
+    numweeks = _num_weeks(year, wkst)
+    days = set()
+    for n in byweekno:
+        if n < 0:
+            n = numweeks + n + 1
+        if not 1 <= n <= numweeks:
+            continue
+        start = week1 + (n - 1) * 7
+        days.update(i for i in range(start, start + 7) if 0 <= i < yi.length)
+    # Days before week 1 belong to the last week of the previous year.
+    if week1 > 0:
+        prev_weeks = _num_weeks(year - 1, wkst)
+        if prev_weeks in byweekno or -1 in byweekno:
+            days.update(range(0, week1))
+    # Days after the last week belong to week 1 of the next year.
+    next_week1 = _week1_start(year + 1, wkst)
+    if next_week1 < 0:
+        next_weeks = _num_weeks(year + 1, wkst)
+        if 1 in byweekno or -next_weeks in byweekno:
+            days.update(range(yi.length + next_week1, yi.length))
+    return frozenset(days)
+
+
+def _nth_weekday_days(
+    yi: _YearInfo, ranges: list[tuple[int, int]], byday: tuple[tuple[int, int], ...]
+) -> set[int]:
+    """Returns the day indices of the n-th weekdays within each range."""
+    days = set()
+    for start, end in ranges:
+        for wday, n in byday:
+            if n > 0:
+                i = start + (wday - yi.wday[start]) % 7 + (n - 1) * 7
+            else:
+                i = end - 1 - (yi.wday[end - 1] - wday) % 7 + (n + 1) * 7
+            if start <= i < end:
+                days.add(i)
+    return days
+
+
+def _parse_ints(s: str, lo: int, hi: int, nonzero=False) -> tuple[int, ...]:
+    vals = []
+    for v in s.split(","):
+        try:
+            n = int(v)
+        except ValueError as e:
+            raise RecurrenceError(f"invalid number: {v}") from e
+        if not lo <= n <= hi or nonzero and n == 0:
+            raise RecurrenceError(f"number out of range: {v}")
+        vals.append(n)
+    return tuple(sorted(set(vals)))
+
+
+def _parse_weekday(s: str) -> int:
+    try:
+        return WEEKDAYS.index(s.upper())
+    except ValueError as e:
+        raise RecurrenceError(f"invalid weekday: {s}") from e
+
+
+@dataclass(frozen=True)
+class RecurrenceRule:
+    freq: int
+    interval: int = 1
+    count: int = None
+    until: datetime.date = None
+    """Inclusive end, a date if the rule ends on a date"""
+    until_utc: bool = False
+    """True if until is a UTC date-time"""
+    bysecond: tuple[int, ...] = ()
+    byminute: tuple[int, ...] = ()
+    byhour: tuple[int, ...] = ()
+    byday: tuple[tuple[int, int], ...] = ()
+    """Weekday and n-th occurrence within the period, 0 for every"""
+    bymonthday: tuple[int, ...] = ()
+    byyearday: tuple[int, ...] = ()
+    byweekno: tuple[int, ...] = ()
+    bymonth: tuple[int, ...] = ()
+    bysetpos: tuple[int, ...] = ()
+    wkst: int = 0
+
+    @classmethod
+    def from_ical(cls, s: str) -> RecurrenceRule:
+        """Parses the value of an iCalendar RRULE property."""
+        parts = {}
+        for part in s.strip().split(";"):
+            name, sep, value = part.partition("=")
+            if not sep or not value:
+                raise RecurrenceError(f"invalid rule part: {part}")
+            parts[name.upper()] = value
+        try:
+            freq = FREQUENCIES.index(parts.get("FREQ", "").upper())
+        except ValueError as e:
+            raise RecurrenceError(f"invalid FREQ: {s}") from e
+
+        args = {"freq": freq}
+        for name, value in parts.items():
+            match name:
+                case "INTERVAL":
+                    args["interval"] = _parse_ints(value, 1, 2**31)[0]
+                case "COUNT":
+                    args["count"] = _parse_ints(value, 1, 2**31)[0]
+                case "UNTIL":
+                    until = parse_datetime(value)
+                    args["until"] = until.date() if len(value) == 8 else until
+                    args["until_utc"] = value.strip().upper().endswith("Z")
+                case "BYSECOND":
+                    args["bysecond"] = _parse_ints(value, 0, 60)
+                case "BYMINUTE":
+                    args["byminute"] = _parse_ints(value, 0, 59)
+                case "BYHOUR":
+                    args["byhour"] = _parse_ints(value, 0, 23)
+                case "BYDAY":
+                    byday = []
+                    for v in value.split(","):
+                        m = re.fullmatch(r"([+-]?\d{1,2})?([A-Za-z]{2})", v)
+                        if not m:
+                            raise RecurrenceError(f"invalid BYDAY: {v}")
+                        n = int(m.group(1)) if m.group(1) else 0
+                        byday.append((_parse_weekday(m.group(2)), n))
+                    args["byday"] = tuple(sorted(set(byday)))
+                case "BYMONTHDAY":
+                    args["bymonthday"] = _parse_ints(value, -31, 31, nonzero=True)
+                case "BYYEARDAY":
+                    args["byyearday"] = _parse_ints(value, -366, 366, nonzero=True)
+                case "BYWEEKNO":
+                    args["byweekno"] = _parse_ints(value, -53, 53, nonzero=True)
+                case "BYMONTH":
+                    args["bymonth"] = _parse_ints(value, 1, 12)
+                case "BYSETPOS":
+                    args["bysetpos"] = _parse_ints(value, -366, 366, nonzero=True)
+                case "WKST":
+                    args["wkst"] = _parse_weekday(value)
+        return RecurrenceRule(**args)
+
+    @classmethod
+    def from_json(cls, rule: dict) -> RecurrenceRule:
+        """Converts a JSCalendar RecurrenceRule object."""
+        if not isinstance(rule, dict):
+            raise RecurrenceError(f"invalid RecurrenceRule: {rule}")
+        try:
+            freq = FREQUENCIES.index(str(rule.get("frequency", "")).upper())
+        except ValueError as e:
+            raise RecurrenceError(f"invalid frequency: {rule}") from e
+
+        def ints(key, lo, hi, nonzero=False):
+            vals = rule.get(key, [])
+            if key == "byMonth":
+                # Leap months only exist in non-gregorian calendars.
+                vals = [v for v in vals if not str(v).endswith("L")]
+            if not vals:
+                return ()
+            return _parse_ints(",".join(map(str, vals)), lo, hi, nonzero)
+
+        args = {
+            "freq": freq,
+            "interval": rule.get("interval", 1),
+            "count": rule.get("count"),
+            "bysecond": ints("bySecond", 0, 60),
+            "byminute": ints("byMinute", 0, 59),
+            "byhour": ints("byHour", 0, 23),
+            "bymonthday": ints("byMonthDay", -31, 31, nonzero=True),
+            "byyearday": ints("byYearDay", -366, 366, nonzero=True),
+            "byweekno": ints("byWeekNo", -53, 53, nonzero=True),
+            "bymonth": ints("byMonth", 1, 12),
+            "bysetpos": ints("bySetPosition", -366, 366, nonzero=True),
+            "wkst": _parse_weekday(rule.get("firstDayOfWeek", "mo")),
+        }
+        if not isinstance(args["interval"], int) or args["interval"] < 1:
+            raise RecurrenceError(f"invalid interval: {rule}")
+        if "until" in rule:
+            args["until"] = parse_datetime(rule["until"])
+        byday = []
+        for nday in rule.get("byDay", []):
+            if not isinstance(nday, dict):
+                raise RecurrenceError(f"invalid NDay: {nday}")
+            n = nday.get("nthOfPeriod", 0)
+            byday.append((_parse_weekday(nday.get("day", "")), n))
+        args["byday"] = tuple(sorted(set(byday)))
+        return RecurrenceRule(**args)
+
+    def _day_filter(self, dtstart: datetime.datetime):
+        """Returns the effective day-level rule parts for this dtstart."""
+        bymonth = self.bymonth
+        bymonthday = self.bymonthday
+        byday = self.byday
+        if not (self.byweekno or self.byyearday or bymonthday or byday):
+            if self.freq == YEARLY:
+                bymonth = bymonth or (dtstart.month,)
+                bymonthday = (dtstart.day,)
+            elif self.freq == MONTHLY:
+                bymonthday = (dtstart.day,)
+            elif self.freq == WEEKLY:
+                byday = ((dtstart.weekday(), 0),)
+        if self.freq not in (YEARLY, MONTHLY) or self.byweekno:
+            # The n-th weekday only is defined within months and years.
+            byday = tuple(sorted(set((wday, 0) for wday, _ in byday)))
+        return bymonth, bymonthday, byday
+
+    def _year_days(self, yi: _YearInfo, bymonth, bymonthday, byday) -> list[int]:
+        """Returns the indices of the days in year matching the day filter."""
+        days = range(yi.length)
+        if bymonth:
+            days = [
+                i
+                for m in bymonth
+                for i in range(yi.month_start[m - 1], yi.month_start[m])
+            ]
+        if self.byweekno:
+            mask = _weekno_days(yi.year, self.wkst, self.byweekno)
+            days = [i for i in days if i in mask]
+        if self.byyearday:
+            yeardays = set(self.byyearday)
+            days = [i for i in days if i + 1 in yeardays or i - yi.length in yeardays]
+        if bymonthday:
+            mdays = set(bymonthday)
+            days = [i for i in days if yi.mday[i] in mdays or yi.nmday[i] in mdays]
+        if byday:
+            wdays = set(wday for wday, n in byday if not n)
+            nth = tuple((wday, n) for wday, n in byday if n)
+            nthdays = set()
+            if nth:
+                if self.freq == MONTHLY or bymonth:
+                    months = bymonth or range(1, 13)
+                    ranges = [
+                        (yi.month_start[m - 1], yi.month_start[m]) for m in months
+                    ]
+                else:
+                    ranges = [(0, yi.length)]
+                nthdays = _nth_weekday_days(yi, ranges, nth)
+            days = [i for i in days if yi.wday[i] in wdays or i in nthdays]
+        return sorted(days)
+
+    def _times(self, dtstart: datetime.datetime) -> tuple[list, list, list]:
+        hours = self.byhour or (range(24) if self.freq >= HOURLY else (dtstart.hour,))
+        minutes = self.byminute or (
+            range(60) if self.freq >= MINUTELY else (dtstart.minute,)
+        )
+        seconds = self.bysecond or (
+            range(60) if self.freq >= SECONDLY else (dtstart.second,)
+        )
+        return list(hours), list(minutes), list(seconds)
+
+    def _period(self, ordinal: int, year: int, month: int) -> int:
+        if self.freq == YEARLY:
+            return year
+        elif self.freq == MONTHLY:
+            return year * 12 + month - 1
+        elif self.freq == WEEKLY:
+            # Ordinal 1 is a Monday.
+            return (ordinal - 1 - self.wkst) // 7
+        return ordinal
+
+    def expand(
+        self,
+        dtstart: datetime.datetime,
+        end: datetime.datetime = None,
+        limit: int = MAX_OCCURRENCES,
+    ) -> list[datetime.datetime]:
+        """Returns the occurrences from dtstart up to but excluding end."""
+        if end is None:
+            end = datetime.datetime(dtstart.year + RECURRENCE_WINDOW_YEARS, 1, 1)
+        until = self.until
+        if until is not None and not isinstance(until, datetime.datetime):
+            until = datetime.datetime.combine(until, datetime.time.max)
+        if until is not None and until < end:
+            end = until + datetime.timedelta(microseconds=1)
+        if self.count is not None:
+            limit = min(limit, self.count)
+
+        bymonth, bymonthday, byday = self._day_filter(dtstart)
+        hours, minutes, seconds = self._times(dtstart)
+        start_ord = dtstart.toordinal()
+        start_period = self._period(start_ord, dtstart.year, dtstart.month)
+        if self.freq >= HOURLY:
+            unit = (3600, 60, 1)[self.freq - HOURLY]
+            start_units = (start_ord * 86400 + dtstart.hour * 3600) // unit
+            if self.freq >= MINUTELY:
+                start_units += (dtstart.minute * 60) // unit
+            if self.freq == SECONDLY:
+                start_units += dtstart.second
+
+        # The start always is the first occurrence, even if it does not
+        # match the rule.
+        occurrences = [dtstart] if dtstart < end else []
+        if len(occurrences) >= limit:
+            return occurrences
+        # Occurrences of the current period are collected in group,
+        # because BYSETPOS selects among all occurrences of a period.
+        group = []
+        group_period = None
+
+        def flush_group():
+            sel = group
+            if self.bysetpos:
+                n = len(group)
+                sel = sorted(
+                    set(
+                        group[p - 1 if p > 0 else n + p]
+                        for p in self.bysetpos
+                        if -n <= p <= n
+                    )
+                )
+            for dt in sel:
+                if dtstart < dt < end:
+                    occurrences.append(dt)
+                    if len(occurrences) >= limit:
+                        return False
+            return True
+
+        # BYSETPOS also counts occurrences before dtstart in its period,
+        # and a week may start in the previous year.
+        first_year = dtstart.year - 1 if self.freq == WEEKLY else dtstart.year
+        for year in range(first_year, end.year + 1):
+            if self.freq == YEARLY and (year - dtstart.year) % self.interval:
+                continue
+            yi = _year_info(year)
+            for i in self._year_days(yi, bymonth, bymonthday, byday):
+                ordinal = yi.first + i
+                day = datetime.date.fromordinal(ordinal)
+                if day > end.date():
+                    break
+                if self.freq < HOURLY:
+                    period = self._period(ordinal, year, yi.month[i])
+                    if period < start_period or (period - start_period) % self.interval:
+                        continue
+                    times = [
+                        datetime.datetime(day.year, day.month, day.day, h, m, s)
+                        for h in hours
+                        for m in minutes
+                        for s in seconds
+                        if s < 60
+                    ]
+                    if period != group_period:
+                        if group and not flush_group():
+                            return occurrences
+                        group = []
+                        group_period = period
+                    group.extend(times)
+                    continue
+
+                # Sub-daily frequencies
+                if ordinal < start_ord:
+                    continue
+                for h in hours:
+                    for m in minutes:
+                        for s in seconds:
+                            if s == 60:
+                                continue
+                            secs = ordinal * 86400 + h * 3600 + m * 60 + s
+                            units = secs // unit
+                            if (units - start_units) % self.interval:
+                                continue
+                            if units != group_period:
+                                if group and not flush_group():
+                                    return occurrences
+                                group = []
+                                group_period = units
+                            group.append(
+                                datetime.datetime(day.year, day.month, day.day, h, m, s)
+                            )
+        if group:
+            flush_group()
+        return occurrences
+
+
+@dataclass
+class RecurrenceSet:
+    start: datetime.datetime
+    rules: list[RecurrenceRule]
+    exrules: list[RecurrenceRule]
+    rdates: set[datetime.datetime]
+    exdates: set[datetime.datetime]
+
+    def expand(
+        self, end: datetime.datetime = None, limit: int = MAX_OCCURRENCES
+    ) -> list[datetime.datetime]:
+        """Returns the sorted occurrences from start up to but excluding end."""
+        if end is None:
+            end = datetime.datetime(self.start.year + RECURRENCE_WINDOW_YEARS, 1, 1)
+        occurrences = {self.start}
+        for rule in self.rules:
+            occurrences.update(rule.expand(self.start, end, limit))
+        occurrences.update(dt for dt in self.rdates if dt < end)
+        occurrences.difference_update(self.exdates)
+        for rule in self.exrules:
+            occurrences.difference_update(rule.expand(self.start, end, limit))
+        return sorted(occurrences)[:limit]
+
+    def bounds(self) -> collections.Counter:
+        """Counts the UNTIL and COUNT of the rules and exclusion rules.
+
+        Occurrences are only expanded up to a window end, so rules with
+        different bounds beyond the window have the same occurrences."""
+        return collections.Counter(
+            (excluded, rule.until, rule.count)
+            for excluded, rules in ((False, self.rules), (True, self.exrules))
+            for rule in rules
+        )
+
+    @classmethod
+    def from_component(cls, comp, start=None, timezones=None) -> RecurrenceSet:
+        """Reads the recurrence set of an iCalendar component.
+
+        Start is used as DTSTART property if the component has none. A UTC
+        UNTIL is converted to local time in the time zone of DTSTART, which
+        timezones resolves by its TZID, such as a TimeZoneResolver. Raises
+        RecurrenceError if the time zone is unknown."""
+        props = comp.get_props("DTSTART")
+        if props:
+            start = props[0]
+        if start is None or not start.value:
+            raise RecurrenceError("missing DTSTART")
+        tzid = next((p.value for p in start.params if p.name == "TZID"), None)
+
+        def rules(name):
+            rules = [RecurrenceRule.from_ical(p.value) for p in comp.get_props(name)]
+            if not tzid or not any(rule.until_utc for rule in rules):
+                return rules
+            index = timezones.get(tzid) if timezones is not None else None
+            if index is None:
+                raise RecurrenceError(f"UNTIL in unknown time zone {tzid}")
+            for i, rule in enumerate(rules):
+                if rule.until_utc:
+                    until = index.from_utc(rule.until)
+                    rules[i] = dataclasses.replace(rule, until=until, until_utc=False)
+            return rules
+
+        def dates(name):
+            return set(
+                parse_datetime(v.partition("/")[0])
+                for prop in comp.get_props(name)
+                for v in prop.value.split(",")
+            )
+
+        return RecurrenceSet(
+            parse_datetime(start.value),
+            rules("RRULE"),
+            rules("EXRULE"),
+            dates("RDATE"),
+            dates("EXDATE"),
+        )
+
+    @classmethod
+    def from_json(cls, obj: dict, start: str = None) -> RecurrenceSet:
+        """Reads the recurrence set of a JSCalendar Event or Task.
+
+        Start is used as start value if the object has none."""
+        start = obj.get("start", start)
+        if not isinstance(start, str):
+            raise RecurrenceError("missing start")
+        rules = obj.get("recurrenceRules") or []
+        if "recurrenceRule" in obj:
+            rules = rules + [obj["recurrenceRule"]]
+        exrules = obj.get("excludedRecurrenceRules") or []
+        rdates = set()
+        exdates = set()
+        for recurid, patch in (obj.get("recurrenceOverrides") or {}).items():
+            if isinstance(patch, dict) and patch.get("excluded") is True:
+                exdates.add(parse_datetime(recurid))
+            else:
+                rdates.add(parse_datetime(recurid))
+        return RecurrenceSet(
+            parse_datetime(start),
+            [RecurrenceRule.from_json(rule) for rule in rules],
+            [RecurrenceRule.from_json(rule) for rule in exrules],
+            rdates,
+            exdates,
+        )
@@ -0,0 +1,674 @@
+"""A reference converter derived from the conversion spec.
+
+The converter maps iCalendar components, properties and parameters to
+JSCalendar objects and properties as defined by the convert entries in
+spec.yaml, and back. It only knows what the spec records, so it is
+neither complete nor always correct, but it is predictable and runs
+offline. Use it as in-process backend, or serve it over HTTP with the
+same contract that the HTTP backend expects."""
+
+from __future__ import annotations
+
+import http.server
+import re
+import sys
+
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field
+
+from . import jsoncodec
+from .jsical import Component, Parameter, ParseError, Property
+from .validate import load_spec
+
+# iCalendar value types of JSCalendar types
+ICAL_TYPES = {
+    "String": "TEXT",
+    "UTCDateTime": "DATE-TIME",
+    "LocalDateTime": "DATE-TIME",
+    "Duration": "DURATION",
+    "SignedDuration": "DURATION",
+    "Int": "INTEGER",
+    "UnsignedInt": "INTEGER",
+    "Number": "FLOAT",
+    "Boolean": "BOOLEAN",
+}
+
+# Properties that a VCALENDAR component requires, but which have no
+# JSCalendar counterpart.
+VCALENDAR_DEFAULTS = (("VERSION", "2.0"), ("PRODID", "-//rfctest//refconv//EN"))
+
+
+class ConversionError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class _JSType:
+    kind: str
+    """One of value, list or map"""
+    types: tuple[str, ...]
+    """Alternative types of the value or the list and map items"""
+    key: str = None
+    """Type of the map keys"""
+
+    @classmethod
+    def parse(cls, s: str) -> _JSType:
+        if m := re.fullmatch(r"(.+)\[\]", s):
+            return _JSType("list", _alternatives(m.group(1)))
+        if m := re.fullmatch(r"(\w+)\[(.+)\]", s):
+            return _JSType("map", _alternatives(m.group(2)), key=m.group(1))
+        return _JSType("value", _alternatives(s))
+
+
+def _alternatives(s: str) -> tuple[str, ...]:
+    return tuple(t for t in s.strip("()").split("|") if t != "null")
+
+
+@dataclass
+class _PropRule:
+    name: str
+    """iCalendar property name"""
+    targets: list[str]
+    """JSCalendar property names"""
+    object: str = None
+    """Type of the JSCalendar object the property converts to"""
+    params: dict[str, str] = field(default_factory=dict)
+    """JSCalendar property names by iCalendar parameter name"""
+
+
+def _unescape(s: str) -> str:
+    return re.sub(
+        r"\\([\\;,nN])", lambda m: "\n" if m.group(1) in "nN" else m.group(1), s
+    )
+
+
+def _escape(s: str) -> str:
+    return re.sub(r"([\\;,])", r"\\\1", s).replace("\n", "\\n")
+
+
+def _split(s: str) -> list[str]:
+    return [v for v in re.split(r"(?<!\\),", s) if v]
+
+
+def _json_datetime(s: str, utc: bool) -> str:
+    m = re.fullmatch(r"(\d{4})(\d{2})(\d{2})(?:T(\d{2})(\d{2})(\d{2}))?Z?", s.strip())
+    if not m:
+        raise ConversionError(f"invalid date-time: {s}")
+    year, month, day, hour, minute, second = (v or "00" for v in m.groups())
+    dt = f"{year}-{month}-{day}T{hour}:{minute}:{second}"
+    return dt + "Z" if utc else dt
+
+
+def _ical_datetime(s: str, utc: bool) -> str:
+    if not isinstance(s, str):
+        raise ConversionError(f"invalid date-time: {s!r}")
+    m = re.fullmatch(r"(\d{4})-(\d{2})-(\d{2})T(\d{2}):(\d{2}):(\d{2})(?:\.\d+)?Z?", s)
+    if not m:
+        raise ConversionError(f"invalid date-time: {s}")
+    dt = "{}{}{}T{}{}{}".format(*m.groups())
+    return dt + "Z" if utc else dt
+
+
+def _items(value, name: str) -> Iterable:
+    """Returns the values of a JSCalendar map or list."""
+    if isinstance(value, dict):
+        return value.values()
+    if isinstance(value, list):
+        return value
+    raise ConversionError(f"{name}: expected map or list")
+
+
+def _param_value(param: Parameter) -> str:
+    value = param.value
+    if len(value) > 1 and value[0] == '"' and value[-1] == '"':
+        value = value[1:-1]
+    # Enumerated parameter values are upper case tokens.
+    return value.lower() if re.fullmatch(r"[A-Z0-9-]+", value) else value
+
+
+def _ical_param(name: str, value: str) -> Parameter:
+    if re.fullmatch(r"[a-z0-9-]+", value):
+        value = value.upper()
+    elif any(c in value for c in ':;,"'):
+        value = '"' + value.replace('"', "'") + '"'
+    return Parameter(name, value)
+
+
+class ReferenceConverter:
+    """Converts between iCalendar and JSCalendar as defined by the spec."""
+
+    def __init__(self, spec: Mapping = None):
+        if spec is None:
+            spec = load_spec()
+        ical = spec["icalendar"]
+        jscal = spec["jscalendar"]
+
+        self.js_types = {
+            name: _JSType.parse(prop["type"])
+            for name, prop in jscal["properties"].items()
+        }
+        self.ical_types = {
+            name: tuple((prop or {}).get("types") or ())
+            for name, prop in ical["properties"].items()
+        }
+        self.enum_props = frozenset(
+            name
+            for name, prop in ical["properties"].items()
+            if (prop or {}).get("values")
+        )
+
+        # Value and RRULE field properties of JSCalendar objects
+        self.value_props = {}
+        self.rrule_fields = {}
+        for name, prop in jscal["properties"].items():
+            for obj_type, obj in (prop.get("objects") or {}).items():
+                convert = (obj or {}).get("convert")
+                if not isinstance(convert, Mapping):
+                    continue
+                if convert.get("value"):
+                    self.value_props[(obj_type, convert["value"])] = name
+                if obj_type == "RecurrenceRule" and convert.get("field"):
+                    self.rrule_fields[convert["field"]] = name
+
+        # Parameters that convert to properties of the parent object, and
+        # to properties of the object the property converts to
+        param_rules = {}
+        for prop_name, prop in ical["properties"].items():
+            for param_name, param in ((prop or {}).get("parameters") or {}).items():
+                convert = (param or {}).get("convert")
+                if isinstance(convert, Mapping) and convert.get("property"):
+                    param_rules.setdefault(prop_name, []).append(
+                        (param_name, convert["property"], convert.get("object"))
+                    )
+
+        self.comp_objects = {}
+        self.prop_rules = {}
+        self.subcomp_rules = {}
+        for comp_name, comp in ical["components"].items():
+            convert = (comp or {}).get("convert") or {}
+            if convert.get("object"):
+                self.comp_objects[comp_name] = convert["object"]
+            rules = self.prop_rules[comp_name] = {}
+            for prop_name, prop in ((comp or {}).get("properties") or {}).items():
+                convert = (prop or {}).get("convert")
+                if not isinstance(convert, Mapping) or not convert.get("property"):
+                    continue
+                rule = _PropRule(
+                    prop_name,
+                    [
+                        target
+                        for target in re.split(r",\s*", convert["property"])
+                        if target in self.js_types
+                    ],
+                    object=convert.get("object"),
+                )
+                for param_name, target, obj_type in param_rules.get(prop_name, []):
+                    if rule.object and obj_type in (None, rule.object):
+                        rule.params[param_name] = target
+                    elif not rule.object and not obj_type:
+                        jstype = self.js_types.get(target)
+                        if jstype and jstype.kind == "value":
+                            rule.params[param_name] = target
+                if rule.targets:
+                    rules[prop_name] = rule
+            subcomps = (comp or {}).get("components") or {}
+            self.subcomp_rules[comp_name] = {
+                subcomp_name: subcomp["convert"]["property"]
+                for subcomp_name, subcomp in subcomps.items()
+                if ((subcomp or {}).get("convert") or {}).get("property")
+            }
+
+        # Reverse rules to convert JSCalendar objects to iCalendar
+        self.object_comps = {}
+        for comp_name, obj_type in self.comp_objects.items():
+            self.object_comps.setdefault(obj_type, comp_name)
+        self.js_rules = {}
+        for comp_name, rules in self.prop_rules.items():
+            js_rules = self.js_rules[comp_name] = {}
+            for rule in rules.values():
+                for target in rule.targets:
+                    js_rules.setdefault(target, []).append(rule)
+            for target, candidates in js_rules.items():
+                # Prefer the property whose value type matches.
+                jstype = self.js_types[target]
+                ical_type = ICAL_TYPES.get(jstype.types[0] if jstype.types else None)
+                candidates.sort(
+                    key=lambda rule: ical_type not in self.ical_types.get(rule.name, ())
+                )
+        self.js_subcomps = {}
+        for comp_name, subcomps in self.subcomp_rules.items():
+            for subcomp_name, target in subcomps.items():
+                self.js_subcomps.setdefault((comp_name, target), []).append(
+                    subcomp_name
+                )
+
+    def _types(self, target: str, ical_name: str) -> tuple[str, ...]:
+        """Returns the types of a JSCalendar property converted from ical_name.
+
+        Values are kept as strings if the spec types of both properties
+        disagree, such as for UTC offsets of date-time type."""
+        types = self.js_types[target].types
+        ical_type = ICAL_TYPES.get(types[0]) if types else None
+        if ical_type and ical_type != "TEXT":
+            if ical_type not in self.ical_types.get(ical_name, (ical_type,)):
+                return ("String",)
+        return types
+
+    # iCalendar to JSCalendar
+
+    def to_jgroup(self, ical: bytes) -> dict:
+        """Converts iCalendar data to a JSCalendar Group."""
+        try:
+            comp = Component.parse(ical.decode("utf-8"), strict=True)
+        except (ParseError, UnicodeDecodeError) as e:
+            raise ConversionError(f"invalid iCalendar data: {e}") from e
+        return self.component_to_json(comp)
+
+    def component_to_json(self, comp: Component) -> dict:
+        """Converts a parsed iCalendar component to a JSCalendar Group."""
+        if comp.name != "VCALENDAR":
+            comp = Component("VCALENDAR", comps=[comp])
+        return self._comp_to_json(comp)
+
+    def _comp_to_json(self, comp: Component) -> dict:
+        obj_type = self.comp_objects.get(comp.name)
+        if not obj_type:
+            raise ConversionError(f"cannot convert {comp.name} component")
+        obj = {"@type": obj_type}
+        rules = self.prop_rules.get(comp.name, {})
+        for prop in comp.props:
+            rule = rules.get(prop.name)
+            if rule:
+                self._prop_to_json(obj, rule, prop)
+        subcomp_rules = self.subcomp_rules.get(comp.name, {})
+        for subcomp in comp.comps:
+            target = subcomp_rules.get(subcomp.name)
+            if target and subcomp.name in self.comp_objects:
+                value = self._comp_to_json(subcomp)
+                self._set_json(obj, target, value, value.get("tzId"))
+        return obj
+
+    def _prop_to_json(self, obj: dict, rule: _PropRule, prop: Property):
+        for target in rule.targets:
+            jstype = self.js_types[target]
+            if rule.object == "PatchObject":
+                patch = {"excluded": True} if prop.name == "EXDATE" else {}
+                overrides = obj.setdefault(target, {})
+                for value in _split(prop.value):
+                    overrides[_json_datetime(value, utc=False)] = patch
+            elif rule.object == "RecurrenceRule":
+                self._set_json(obj, target, self._rrule_to_json(prop.value))
+            elif rule.object:
+                self._set_json(obj, target, self._object_to_json(rule, prop))
+            elif "OffsetTrigger" in jstype.types:
+                self._set_json(obj, target, self._trigger_to_json(rule, prop))
+            elif jstype.kind == "map" and jstype.types == ("Boolean",):
+                values = obj.setdefault(target, {})
+                for value in _split(prop.value):
+                    values[_unescape(value)] = True
+            else:
+                value = prop.value
+                if prop.name in self.enum_props:
+                    value = value.lower()
+                types = self._types(target, prop.name)
+                self._set_json(obj, target, self._value_to_json(value, types), value)
+        if not rule.object:
+            for param in prop.params:
+                target = rule.params.get(param.name)
+                if target:
+                    obj[target] = self._param_to_json(param, self.js_types[target])
+
+    def _set_json(self, obj: dict, target: str, value, key: str = None):
+        jstype = self.js_types[target]
+        if jstype.kind == "list":
+            obj.setdefault(target, []).append(value)
+        elif jstype.kind == "map":
+            values = obj.setdefault(target, {})
+            if "Relation" in jstype.types:
+                # Such as relatedTo, keyed by the related UID
+                value = {"@type": "Relation"}
+            elif jstype.types == ("String",):
+                # Such as replyTo, keyed by the reply method
+                key = "imip" if str(value).lower().startswith("mailto:") else "other"
+            if not key or jstype.key == "Id":
+                key = str(len(values) + 1)
+            values[key] = value
+        else:
+            obj[target] = value
+
+    def _value_to_json(self, value: str, types: tuple[str, ...]):
+        jstype = types[0] if types else "String"
+        try:
+            match jstype:
+                case "UTCDateTime":
+                    return _json_datetime(value, utc=True)
+                case "LocalDateTime":
+                    return _json_datetime(value, utc=False)
+                case "Int" | "UnsignedInt":
+                    return int(value)
+                case "Number":
+                    return float(value)
+                case "Boolean":
+                    return value.upper() == "TRUE"
+                case "Duration" | "SignedDuration" | "TimeZoneId" | "Id":
+                    return value
+        except ValueError as e:
+            raise ConversionError(f"invalid {jstype} value: {value}") from e
+        return _unescape(value)
+
+    def _param_to_json(self, param: Parameter, jstype: _JSType):
+        value = _param_value(param)
+        if jstype.kind == "map":
+            values = [v.strip('"') for v in value.split(",")]
+            if "Link" in jstype.types:
+                return {
+                    str(i): {"@type": "Link", "href": v}
+                    for i, v in enumerate(values, start=1)
+                }
+            return {v: True for v in values}
+        if jstype.kind == "list":
+            return value.split(",")
+        return self._value_to_json(value, jstype.types)
+
+    def _object_to_json(self, rule: _PropRule, prop: Property) -> dict:
+        obj = {"@type": rule.object}
+        value_prop = self.value_props.get((rule.object, prop.name))
+        if value_prop:
+            value = self._value_to_json(prop.value, self.js_types[value_prop].types)
+            obj[value_prop] = value
+        for param in prop.params:
+            target = rule.params.get(param.name)
+            if target:
+                obj[target] = self._param_to_json(param, self.js_types[target])
+        return obj
+
+    def _trigger_to_json(self, rule: _PropRule, prop: Property) -> dict:
+        value_type = next((p.value for p in prop.params if p.name == "VALUE"), "")
+        obj_type = "AbsoluteTrigger" if value_type == "DATE-TIME" else "OffsetTrigger"
+        obj = {"@type": obj_type}
+        value_prop = self.value_props.get((obj_type, prop.name))
+        if value_prop:
+            obj[value_prop] = self._value_to_json(
+                prop.value, self.js_types[value_prop].types
+            )
+        if obj_type == "OffsetTrigger":
+            for param in prop.params:
+                if param.name == "RELATED":
+                    obj["relativeTo"] = _param_value(param)
+        return obj
+
+    def _rrule_to_json(self, value: str) -> dict:
+        obj = {"@type": "RecurrenceRule"}
+        for part in value.split(";"):
+            name, _, value = part.partition("=")
+            target = self.rrule_fields.get(name.upper())
+            if not target:
+                continue
+            jstype = self.js_types[target]
+            if "NDay" in jstype.types:
+                days = []
+                for day in value.split(","):
+                    m = re.fullmatch(r"([+-]?\d+)?([A-Za-z]{2})", day)
+                    if not m:
+                        raise ConversionError(f"invalid BYDAY: {day}")
+                    nday = {"@type": "NDay", "day": m.group(2).lower()}
+                    if m.group(1):
+                        nday["nthOfPeriod"] = int(m.group(1))
+                    days.append(nday)
+                obj[target] = days
+            elif jstype.kind == "list":
+                obj[target] = [
+                    self._value_to_json(v, jstype.types) for v in value.split(",")
+                ]
+            elif "LocalDateTime" in jstype.types:
+                obj[target] = _json_datetime(value, utc=False)
+            elif "String" in jstype.types:
+                obj[target] = value.lower()
+            else:
+                obj[target] = self._value_to_json(value, jstype.types)
+        return obj
+
+    # JSCalendar to iCalendar
+
+    def to_ical(self, jscal: dict) -> str:
+        """Converts a JSCalendar Group, Event or Task to iCalendar data."""
+        if not isinstance(jscal, dict):
+            raise ConversionError("JSCalendar data is not an object")
+        if jscal.get("@type") != "Group":
+            jscal = {"@type": "Group", "entries": [jscal]}
+        comp = self._obj_to_comp(jscal, "VCALENDAR")
+        for name, value in VCALENDAR_DEFAULTS:
+            if name not in comp.prop_index:
+                comp.add_prop(Property(name, value))
+        return comp.to_ical()
+
+    def _obj_to_comp(self, obj: dict, comp_name: str) -> Component:
+        comp = Component(comp_name)
+        js_rules = self.js_rules.get(comp_name, {})
+        for name, value in obj.items():
+            if value is None:
+                continue
+            subcomps = self.js_subcomps.get((comp_name, name))
+            if subcomps:
+                for item in _items(value, name):
+                    if not isinstance(item, dict):
+                        continue
+                    subcomp = self.object_comps.get(item.get("@type"))
+                    if subcomp not in subcomps:
+                        subcomp = subcomps[0]
+                    comp.add_comp(self._obj_to_comp(item, subcomp))
+                continue
+            rules = js_rules.get(name)
+            if not rules:
+                continue
+            rule = rules[0]
+            if name != next(t for t in rule.targets if obj.get(t) is not None):
+                # Such as updated and scheduleUpdated, which both are DTSTAMP
+                continue
+            if rule.object == "PatchObject":
+                for rule in rules:
+                    self._overrides_to_ical(comp, rule, value)
+            elif rule.object:
+                for item in _items(value, name):
+                    comp.add_prop(self._object_to_ical(rule, item))
+            else:
+                for prop in self._value_to_ical(rule, name, value, obj):
+                    comp.add_prop(prop)
+        return comp
+
+    def _value_to_ical(self, rule: _PropRule, name: str, value, obj: dict):
+        jstype = self.js_types[name]
+        params = []
+        for param_name, target in rule.params.items():
+            if obj.get(target) is not None:
+                params.append(_ical_param(param_name, str(obj[target])))
+        if isinstance(value, dict) and value.get("@type"):
+            # Such as trigger
+            value_prop = self.value_props.get((value["@type"], rule.name))
+            if value_prop is None:
+                return
+            if value["@type"] == "AbsoluteTrigger":
+                params.append(Parameter("VALUE", "DATE-TIME"))
+            elif value.get("relativeTo"):
+                params.append(_ical_param("RELATED", value["relativeTo"]))
+            values = [self._scalar_to_ical(value.get(value_prop), value_prop)]
+        elif jstype.kind == "map" and jstype.types == ("Boolean",):
+            if not isinstance(value, dict):
+                raise ConversionError(f"{name}: expected map")
+            values = [",".join(_escape(k) for k in value)]
+        elif isinstance(value, dict):
+            values = [self._scalar_to_ical(v, name, rule.name) for v in value.values()]
+        elif isinstance(value, list):
+            values = [self._scalar_to_ical(v, name, rule.name) for v in value]
+        else:
+            values = [self._scalar_to_ical(value, name, rule.name)]
+        for v in values:
+            if v is None:
+                continue
+            if rule.name in self.enum_props:
+                v = v.upper()
+            yield Property(rule.name, v, params=tuple(params))
+
+    def _scalar_to_ical(self, value, name: str, ical_name: str = None) -> str:
+        if isinstance(value, bool):
+            return "TRUE" if value else "FALSE"
+        if isinstance(value, (int, float)):
+            return str(value)
+        if not isinstance(value, str):
+            return None
+        if ical_name:
+            jstype = self._types(name, ical_name)
+        else:
+            jstype = self.js_types[name].types
+        if "UTCDateTime" in jstype:
+            return _ical_datetime(value, utc=True)
+        if "LocalDateTime" in jstype:
+            return _ical_datetime(value, utc=False)
+        if {"Duration", "SignedDuration", "TimeZoneId", "Id"} & set(jstype):
+            return value
+        return _escape(value)
+
+    def _object_to_ical(self, rule: _PropRule, item: dict) -> Property:
+        if not isinstance(item, dict):
+            raise ConversionError(f"{rule.name}: expected {rule.object} object")
+        if rule.object == "RecurrenceRule":
+            return Property(rule.name, self._rrule_to_ical(item))
+        value_prop = self.value_props.get((rule.object, rule.name))
+        value = self._scalar_to_ical(item.get(value_prop), value_prop) or ""
+        params = []
+        for param_name, target in rule.params.items():
+            param_value = item.get(target)
+            if param_value is None:
+                continue
+            if isinstance(param_value, dict):
+                param_value = ",".join(
+                    v.get("href", "") if isinstance(v, dict) else k
+                    for k, v in param_value.items()
+                )
+            elif isinstance(param_value, list):
+                param_value = ",".join(map(str, param_value))
+            elif isinstance(param_value, bool):
+                param_value = "TRUE" if param_value else "FALSE"
+            params.append(_ical_param(param_name, str(param_value)))
+        return Property(rule.name, value, params=tuple(params))
+
+    def _rrule_to_ical(self, rrule: dict) -> str:
+        parts = []
+        for field_name, target in self.rrule_fields.items():
+            value = rrule.get(target)
+            if value is None:
+                continue
+            jstype = self.js_types[target]
+            if "NDay" in jstype.types:
+                if not isinstance(value, list) or not all(
+                    isinstance(d, dict) and isinstance(d.get("day", ""), str)
+                    for d in value
+                ):
+                    raise ConversionError(f"{target}: expected NDay list")
+                value = ",".join(
+                    f"{d.get('nthOfPeriod', '')}{d.get('day', '').upper()}"
+                    for d in value
+                )
+            elif isinstance(value, list):
+                value = ",".join(str(v) for v in value)
+            elif "LocalDateTime" in jstype.types:
+                value = _ical_datetime(value, utc=False)
+            else:
+                value = str(value).upper()
+            parts.append(f"{field_name}={value}")
+        # FREQ must be the first part of the rule.
+        parts.sort(key=lambda part: not part.startswith("FREQ="))
+        return ";".join(parts)
+
+    def _overrides_to_ical(self, comp: Component, rule: _PropRule, overrides):
+        if not isinstance(overrides, dict):
+            return
+        excluded = rule.name == "EXDATE"
+        for recurid, patch in overrides.items():
+            if patch is not None and not isinstance(patch, dict):
+                raise ConversionError(f"{recurid}: expected PatchObject")
+            if (patch or {}).get("excluded", False) == excluded and (
+                excluded or not patch
+            ):
+                comp.add_prop(Property(rule.name, _ical_datetime(recurid, utc=False)))
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    # Keep connections open for clients that send many requests.
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def _read_body(self) -> bytes:
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().split(b";")[0].strip(), 16)
+                if size == 0:
+                    # Skip any trailers.
+                    while self.rfile.readline() not in (b"\r\n", b"\n", b""):
+                        pass
+                    return b"".join(chunks)
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def _respond(self, status: int, content_type: str, body: bytes):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        converter = self.server.converter
+        content_type = self.headers.get("Content-Type", "").partition(";")[0]
+        try:
+            body = self._read_body()
+        except ValueError as e:
+            # The rest of the request is unknown, so drop the connection.
+            self.close_connection = True
+            self._respond(400, "text/plain;charset=utf-8", f"{e}".encode())
+            return
+        try:
+            match content_type.strip().lower():
+                case "text/calendar":
+                    res = jsoncodec.dumps(converter.to_jgroup(body))
+                    res_type = "application/jscalendar+json;type=group"
+                case "application/jscalendar+json":
+                    res = converter.to_ical(jsoncodec.loads(body)).encode()
+                    res_type = "text/calendar;charset=utf-8"
+                case _:
+                    self._respond(
+                        415, "text/plain", f"Unsupported {content_type}".encode()
+                    )
+                    return
+        except (ValueError, ConversionError) as e:
+            self._respond(400, "text/plain;charset=utf-8", f"{e}".encode())
+            return
+        except Exception as e:
+            # Respond to unexpected errors, rather than drop the connection
+            # without a response.
+            print(f"{content_type}: conversion failed: {e!r}", file=sys.stderr)
+            self.close_connection = True
+            self._respond(500, "text/plain;charset=utf-8", f"{e!r}".encode())
+            return
+        self._respond(200, res_type, res)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def serve(converter: ReferenceConverter, host: str, port: int, verbose=False):
+    """Serves the converter over HTTP until interrupted."""
+    with http.server.ThreadingHTTPServer((host, port), _Handler) as server:
+        server.converter = converter
+        server.verbose = verbose
+        host, port = server.server_address[:2]
+        print(f"Serving reference converter at http://{host}:{port}/", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
@@ -4,18 +4,39 @@ import abc
 import argparse
 import base64
 import collections
+import concurrent.futures
 import copy
 import enum
+import glob
+import hashlib
 import html
+import http.client
+import importlib
+import io
+import itertools
 import json
 import os
+import pickle
+import re
+import socket
+import statistics
+import struct
 import sys
+import tempfile
+import threading
+import time
+import urllib.parse
 import urllib.request
 import xml.etree.ElementTree as XMLTree
+import zlib
 
+from collections.abc import Iterable, Iterator
+from dataclasses import asdict, dataclass
 from operator import attrgetter
 
+from . import jsoncodec, trace
 from .jsical import JsonDiff, JObject, JsonPath, Component, ComponentDiff, ParseError
+from .validate import SPEC_FILE, Validator, load_spec, spec_errors
 
 
 class BackendError(Exception):
@@ -32,59 +53,318 @@ class BackendError(Exception):
             return super().__str__()
 
 
-class Backend:
-    def __init__(self, url: str, user_pwd: str = None):
+class Backend(abc.ABC):
+    """Converts between iCalendar and JSCalendar."""
+
+    @abc.abstractmethod
+    def convert_to_jgroup(self, ical: bytes | Iterable[bytes]) -> bytes:
+        """Converts iCalendar data to a JSCalendar Group.
+
+        The iCalendar data is either bytes or an iterable of byte chunks."""
+
+    @abc.abstractmethod
+    def convert_to_ical(self, jscal: dict) -> bytes:
+        """Converts a JSCalendar Group to iCalendar data.
+
+        Jscal may also be the group as returned by encode_jscal."""
+
+    def encode_jscal(self, jscal: dict):
+        """Prepares a JSCalendar Group for repeated conversions.
+
+        Backends that send the group in another form return it encoded,
+        others return it as is."""
+        return jscal
+
+    def stream_to_jgroup(self, ical: bytes | Iterable[bytes]) -> Iterator[bytes]:
+        """Converts iCalendar data to a JSCalendar Group in chunks.
+
+        Backends that receive their response over time yield its chunks
+        as they arrive, others yield the complete response at once."""
+        yield self.convert_to_jgroup(ical)
+
+    def close(self):
+        pass
+
+
+def _join_chunks(data: bytes | Iterable[bytes]) -> bytes:
+    return data if isinstance(data, bytes) else b"".join(data)
+
+
+class _NoDelayConnection:
+    """Sends requests without waiting for the ACK of the previous packet.
+
+    A request on a kept-alive connection is sent as header and body
+    packets, which would otherwise stall on delayed ACKs."""
+
+    number = 0
+    """Sequence number of the connection in its backend, for tracing"""
+
+    def connect(self):
+        super().connect()
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+
+class _HTTPConnection(_NoDelayConnection, http.client.HTTPConnection):
+    pass
+
+
+class _HTTPSConnection(_NoDelayConnection, http.client.HTTPSConnection):
+    pass
+
+
+# Maximum bytes to read at once from a streamed response
+STREAM_CHUNK_SIZE = 1 << 16
+
+
+class HTTPBackend(Backend):
+    """Posts conversions to a backend at an HTTP URL.
+
+    Each thread keeps its connection to the backend open between requests,
+    unless the backend closes it."""
+
+    def __init__(self, url: str, user_pwd: str = None, chunked=False):
         self.url = url
         self.auth = base64.b64encode(user_pwd.encode()).decode() if user_pwd else None
+        self.chunked = chunked
+        """Send iCalendar data with chunked transfer encoding"""
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
 
-    def http_post(self, data, headers: dict = None):
+    def _connection(self, fresh=False) -> http.client.HTTPConnection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and not fresh:
+            return conn
+        if conn is not None:
+            conn.close()
+        parts = urllib.parse.urlsplit(self.url)
+        if parts.scheme == "https":
+            conn = _HTTPSConnection(parts.hostname, parts.port)
+        elif parts.scheme == "http":
+            conn = _HTTPConnection(parts.hostname, parts.port)
+        else:
+            raise BackendError(f"Unsupported backend URL {self.url}")
+        self._local.conn = conn
+        with self._lock:
+            self._connections.append(conn)
+            conn.number = len(self._connections)
+        return conn
+
+    def _request(self, data, headers: dict = None):
         if self.url is None:
             raise BackendError("No backend URL defined")
         headers = {} if headers is None else headers
         if self.auth:
             headers = {"Authorization": f"Basic {self.auth}"} | headers
-        req = urllib.request.Request(self.url, headers=headers, data=data)
+        parts = urllib.parse.urlsplit(self.url)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        conn = self._connection()
+        while True:
+            reused = conn.sock is not None
+            try:
+                conn.request("POST", path, body=data, headers=headers)
+                return conn, conn.getresponse()
+            except ConnectionError as e:
+                # The backend may have closed an idle connection. Retry
+                # once, unless the request data was already consumed.
+                conn.close()
+                if not reused or not isinstance(data, bytes):
+                    raise BackendError(e) from e
+                conn = self._connection(fresh=True)
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                raise BackendError(e) from e
+
+    def http_stream(self, data, headers: dict = None) -> Iterator[bytes]:
+        """Posts data and yields the response body as it arrives."""
+        with trace.span("http", "backend") as args:
+            yield from self._stream(data, headers, args)
+
+    def _stream(self, data, headers: dict, args: dict) -> Iterator[bytes]:
+        conn, res = self._request(data, headers)
+        args["connection"] = conn.number
+        args["status"] = res.status
         try:
-            with urllib.request.urlopen(req) as res:
-                return res.read()
-        except urllib.error.URLError as e:
-            raise BackendError(e)
-
-    def convert_to_jgroup(self, ical: bytes) -> bytes:
-        res = self.http_post(
-            ical,
+            if not 200 <= res.status < 300:
+                body = res.read()
+                raise BackendError(
+                    urllib.error.HTTPError(
+                        self.url, res.status, res.reason, res.headers, io.BytesIO(body)
+                    )
+                )
+            while chunk := res.read1(STREAM_CHUNK_SIZE):
+                yield chunk
+        except (OSError, http.client.HTTPException) as e:
+            conn.close()
+            raise BackendError(e) from e
+        finally:
+            if not res.isclosed():
+                # The response was abandoned, so the connection can't be reused.
+                conn.close()
+
+    def http_post(self, data, headers: dict = None) -> bytes:
+        return b"".join(self.http_stream(data, headers))
+
+    def _post_ical(self, ical: bytes | Iterable[bytes]) -> Iterator[bytes]:
+        # Request data without known length is sent in chunks.
+        return self.http_stream(
+            ical if self.chunked else _join_chunks(ical),
             headers={
                 "Content-Type": "text/calendar;charset=utf-8",
                 "Accept": "application/jscalendar+json;type=group",
             },
         )
-        return bytes(res)
 
-    def convert_to_ical(self, jscal: dict) -> bytes:
-        res = self.http_post(
-            json.dumps(jscal).encode(),
+    def convert_to_jgroup(self, ical: bytes | Iterable[bytes]) -> bytes:
+        return b"".join(self._post_ical(ical))
+
+    def stream_to_jgroup(self, ical: bytes | Iterable[bytes]) -> Iterator[bytes]:
+        return self._post_ical(ical)
+
+    def encode_jscal(self, jscal: dict) -> bytes:
+        return jsoncodec.dumps(jscal)
+
+    def convert_to_ical(self, jscal: dict | bytes) -> bytes:
+        return self.http_post(
+            jscal if isinstance(jscal, bytes) else self.encode_jscal(jscal),
             headers={
                 "Content-Type": "application/jscalendar+json;type=group",
                 "Accept": "text/calendar;charset=utf-8",
             },
         )
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+
+def load_converter(spec: str):
+    """Loads the converter named by spec in form module:callable.
+
+    The named object either is the converter itself, or it is called
+    without arguments to create the converter. A converter must provide
+    the methods to_jgroup(bytes) and to_ical(dict)."""
+    modname, sep, attrname = spec.partition(":")
+    if not sep or not modname or not attrname:
+        raise BackendError(f"Invalid converter {spec}, expected module:callable")
+    try:
+        obj = importlib.import_module(modname)
+        for name in attrname.split("."):
+            obj = getattr(obj, name)
+    except (ImportError, AttributeError) as e:
+        raise BackendError(e) from e
+    if isinstance(obj, type) or not hasattr(obj, "to_jgroup") and callable(obj):
+        obj = obj()
+    if not hasattr(obj, "to_jgroup") or not hasattr(obj, "to_ical"):
+        raise BackendError(f"Converter {spec} lacks to_jgroup or to_ical")
+    return obj
+
+
+def _converter_result(res) -> bytes:
+    if isinstance(res, bytes):
+        return res
+    elif isinstance(res, (bytearray, memoryview)):
         return bytes(res)
+    elif isinstance(res, str):
+        return res.encode()
+    else:
+        return jsoncodec.dumps(res)
+
+
+# Per-process converter of the PluginBackend process pool
+_pool_converter = None
+
+
+def _pool_init(spec: str):
+    global _pool_converter
+    _pool_converter = load_converter(spec)
+
+
+def _pool_to_jgroup(ical: bytes) -> bytes:
+    return _converter_result(_pool_converter.to_jgroup(ical))
+
+
+def _pool_to_ical(jscal: dict) -> bytes:
+    return _converter_result(_pool_converter.to_ical(jscal))
+
+
+class PluginBackend(Backend):
+    """Runs a Python converter in-process or in a process pool."""
+
+    def __init__(self, spec: str, processes: int = 0):
+        self.spec = spec
+        self.pool = None
+        self.converter = None
+        if processes > 0:
+            # Load once in this process to report errors early.
+            load_converter(spec)
+            self.pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=processes, initializer=_pool_init, initargs=(spec,)
+            )
+        else:
+            self.converter = load_converter(spec)
+
+    def convert_to_jgroup(self, ical: bytes | Iterable[bytes]) -> bytes:
+        ical = _join_chunks(ical)
+        if self.pool:
+            return self.pool.submit(_pool_to_jgroup, ical).result()
+        return _converter_result(self.converter.to_jgroup(ical))
+
+    def convert_to_ical(self, jscal: dict) -> bytes:
+        if self.pool:
+            return self.pool.submit(_pool_to_ical, jscal).result()
+        return _converter_result(self.converter.to_ical(jscal))
+
+    def close(self):
+        if self.pool:
+            self.pool.shutdown()
+            self.pool = None
+
+
+# Examples with at least this many bytes of JSCalendar data have their
+# iCalendar to JSCalendar conversion diffed while the response arrives.
+STREAM_MIN_SIZE = 1 << 16
+
+# Bytes of a streamed response to keep in memory before spooling to disk
+STREAM_SPOOL_SIZE = 1 << 20
+
+
+def _stream_diff_supports(example) -> bool:
+    # The stream differ is only imported for tests with large examples.
+    from .jsonstream import GroupStreamDiff
+
+    return GroupStreamDiff.supports(example)
+
+
+def test_key(name: str, backend: str = None) -> str:
+    """Identifies the results of a test against a named backend."""
+    return name if backend is None else f"{name}@{backend}"
 
 
 class Test:
     class Result(abc.ABC):
         response: bytes = None
-        """Undecoded backend response"""
+        """Undecoded backend response, or None if it was streamed and matched"""
+        size: int = None
+        """Size of the backend response in bytes"""
         error: Exception = None
         """Any unexpected error"""
+        duration: float = None
+        """Median seconds spent in the backend conversion"""
+        durations: list[float] = None
+        """Seconds spent in each repeated backend conversion"""
+        baseline: float = None
+        """Median seconds of the baseline run, if the latency regressed"""
 
         def outcome(self) -> str:
             if self.error:
                 return "error"
-            elif self.response is None:
-                return "none"
             elif not self.is_valid():
-                return "invalid"
+                return "none" if self.response is None else "invalid"
             else:
                 return "success"
 
@@ -102,9 +382,11 @@ class Test:
         """Normalized iCalendar response"""
         ical_diff: ComponentDiff = None
         """Diffed iCalendar response"""
+        issues: list[str] = None
+        """Spec violations of the response that the example does not have"""
 
         def is_valid(self) -> bool:
-            return self.ical_diff and self.ical_diff.empty()
+            return self.ical_diff and self.ical_diff.empty() and not self.issues
 
     name: str
     """Test name"""
@@ -116,7 +398,7 @@ class Test:
     """Parsed iCalendar example"""
     jgroup: JObject
     """Parsed JSCalendar example"""
-    expanded_ical: str
+    expanded_vobject: Component
     """Expanded iCalendar example"""
     expanded_jscal: dict
     """Expanded JSCalendar example"""
@@ -124,59 +406,270 @@ class Test:
     """Result of iCalendar to JSCalendar conversion"""
     j2iresult: Ical2JscalResult
     """Result of iCalendar to JSCalendar conversion"""
+    backend: str = None
+    """Name of the backend of the results, if tests run against several"""
+    elapsed: float = None
+    """Seconds spent running the test, including parsing and diffing"""
 
     def __init__(self, name: str, icaltext: str, jcaltext: str):
         self.name = name
         self.icaltext = icaltext
         self.jscaltext = jcaltext
-        self.vobject = Component.parse(self.icaltext).to_vcalendar()
-        self.jgroup = JObject.parse(self.jscaltext).to_group().normalized()
-        self.expanded_ical = self.vobject.with_default_props().to_ical()
-        self.expanded_jscal = self.jgroup.with_default_props().to_json()
+        with trace.span("parse", "load", test=name):
+            self.vobject = Component.parse(self.icaltext).to_vcalendar()
+            self.jgroup = JObject.parse(self.jscaltext).to_group().normalized()
+        with trace.span("expand", "load", test=name):
+            self.expanded_vobject = self.vobject.with_default_props()
+            self.expanded_jscal = self.jgroup.with_default_props().to_json()
         self.i2jresult = None
         self.j2iresult = None
 
-    def run(self, backend: Backend):
+    @property
+    def key(self) -> str:
+        """Test name, qualified with the backend name if there is one"""
+        return test_key(self.name, self.backend)
+
+    def for_backend(self, backend: str) -> Test:
+        """Returns a copy without results that shares the parsed examples."""
+        test = copy.copy(self)
+        test.backend = backend
+        test.i2jresult = None
+        test.j2iresult = None
+        return test
+
+    @property
+    def expanded_ical(self) -> str:
+        """Expanded iCalendar example data"""
+        return self.expanded_vobject.to_ical()
+
+    @staticmethod
+    def _convert(result: Result, convert, make_data, repeat: int):
+        result.durations = []
+        for _ in range(repeat):
+            data = make_data()
+            start = time.perf_counter()
+            response = convert(data)
+            result.durations.append(time.perf_counter() - start)
+            if result.response is None:
+                result.response = response
+                result.size = len(response)
+        result.duration = statistics.median(result.durations)
+
+    def _stream_to_jgroup(self, result: Result, backend: Backend, repeat: int):
+        """Converts to JSCalendar and diffs the response as it arrives.
+
+        The response is only kept if it does not match the example."""
+        from .jsonstream import GroupStreamDiff
+
+        diff = GroupStreamDiff(self.jgroup.to_json())
+        result.durations = []
+        with tempfile.SpooledTemporaryFile(STREAM_SPOOL_SIZE) as spool:
+            for i in range(repeat):
+                chunks = backend.stream_to_jgroup(self.expanded_vobject.iter_ical())
+                duration = 0.0
+                while True:
+                    # Only count the time spent waiting for the backend.
+                    start = time.perf_counter()
+                    chunk = next(chunks, None)
+                    duration += time.perf_counter() - start
+                    if chunk is None:
+                        break
+                    if i == 0:
+                        spool.write(chunk)
+                        diff.feed(chunk)
+                result.durations.append(duration)
+            result.duration = statistics.median(result.durations)
+            result.size = spool.tell()
+            if diff.close():
+                result.json_diff = JsonDiff([], [], [])
+            else:
+                spool.seek(0)
+                result.response = spool.read()
+
+    def run(self, backend: Backend, repeat: int = 1, validator: Validator = None):
+        start = time.perf_counter()
         try:
             self.i2jresult = Test.Ical2JscalResult()
-            self.i2jresult.response = backend.convert_to_jgroup(
-                self.expanded_ical.encode()
-            )
-            self.i2jresult.json_response = JsonDiff.normalize_json(
-                json.loads(self.i2jresult.response)
-            )
-            self.i2jresult.json_diff = self.jgroup.diff_json(
-                self.i2jresult.json_response
-            )
+            if len(self.jscaltext) >= STREAM_MIN_SIZE and _stream_diff_supports(
+                self.jgroup.to_json()
+            ):
+                with trace.span("i2j stream", "backend", test=self.key):
+                    self._stream_to_jgroup(self.i2jresult, backend, repeat)
+            else:
+                with trace.span("i2j request", "backend", test=self.key):
+                    Test._convert(
+                        self.i2jresult,
+                        backend.convert_to_jgroup,
+                        self.expanded_vobject.iter_ical,
+                        repeat,
+                    )
+            if self.i2jresult.json_diff is None:
+                with trace.span("i2j parse", "test", test=self.key):
+                    json_response = jsoncodec.loads(self.i2jresult.response)
+                with trace.span("i2j normalize", "test", test=self.key):
+                    self.i2jresult.json_response = JsonDiff.normalize_json(
+                        json_response
+                    )
+                    del json_response
+                with trace.span("i2j diff", "test", test=self.key):
+                    self.i2jresult.json_diff = self.jgroup.diff_json(
+                        self.i2jresult.json_response
+                    )
         except Exception as e:
             self.i2jresult.error = e
 
         try:
             self.j2iresult = Test.Jscal2IcalResult()
-            self.j2iresult.response = backend.convert_to_ical(self.expanded_jscal)
-            ical_response = Component.parse(
-                self.j2iresult.response.decode(), strict=True
-            )
-            ical_response.normalize()
-            self.j2iresult.ical_response = ical_response
-            vobject = copy.deepcopy(self.vobject)
-            vobject.normalize()
-            self.j2iresult.ical_diff = ComponentDiff(
-                vobject, self.j2iresult.ical_response
-            )
+            with trace.span("j2i request", "backend", test=self.key):
+                # Repeated conversions send the same encoding.
+                jscal = backend.encode_jscal(self.expanded_jscal)
+                Test._convert(
+                    self.j2iresult,
+                    backend.convert_to_ical,
+                    lambda: jscal,
+                    repeat,
+                )
+            with trace.span("j2i parse", "test", test=self.key):
+                ical_response = Component.parse(
+                    self.j2iresult.response.decode(), strict=True
+                )
+            if validator:
+                with trace.span("j2i validate", "test", test=self.key):
+                    # Only report issues that a valid conversion can avoid.
+                    expected = set(validator.issues(self.expanded_vobject))
+                    self.j2iresult.issues = [
+                        issue
+                        for issue in validator.validate(ical_response)
+                        if issue not in expected
+                    ]
+            with trace.span("j2i normalize", "test", test=self.key):
+                ical_response = ical_response.normalized()
+                self.j2iresult.ical_response = ical_response
+                ical_expected = self.vobject.normalized()
+            with trace.span("j2i diff", "test", test=self.key):
+                self.j2iresult.ical_diff = ComponentDiff(
+                    ical_expected, ical_response, normalized=True
+                )
         except Exception as e:
             self.j2iresult.error = e
+        self.elapsed = time.perf_counter() - start
+
+
+@dataclass
+class ResultRecord:
+    """The outcome and latency of a test result, without its data."""
+
+    status: str
+    duration: float = None
+    """Median seconds spent in the backend conversion"""
+    baseline: float = None
+    """Median seconds of the baseline run, if the latency regressed"""
+
+    def outcome(self) -> str:
+        return self.status
+
+    @classmethod
+    def from_result(cls, result: Test.Result) -> ResultRecord:
+        if result is None:
+            return ResultRecord("none")
+        return ResultRecord(result.outcome(), result.duration, result.baseline)
+
+
+@dataclass
+class TestRecord:
+    """The name and result records of a test, which outlive the test."""
+
+    name: str
+    i2jresult: ResultRecord
+    j2iresult: ResultRecord
+    backend: str = None
+    elapsed: float = None
+    """Seconds spent running the test"""
+
+    @property
+    def key(self) -> str:
+        return test_key(self.name, self.backend)
+
+    def failed(self) -> bool:
+        return any(
+            result.outcome() != "success" for result in (self.i2jresult, self.j2iresult)
+        )
+
+    @classmethod
+    def from_test(cls, test: Test) -> TestRecord:
+        return TestRecord(
+            test.name,
+            ResultRecord.from_result(test.i2jresult),
+            ResultRecord.from_result(test.j2iresult),
+            test.backend,
+            test.elapsed,
+        )
+
+    @classmethod
+    def from_json(cls, data: dict) -> TestRecord:
+        """Returns the record of JSON data from asdict.
+
+        Raises KeyError, TypeError or ValueError if data is malformed."""
+        record = TestRecord(
+            data["name"],
+            ResultRecord(**data["i2jresult"]),
+            ResultRecord(**data["j2iresult"]),
+            data["backend"],
+            data["elapsed"],
+        )
+        if not isinstance(record.name, str) or not isinstance(
+            record.backend, (str, type(None))
+        ):
+            raise TypeError("test name and backend must be strings")
+        return record
+
+
+@dataclass
+class ReportedTest:
+    """The record and report sections of a test that a reporter exported."""
+
+    record: TestRecord
+    details: str
+    """HTML of the test details, or of its results only if it has a backend"""
+    input: str = None
+    """HTML of the input of a test that has a backend"""
 
 
 class JSONHighlighter:
     def __init__(self, file):
         self.file = file
+        self._tokens = {}
+        """Tokens of the printed documents, and the documents, by their id"""
         self.reset()
 
+    def forget(self):
+        """Releases the tokens of all printed documents."""
+        self._tokens.clear()
+
+    def tokens(self, data) -> list[str]:
+        """Returns the JSON tokens of data, encoding it only once."""
+        try:
+            return self._tokens[id(data)][1]
+        except KeyError:
+            pass
+        toks = []
+        for tok in json.JSONEncoder(sort_keys=True, separators=(",", ": ")).iterencode(
+            data
+        ):
+            # Split start of array and ',' from the actual array element.
+            if tok[0] in "[," and len(tok) > 1:
+                toks.append(tok[0])
+                toks.append(tok[1:])
+            else:
+                toks.append(tok)
+        # Keep data, so that its id is not reused while cached.
+        self._tokens[id(data)] = (data, toks)
+        return toks
+
     def reset(self):
         self.indent = 0
         self.scope = []
-        self.path = JsonPath([])
+        self.path = JsonPath()
         self.toks = []
         self.highlight = {}
 
@@ -204,14 +697,15 @@ class JSONHighlighter:
         self.scope.pop()
 
     def _enter_path(self, name):
-        self.path.append(name)
+        self.path = self.path.child(name)
         if css_class := self.highlight.get(self.path.encode()):
             print(f'<span class="{css_class}">', end="", file=self.file)
 
     def _leave_path(self, have_next=False):
         if self.path.encode() in self.highlight:
             print("</span>", end="", file=self.file)
-        v = self.path.pop()
+        v = self.path.name
+        self.path = self.path.parent
         if have_next and self.scope[-1] == "[":
             self._enter_path(str(int(v) + 1))
 
@@ -228,57 +722,220 @@ class JSONHighlighter:
                 for jpath in jpaths
             )
 
-        tok_stack = []
-        for tok in json.JSONEncoder(sort_keys=True, separators=(",", ": ")).iterencode(
-            data
-        ):
-            # Split start of array and ',' from the actual array element.
-            if tok[0] in "[," and len(tok) > 1:
-                tok_stack.append(tok[1:])
-                tok_stack.append(tok[0])
-            else:
-                tok_stack.append(tok)
-            while len(tok_stack):
-                tok = tok_stack.pop()
-                match tok:
-                    case "{" | "[":
-                        self.toks.append(tok)
-                        self._flush(end="\n")
-                        self.indent += 2
-                        self._enter_scope(tok)
-                    case "}" | "]":
-                        self._flush()
-                        self.indent -= 2
-                        self.toks.append(tok)
-                        self._flush(pre="\n")
-                        self._leave_scope()
-                    case ",":
-                        self.toks.append(tok)
-                        self._flush(end="\n")
-                        self._leave_path(have_next=True)
-                    case ": ":
-                        self.toks.append(tok)
-                        self._enter_path(json.loads(self.toks[-2]))
-                    case _:
-                        self.toks.append(tok)
+        for tok in self.tokens(data):
+            match tok:
+                case "{" | "[":
+                    self.toks.append(tok)
+                    self._flush(end="\n")
+                    self.indent += 2
+                    self._enter_scope(tok)
+                case "}" | "]":
+                    self._flush()
+                    self.indent -= 2
+                    self.toks.append(tok)
+                    self._flush(pre="\n")
+                    self._leave_scope()
+                case ",":
+                    self.toks.append(tok)
+                    self._flush(end="\n")
+                    self._leave_path(have_next=True)
+                case ": ":
+                    self.toks.append(tok)
+                    self._enter_path(json.loads(self.toks[-2]))
+                case _:
+                    self.toks.append(tok)
         self._flush(pre="\n", end="\n")  # flush any garbage
 
 
+def _read_section(spool, section: tuple[int, int]) -> str:
+    """Returns the section at an offset and length of a spool file."""
+    offset, length = section
+    spool.flush()
+    spool.buffer.seek(offset)
+    return spool.buffer.read(length).decode("utf-8")
+
+
 class HTMLReporter:
-    def __init__(self, file):
-        self.file = file
-        self.jhighlighter = JSONHighlighter(file)
+    """Prints the HTML report of tests.
 
-    def print(self, tests: list[Test]):
-        self._print_preamble()
-        self._print_summary(tests)
+    The details of each test are printed to a spool file as soon as the
+    test is added, so that the test can be released. Only a compact record
+    of each test is kept for the summary, which precedes the details in the
+    report. Finishing the report prints the summary and copies the details
+    from the spool file, ordered by test name.
+
+    Tests that ran against several named backends are reported as a matrix
+    of tests and backends. The input of such a test is printed only once,
+    followed by the results of each backend."""
+
+    def __init__(self, file=None, backends: list[str] = None):
+        self.out = file
+        self.file = tempfile.TemporaryFile("w+", encoding="utf-8", newline="")
+        self.jhighlighter = JSONHighlighter(self.file)
+        self.backends = list(backends or [])
+        """Names of the backends, in the order of the matrix columns"""
+        self.records: dict[str, TestRecord] = {}
+        """Records of the added tests, by test key"""
+        self.sections: dict[str, tuple[int, int]] = {}
+        """Offset and length of the details of each test in the spool file"""
+        self.inputs: dict[str, tuple[int, int]] = {}
+        """Offset and length of the input of each test run against several
+        backends, by test name"""
+        self._garbage = 0
+        """Bytes of discarded and replaced sections in the spool file"""
+        self.memory_profile: dict = None
+        """Memory profile to print after the summary, if set"""
+
+    def print(self, tests: Iterable[Test]):
         for test in tests:
-            print("<hr>", file=self.file)
-            print(f"<h2 id={test.name}>Test {test.name}</h2>", file=self.file)
-            self._print_test_details(test)
-            self._print_i2jresult(test)
-            self._print_j2iresult(test)
-        self._print_footer()
+            self.add(test)
+        self.finish()
+
+    def add(self, test: Test) -> TestRecord:
+        """Prints the details of a finished test and records its outcome."""
+        with trace.span("report", "report", test=test.key):
+            self._forget(self.sections.get(test.key))
+            if test.backend is None:
+                self.sections[test.key] = self._spool(self._print_test, test)
+            else:
+                if test.backend not in self.backends:
+                    self.backends.append(test.backend)
+                if test.name not in self.inputs:
+                    self.inputs[test.name] = self._spool(self._print_input, test)
+                self.sections[test.key] = self._spool(self._print_results, test)
+            self.jhighlighter.forget()
+        record = self.records[test.key] = TestRecord.from_test(test)
+        return record
+
+    def export(self, key: str) -> ReportedTest:
+        """Returns the record and report sections of an added test."""
+        record = self.records[key]
+        reported = ReportedTest(record, _read_section(self.file, self.sections[key]))
+        if record.backend is not None:
+            reported.input = _read_section(self.file, self.inputs[record.name])
+        return reported
+
+    def add_reported(self, reported: ReportedTest) -> TestRecord:
+        """Adds a test that a reporter exported, such as in another process."""
+        record = reported.record
+        if record.backend is not None:
+            if record.backend not in self.backends:
+                self.backends.append(record.backend)
+            if record.name not in self.inputs:
+                self.inputs[record.name] = self._spool(self.file.write, reported.input)
+        self._forget(self.sections.get(record.key))
+        self.sections[record.key] = self._spool(self.file.write, reported.details)
+        self.records[record.key] = record
+        return record
+
+    def _spool(self, print_section, *args) -> tuple[int, int]:
+        """Prints a section to the spool file.
+
+        Returns the offset and length of the section."""
+        self.file.flush()
+        offset = self.file.buffer.seek(0, io.SEEK_END)
+        print_section(*args)
+        self.file.flush()
+        return offset, self.file.buffer.tell() - offset
+
+    def _print_test(self, test: Test):
+        self._print_input(test)
+        self._print_results(test)
+
+    def _print_input(self, test: Test):
+        print("<hr>", file=self.file)
+        print(f"<h2 id={test.name}>Test {test.name}</h2>", file=self.file)
+        self._print_test_details(test)
+
+    def _print_results(self, test: Test):
+        self._print_i2jresult(test)
+        self._print_j2iresult(test)
+
+    def discard(self, name: str):
+        """Removes a previously added test from the report."""
+        keys = [key for key, record in self.records.items() if record.name == name]
+        for key in keys:
+            del self.records[key]
+            self._forget(self.sections.pop(key, None))
+        self._forget(self.sections.pop(name, None))
+        self._forget(self.inputs.pop(name, None))
+
+    def _forget(self, section: tuple[int, int]):
+        if section is not None:
+            self._garbage += section[1]
+
+    def compact(self):
+        """Copies the sections of the added tests to a new spool file, once
+        discarded and replaced sections fill half of the spool file."""
+        self.file.flush()
+        if not self._garbage or self._garbage * 2 < self.file.buffer.seek(
+            0, io.SEEK_END
+        ):
+            return
+        spool = self.file
+        self.file = tempfile.TemporaryFile("w+", encoding="utf-8", newline="")
+        try:
+            inputs = {
+                name: self._spool(self.file.write, _read_section(spool, section))
+                for name, section in self.inputs.items()
+            }
+            sections = {
+                key: self._spool(self.file.write, _read_section(spool, section))
+                for key, section in self.sections.items()
+            }
+        except BaseException:
+            self.file.close()
+            self.file = spool
+            raise
+        spool.close()
+        self.jhighlighter.file = self.file
+        self.inputs = inputs
+        self.sections = sections
+        self._garbage = 0
+
+    def write(self, file=None):
+        """Prints the report of all added tests.
+
+        The report is printed to file, or to the file of this reporter.
+        Tests may still be added and the report written again."""
+        if file is not None:
+            self.out = file
+        columns = {backend: i for i, backend in enumerate(self.backends)}
+        records = sorted(
+            self.records.values(),
+            key=lambda record: (record.name, columns.get(record.backend, -1)),
+        )
+        spool, self.file = self.file, self.out
+
+        def copy(section: tuple[int, int]):
+            self.out.write(_read_section(spool, section))
+
+        try:
+            with trace.span("report write", "report", tests=len(records)):
+                self._print_preamble()
+                if self.backends:
+                    self._print_matrix_summary(records)
+                else:
+                    self._print_summary(records)
+                if self.memory_profile:
+                    self._print_memory_profile(self.memory_profile)
+                spool.flush()
+                name = None
+                for record in records:
+                    if record.backend is not None and record.name != name:
+                        copy(self.inputs[record.name])
+                    name = record.name
+                    copy(self.sections[record.key])
+                self._print_footer()
+        finally:
+            self.file = spool
+
+    def finish(self, file=None):
+        """Prints the report of all added tests and closes the spool file."""
+        try:
+            self.write(file)
+        finally:
+            self.file.close()
 
     def _print_preamble(self):
         print(
@@ -292,6 +949,7 @@ class HTMLReporter:
   .success { background: lightgreen; }
   .invalid { background: orange; }
   .error {background: red;}
+  .regressed { background: orange; font-weight: bolder; }
   .sourcecode { white-space: pre; font-family: monospace; }
   .highlight { color: darkred; font-weight: bolder; }
   pre, .sourcecode { background-color: #efefef; width: max-content; padding: 1em; border: 1px solid #aaaaaa; }
@@ -311,7 +969,7 @@ class HTMLReporter:
             file=self.file,
         )
 
-    def _print_summary(self, tests: list[Test]):
+    def _print_summary(self, tests: list[TestRecord]):
         print(
             """
 <h2>Summary</h2>
@@ -320,6 +978,8 @@ class HTMLReporter:
     <th>Test name</th>
     <th>iCalendar to JSCalendar</th>
     <th>JSCalendar to iCalendar</th>
+    <th>iCalendar to JSCalendar latency</th>
+    <th>JSCalendar to iCalendar latency</th>
   </tr>""",
             file=self.file,
         )
@@ -342,11 +1002,123 @@ class HTMLReporter:
      </span>
    </a>
  </td>
+ <td>{self._latency(test.i2jresult)}</td>
+ <td>{self._latency(test.j2iresult)}</td>
+</tr>""",
+                file=self.file,
+            )
+        print("</table>", file=self.file)
+
+    def _print_matrix_summary(self, records: list[TestRecord]):
+        print(
+            """
+<h2>Summary</h2>
+<table>
+  <tr>
+    <th rowspan="2">Test name</th>""",
+            file=self.file,
+        )
+        for backend in self.backends:
+            print(f'    <th colspan="4">{html.escape(backend)}</th>', file=self.file)
+        print("  </tr>\n  <tr>", file=self.file)
+        for _ in self.backends:
+            print(
+                """    <th>iCalendar to JSCalendar</th>
+    <th>JSCalendar to iCalendar</th>
+    <th>iCalendar to JSCalendar latency</th>
+    <th>JSCalendar to iCalendar latency</th>""",
+                file=self.file,
+            )
+        print("  </tr>", file=self.file)
+        for name, group in itertools.groupby(records, key=attrgetter("name")):
+            by_backend = {record.backend: record for record in group}
+            print(f"<tr>\n  <td>{name}</td>", file=self.file)
+            for backend in self.backends:
+                record = by_backend.get(backend)
+                if record is None:
+                    print('  <td colspan="4"></td>', file=self.file)
+                    continue
+                for direction, result in (
+                    ("i2j", record.i2jresult),
+                    ("j2i", record.j2iresult),
+                ):
+                    print(
+                        f"""  <td>
+    <a href="#{record.key}-{direction}">
+      <span class="{result.outcome()}">{result.outcome()}</span>
+    </a>
+  </td>""",
+                        file=self.file,
+                    )
+                print(f"  <td>{self._latency(record.i2jresult)}</td>", file=self.file)
+                print(f"  <td>{self._latency(record.j2iresult)}</td>", file=self.file)
+            print("</tr>", file=self.file)
+        print("</table>", file=self.file)
+
+    def _print_memory_profile(self, profile: dict):
+        from .memprof import MiB
+
+        print(
+            f"""
+<h2>Memory profile</h2>
+<p>Peak traced memory {profile["peak"] / MiB:.1f} MiB,
+{profile["current"] / MiB:.1f} MiB still in use.</p>
+<table>
+  <tr>
+    <th>Phase</th>
+    <th>Runs</th>
+    <th>Peak (MiB)</th>
+    <th>Retained (MiB)</th>
+  </tr>""",
+            file=self.file,
+        )
+        for phase in profile["phases"]:
+            print(
+                f"""
+<tr>
+  <td>{html.escape(phase["name"])}</td>
+  <td>{phase["count"]}</td>
+  <td>{phase["peak"] / MiB:.3f}</td>
+  <td>{phase["retained"] / MiB:.3f}</td>
+</tr>""",
+                file=self.file,
+            )
+        print("</table>", file=self.file)
+        print(
+            f"""
+<h3>Top allocation sites at {profile["snapshot"] / MiB:.1f} MiB in use</h3>
+<table>
+  <tr>
+    <th>Line</th>
+    <th>Size (MiB)</th>
+    <th>Blocks</th>
+  </tr>""",
+            file=self.file,
+        )
+        for site in profile["sites"]:
+            print(
+                f"""
+<tr>
+  <td>{html.escape(site["file"])}:{site["line"]}</td>
+  <td>{site["size"] / MiB:.3f}</td>
+  <td>{site["blocks"]}</td>
 </tr>""",
                 file=self.file,
             )
         print("</table>", file=self.file)
 
+    @staticmethod
+    def _latency(result: ResultRecord) -> str:
+        if result.duration is None:
+            return ""
+        latency = f"{result.duration * 1000:.3f}ms"
+        if result.baseline is not None:
+            latency = (
+                f'<span class="regressed">{latency} '
+                f"(baseline {result.baseline * 1000:.3f}ms)</span>"
+            )
+        return latency
+
     def _print_test_details(self, test: Test):
         print(
             f"""
@@ -367,10 +1139,16 @@ class HTMLReporter:
             file=self.file,
         )
 
+    @staticmethod
+    def _backend_label(test: Test) -> str:
+        if test.backend is None:
+            return ""
+        return f"{html.escape(test.backend)}: "
+
     def _print_i2jresult(self, test: Test):
         print(
             f"""
-<h3 id={test.name}-i2j>iCalendar to JSCalendar</h3>
+<h3 id={test.key}-i2j>{self._backend_label(test)}iCalendar to JSCalendar</h3>
   <p>
     <span class="{test.i2jresult.outcome()}">
       {test.i2jresult.outcome()}
@@ -416,6 +1194,12 @@ class HTMLReporter:
                 f"<pre>{html.escape(test.i2jresult.response.decode())}</pre>",
                 file=self.file,
             )
+        elif test.i2jresult.size:
+            print(
+                f"<p>The backend response of {test.i2jresult.size} bytes matched "
+                "while streaming and was not kept.</p>",
+                file=self.file,
+            )
         if test.i2jresult.json_response:
             print(f"<h3>Normalized backend response</h3>", file=self.file)
             s = json.dumps(test.i2jresult.json_response, indent=2)
@@ -443,7 +1227,11 @@ class HTMLReporter:
         print("</div>", file=self.file)
 
     def _print_j2iresult(self, test: Test):
-        print(f"<h3 id={test.name}-j2i>JSCalendar to iCalendar</h3>", file=self.file)
+        print(
+            f"<h3 id={test.key}-j2i>"
+            f"{self._backend_label(test)}JSCalendar to iCalendar</h3>",
+            file=self.file,
+        )
         print(
             f"""
 <p>
@@ -455,6 +1243,12 @@ class HTMLReporter:
         )
         if test.j2iresult.error:
             print(f"<pre>{test.j2iresult.error}</pre>", file=self.file)
+        if test.j2iresult.issues:
+            print(f"<h3>Spec violations</h3>", file=self.file)
+            print(
+                f"<pre>{html.escape(chr(10).join(test.j2iresult.issues))}</pre>",
+                file=self.file,
+            )
         if test.j2iresult.ical_diff and not test.j2iresult.ical_diff.empty():
             print(f"<h3>Expected</h3>", file=self.file)
             print(f"<pre>{html.escape(str(test.vobject))}</pre>", file=self.file)
@@ -481,9 +1275,11 @@ class HTMLReporter:
         print("</details>", file=self.file)
 
 
-def find_tests(rfcfile_name: str, names: set[str] = None, verbose=False):
-    tests = []
-    for figure in XMLTree.parse(rfcfile_name).getroot().findall(".//figure"):
+def extract_figures(
+    rfcfile, names: set[str] = None, verbose=False
+) -> Iterator[tuple[str, str, str]]:
+    """Yields the anchor, iCalendar and JSCalendar text of test figures."""
+    for figure in XMLTree.parse(rfcfile).getroot().findall(".//figure"):
         anchor = figure.get("anchor")
         if not anchor:
             continue
@@ -504,26 +1300,1025 @@ def find_tests(rfcfile_name: str, names: set[str] = None, verbose=False):
                 print(f"{anchor}: no jscalendar sourcecode, ignoring", file=sys.stderr)
             continue
 
-        tests.append(Test(anchor, icaltext, jcaltext))
+        yield anchor, icaltext, jcaltext
+
 
+def extract_tests(rfcfile, names: set[str] = None, verbose=False):
+    with trace.span("extract", "load", file=f"{rfcfile}"):
+        tests = [
+            Test(anchor, icaltext, jcaltext)
+            for anchor, icaltext, jcaltext in extract_figures(rfcfile, names, verbose)
+        ]
     tests.sort(key=attrgetter("name"))
     return tests
 
 
-def run_tests(tests: list[Test], backend: Backend):
-    counter = collections.Counter()
+class Corpus:
+    """A compiled test corpus file.
+
+    The file starts with the length of the pickled header, followed by
+    the header and the pickled tests. The header contains the key of the
+    source from which the tests were extracted, and an index from test
+    name to the offset and length of the pickled test.
+
+    Loading a pickle can run arbitrary code, so the corpus file must be as
+    trusted as the code of this package. A corpus file that is owned by
+    another user, or that other users may write, is ignored."""
+
+    VERSION = 1
+
+    def __init__(self, path: str):
+        self.path = path
+
+    @staticmethod
+    def source_key(datas: list[bytes]) -> str:
+        # Cached tests also depend on the code that parsed and expanded them.
+        h = hashlib.sha256(f"{Corpus.VERSION}".encode())
+        package_dir = os.path.dirname(os.path.abspath(__file__))
+        for fname in sorted(glob.glob(os.path.join(package_dir, "*.py"))):
+            with open(fname, "rb") as f:
+                h.update(f.read())
+        for data in datas:
+            h.update(hashlib.sha256(data).digest())
+        return h.hexdigest()
+
+    def load(self, key: str, names: set[str] = None) -> list[Test]:
+        """Returns the named tests, or all tests if names is None.
+
+        Returns None if the corpus file does not exist or does not match key."""
+        try:
+            with open(self.path, "rb") as f:
+                if not self._trusted(os.fstat(f.fileno())):
+                    print(
+                        f"{self.path}: untrusted corpus file, ignoring",
+                        file=sys.stderr,
+                    )
+                    return None
+                (header_len,) = struct.unpack("<Q", f.read(8))
+                header = pickle.loads(f.read(header_len))
+                if header["version"] != Corpus.VERSION or header["key"] != key:
+                    return None
+                base = 8 + header_len
+                tests = []
+                for name, (offset, length) in header["index"].items():
+                    if names and name not in names:
+                        continue
+                    f.seek(base + offset)
+                    tests.append(pickle.loads(f.read(length)))
+                return tests
+        except FileNotFoundError:
+            return None
+        except (
+            OSError,
+            EOFError,
+            KeyError,
+            ValueError,
+            struct.error,
+            pickle.PickleError,
+        ):
+            return None
+
+    @staticmethod
+    def _trusted(st: os.stat_result) -> bool:
+        if not hasattr(os, "getuid"):
+            return True
+        return st.st_uid == os.getuid() and not st.st_mode & 0o022
+
+    def save(self, key: str, tests: list[Test]):
+        index = {}
+        blobs = []
+        offset = 0
+        for test in sorted(tests, key=attrgetter("name")):
+            blob = pickle.dumps(test, protocol=pickle.HIGHEST_PROTOCOL)
+            index[test.name] = (offset, len(blob))
+            blobs.append(blob)
+            offset += len(blob)
+        header = pickle.dumps(
+            {"version": Corpus.VERSION, "key": key, "index": index},
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+        tmpname = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmpname, "wb") as f:
+            f.write(struct.pack("<Q", len(header)))
+            f.write(header)
+            for blob in blobs:
+                f.write(blob)
+        os.replace(tmpname, self.path)
+
+
+def find_sources(
+    patterns: list[str],
+) -> tuple[list[str], list[tuple[str, str, str]]]:
+    """Resolves file names, directories and glob patterns of test sources.
+
+    Returns the list of XML files and the list of example pairs. An example
+    pair consists of the test name and the names of an iCalendar file with
+    suffix .ics and a JSCalendar file with suffix .json. The test name is the
+    common file name without suffix, relative to the directory that was
+    searched or the directory part of the glob pattern, so that pairs with
+    the same file name in different subdirectories have distinct names."""
+    xmlfiles = []
+    pairs = {}
+
+    def add_file(fname, root=None):
+        stem, ext = os.path.splitext(fname)
+        if ext == ".ics" or ext == ".json":
+            icsname, jsonname = f"{stem}.ics", f"{stem}.json"
+            if os.path.isfile(icsname) and os.path.isfile(jsonname):
+                if root is None:
+                    name = os.path.basename(stem)
+                else:
+                    name = os.path.relpath(stem, root).replace(os.sep, "/")
+                pairs[icsname] = (name, icsname, jsonname)
+            else:
+                print(f"{fname}: no matching example pair, ignoring", file=sys.stderr)
+        else:
+            xmlfiles.append(fname)
+
+    for pattern in patterns:
+        fnames = glob.glob(pattern, recursive=True) if glob.has_magic(pattern) else []
+        root = _glob_root(pattern) if fnames else None
+        if not fnames:
+            fnames = [pattern]
+        for fname in sorted(fnames):
+            if os.path.isdir(fname):
+                for dirpath, dirnames, filenames in os.walk(fname):
+                    dirnames.sort()
+                    for name in sorted(filenames):
+                        if name.endswith(".ics"):
+                            add_file(os.path.join(dirpath, name), fname)
+            else:
+                add_file(fname, root)
+
+    return xmlfiles, sorted(pairs.values())
+
+
+def _glob_root(pattern: str) -> str:
+    """Returns the leading directories of a glob pattern without magic."""
+    parts = pattern.replace(os.sep, "/").split("/")
+    root = []
+    for part in parts[:-1]:
+        if glob.has_magic(part):
+            break
+        root.append(part)
+    return "/".join(root) or "."
+
+
+def load_pairs(pairs: list[tuple[str, str, str]]) -> list[Test]:
+    tests = []
+    for name, icsname, jsonname in pairs:
+        try:
+            with open(icsname, "r", encoding="utf-8") as f:
+                icaltext = f.read().strip()
+            with open(jsonname, "r", encoding="utf-8") as f:
+                jcaltext = f.read().strip()
+            tests.append(Test(name, icaltext, jcaltext))
+        except (OSError, ValueError) as e:
+            print(f"{name}: {e}, ignoring", file=sys.stderr)
+    return tests
+
+
+def _load_task(task) -> list[Test]:
+    kind, arg, verbose = task
+    if kind == "xml":
+        return extract_tests(arg, verbose=verbose)
+    with trace.span("load pairs", "load", pairs=len(arg)):
+        return load_pairs(arg)
+
+
+def _traced_load_task(task) -> tuple[list[Test], list[trace.Event]]:
+    trace.start()
+    tests = _load_task(task)
+    return tests, trace.take_events()
+
+
+# Number of example pairs that a worker loads at once
+LOAD_CHUNK_SIZE = 64
+
+
+def load_sources(
+    xmlfiles: list[str],
+    pairs: list[tuple[str, str, str]],
+    verbose=False,
+    processes: int = None,
+) -> list[Test]:
+    """Loads all tests from the XML files and example pairs.
+
+    Sources are loaded in a pool of processes if there is more than one
+    chunk of work. Tests are sorted by name, and any test whose name is
+    already taken by a previously loaded test is ignored."""
+    tasks = [("xml", fname, verbose) for fname in xmlfiles]
+    for i in range(0, len(pairs), LOAD_CHUNK_SIZE):
+        tasks.append(("pairs", pairs[i : i + LOAD_CHUNK_SIZE], verbose))
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if len(tasks) > 1 and processes > 1:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=processes) as pool:
+            if trace.enabled():
+                results = []
+                for tests, events in pool.map(_traced_load_task, tasks):
+                    trace.add_events(events)
+                    results.append(tests)
+            else:
+                results = list(pool.map(_load_task, tasks))
+    else:
+        results = [_load_task(task) for task in tasks]
+
+    tests = {}
+    for test in itertools.chain.from_iterable(results):
+        if test.name in tests:
+            print(f"{test.name}: duplicate test name, ignoring", file=sys.stderr)
+            continue
+        tests[test.name] = test
+    return sorted(tests.values(), key=attrgetter("name"))
+
+
+def find_tests(
+    sources: list[str] | str,
+    names: set[str] = None,
+    verbose=False,
+    cache: str = None,
+    processes: int = None,
+):
+    if isinstance(sources, str):
+        sources = [sources]
+    xmlfiles, pairs = find_sources(sources)
+    if not cache and len(xmlfiles) == 1 and not pairs:
+        return extract_tests(xmlfiles[0], names=names, verbose=verbose)
+
+    corpus = Corpus(cache) if cache else None
+    tests = None
+    if corpus:
+        datas = []
+        for fname in xmlfiles:
+            with open(fname, "rb") as f:
+                datas.append(f.read())
+        for name, icsname, jsonname in pairs:
+            datas.append(name.encode())
+            for fname in (icsname, jsonname):
+                with open(fname, "rb") as f:
+                    datas.append(f.read())
+        key = Corpus.source_key(datas)
+        with trace.span("corpus load", "load"):
+            tests = corpus.load(key, names)
+
+    if tests is None:
+        tests = load_sources(xmlfiles, pairs, verbose=verbose, processes=processes)
+        if corpus:
+            try:
+                with trace.span("corpus save", "load"):
+                    corpus.save(key, tests)
+            except OSError as e:
+                print(f"{cache}: {e}", file=sys.stderr)
+        if names:
+            tests = [test for test in tests if test.name in names]
+
+    if names:
+        for name in sorted(names - set(test.name for test in tests)):
+            print(f"{name}: no such test, ignoring", file=sys.stderr)
+    return tests
+
+
+# Number of tests per job that run_tests keeps in flight
+RUN_QUEUE_FACTOR = 2
+
+
+def run_tests(
+    tests: Iterable[Test],
+    backends: dict[str, Backend],
+    jobs: int = 1,
+    repeat: int = 1,
+    validator: Validator = None,
+    deadline: float = None,
+) -> Iterator[Test]:
+    """Runs the tests and yields each test as soon as it finished.
+
+    Each test runs against each backend, by backend name. A backend without
+    name runs the test itself, any other backend runs a copy of the test
+    for that backend. Tests are taken from tests as jobs become free, so a
+    caller that releases the tests it got keeps memory bounded. No more
+    tests are taken once deadline seconds have passed, but running tests
+    still finish."""
+    start = time.perf_counter()
+    # Conversions and seconds in the backend, by backend name
+    stats = {name: [0, 0.0] for name in backends}
+
+    def finished(test: Test) -> Test:
+        print(f"{test.key}", file=sys.stderr)
+        for result in (test.i2jresult, test.j2iresult):
+            if result and result.durations:
+                stats[test.backend][0] += len(result.durations)
+                stats[test.backend][1] += sum(result.durations)
+        return test
+
+    def runs() -> Iterator[tuple[Test, Backend]]:
+        it = iter(tests)
+        while deadline is None or time.perf_counter() - start < deadline:
+            test = next(it, None)
+            if test is None:
+                return
+            for name, backend in backends.items():
+                yield (test if name is None else test.for_backend(name)), backend
+
+    if jobs > 1:
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=jobs, thread_name_prefix="job"
+        ) as executor:
+            running = {}
+            for test, backend in itertools.chain(runs(), [(None, None)]):
+                if test is not None:
+                    future = executor.submit(test.run, backend, repeat, validator)
+                    running[future] = test
+                while running and (
+                    test is None or len(running) >= jobs * RUN_QUEUE_FACTOR
+                ):
+                    done, _ = concurrent.futures.wait(
+                        running, return_when=concurrent.futures.FIRST_COMPLETED
+                    )
+                    for future in done:
+                        yield finished(running.pop(future))
+    else:
+        for test, backend in runs():
+            test.run(backend, repeat=repeat, validator=validator)
+            yield finished(test)
+    elapsed = time.perf_counter() - start
+
+    for name, (conversions, backend_time) in stats.items():
+        if conversions and elapsed > 0:
+            print(
+                f"{'' if name is None else f'{name}: '}"
+                f"{conversions} conversions in {elapsed:.3f}s "
+                f"({conversions / elapsed:.1f}/s, {backend_time:.3f}s in backend)",
+                file=sys.stderr,
+            )
+
+
+def drain(tests: list[Test]) -> Iterator[Test]:
+    """Yields the tests in order and removes them from the list."""
+    tests.reverse()
+    while tests:
+        yield tests.pop()
+
+
+def parse_shard(s: str) -> tuple[int, int]:
+    """Parses a shard in form i/n, where 1 <= i <= n."""
+    try:
+        i, n = (int(v) for v in s.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid shard {s}, expected i/n")
+    if n < 1 or not 1 <= i <= n:
+        raise argparse.ArgumentTypeError(f"invalid shard {s}, need 1 <= i <= n")
+    return i, n
+
+
+def in_shard(name: str, shard: tuple[int, int]) -> bool:
+    # Do not use hash(), it is salted per process.
+    i, n = shard
+    return zlib.crc32(name.encode()) % n == i - 1
+
+
+BASELINE_VERSION = 1
+
+
+def save_baseline(fname: str, tests: list[TestRecord]):
+    """Saves the median backend latencies of successful conversions."""
+    baseline = {}
+    for test in tests:
+        latencies = {}
+        for direction, result in (("i2j", test.i2jresult), ("j2i", test.j2iresult)):
+            if result.outcome() != "error" and result.duration is not None:
+                latencies[direction] = result.duration
+        if latencies:
+            baseline[test.key] = latencies
+    with open(fname, "w", encoding="utf-8") as f:
+        json.dump(
+            {"version": BASELINE_VERSION, "tests": baseline},
+            f,
+            indent=2,
+            sort_keys=True,
+        )
+
+
+def load_baseline(fname: str) -> dict[str, dict]:
+    """Returns the baseline latencies of tests, by test key."""
+    with open(fname, "r", encoding="utf-8") as f:
+        try:
+            baseline = json.load(f)
+        except json.JSONDecodeError as e:
+            raise OSError(f"{fname}: {e}") from e
+    if not isinstance(baseline, dict) or baseline.get("version") != BASELINE_VERSION:
+        raise OSError(f"{fname}: unsupported baseline file")
+    return baseline["tests"]
+
+
+def compare_baseline(
+    baseline: dict[str, dict], tests: Iterable[TestRecord], threshold: float
+) -> int:
+    """Marks results whose latency regressed by more than threshold percent.
+
+    Returns the number of regressed results."""
+    regressions = 0
+    for test in tests:
+        latencies = baseline.get(test.key, {})
+        for direction, result in (("i2j", test.i2jresult), ("j2i", test.j2iresult)):
+            old = latencies.get(direction)
+            if result.duration is None or old is None:
+                continue
+            if result.duration > old * (1 + threshold / 100):
+                result.baseline = old
+                regressions += 1
+                print(
+                    f"{test.key}: {direction} latency regressed from "
+                    f"{old * 1000:.3f}ms to {result.duration * 1000:.3f}ms",
+                    file=sys.stderr,
+                )
+    return regressions
+
+
+HISTORY_VERSION = 1
+
+# Orders in which tests may be scheduled
+SCHEDULE_ORDERS = ("name", "longest", "failed")
+
+
+def load_history(fname: str) -> dict[str, dict]:
+    """Returns the elapsed seconds and failure of tests in previous runs,
+    by test key. The history is empty if the file does not exist."""
+    try:
+        with open(fname, "r", encoding="utf-8") as f:
+            history = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except json.JSONDecodeError as e:
+        raise OSError(f"{fname}: {e}") from e
+    if not isinstance(history, dict) or history.get("version") != HISTORY_VERSION:
+        raise OSError(f"{fname}: unsupported history file")
+    return history["tests"]
+
+
+def save_history(fname: str, history: dict[str, dict], tests: list[TestRecord]):
+    """Saves the history, updated with the tests of this run."""
+    for test in tests:
+        if test.elapsed is not None:
+            history[test.key] = {"elapsed": test.elapsed, "failed": test.failed()}
+    with open(fname, "w", encoding="utf-8") as f:
+        json.dump(
+            {"version": HISTORY_VERSION, "tests": history},
+            f,
+            indent=2,
+            sort_keys=True,
+        )
+
+
+def schedule_tests(
+    tests: list[Test],
+    history: dict[str, dict],
+    order: str,
+    backends: Iterable[str] = (None,),
+) -> list[Test]:
+    """Orders the tests by their history in previous runs.
+
+    The longest order runs the tests that took the longest first, so that
+    slow tests do not stretch the end of a concurrent run. The failed
+    order runs the tests that failed last time first, for quick feedback.
+    Tests without history come first, and ties keep their order."""
+    if order == "name":
+        return tests
+
+    def sort_key(test: Test) -> tuple:
+        entries = [history.get(test_key(test.name, backend)) for backend in backends]
+        if not all(isinstance(entry, dict) for entry in entries):
+            return (0, 0)
+        if order == "longest":
+            return (1, -sum(entry.get("elapsed", 0.0) for entry in entries))
+        return (1, 0 if any(entry.get("failed") for entry in entries) else 1)
+
+    return sorted(tests, key=sort_key)
+
+
+RESULTS_VERSION = 1
+
+
+class ResultsWriter:
+    """Writes the reported tests for the merge command as they finish.
+
+    The file is JSON text with one value per line: a header, followed by
+    the record and the report sections of one test after the other. The
+    file is only replaced when the writer closes."""
+
+    def __init__(self, fname: str):
+        self.fname = fname
+        self.tmpname = f"{fname}.{os.getpid()}.tmp"
+        self.file = open(self.tmpname, "w", encoding="utf-8")
+        self._dump({"version": RESULTS_VERSION})
+
+    def _dump(self, obj):
+        self.file.write(json.dumps(obj))
+        self.file.write("\n")
+
+    def add(self, reported: ReportedTest):
+        self._dump(asdict(reported))
+
+    def close(self):
+        self.file.close()
+        os.replace(self.tmpname, self.fname)
+
+    def abort(self):
+        self.file.close()
+        try:
+            os.remove(self.tmpname)
+        except OSError:
+            pass
+
+
+def load_results(fname: str) -> Iterator[ReportedTest]:
+    with open(fname, encoding="utf-8") as f:
+        try:
+            header = json.loads(f.readline())
+        except ValueError as e:
+            raise OSError(f"{fname}: invalid results file") from e
+        if not isinstance(header, dict) or header.get("version") != RESULTS_VERSION:
+            raise OSError(f"{fname}: unsupported results file")
+        for line in f:
+            try:
+                data = json.loads(line)
+                reported = ReportedTest(
+                    TestRecord.from_json(data["record"]),
+                    data["details"],
+                    data["input"],
+                )
+                if not isinstance(reported.details, str) or (
+                    reported.record.backend is not None
+                    and not isinstance(reported.input, str)
+                ):
+                    raise TypeError("report sections must be strings")
+            except (KeyError, TypeError, ValueError) as e:
+                raise OSError(f"{fname}: invalid results file") from e
+            yield reported
+
+
+def merge_results(fnames: list[str]) -> Iterator[ReportedTest]:
+    """Yields the tests of all results files, ignoring duplicate names."""
+    keys = set()
+    for fname in fnames:
+        for reported in load_results(fname):
+            key = reported.record.key
+            if key in keys:
+                print(f"{fname}: duplicate test {key}, ignoring", file=sys.stderr)
+                continue
+            keys.add(key)
+            yield reported
+
+
+# Seconds between checks for changed files in watch mode
+WATCH_INTERVAL = 0.2
+
+
+def print_summary(tests: Iterable[TestRecord]):
+    by_backend = {None: []}
     for test in tests:
-        test.run(backend)
-        print(f"{test.name}", file=sys.stderr)
+        by_backend.setdefault(test.backend, []).append(test)
+    if len(by_backend) > 1 and not by_backend[None]:
+        del by_backend[None]
+    for backend, tests in by_backend.items():
+        counter = collections.Counter()
+        for test in tests:
+            for result in (test.i2jresult, test.j2iresult):
+                counter[result.outcome()] += 1
+        outcomes = ", ".join(f"{n} {outcome}" for outcome, n in sorted(counter.items()))
+        prefix = "" if backend is None else f"{backend}: "
+        print(f"{prefix}{len(tests)} tests: {outcomes}", file=sys.stderr)
+
+
+class Watcher:
+    """Runs the tests of XML files again whenever the files change.
+
+    The watcher keeps the backend, the tests with their results and the
+    rendered report sections between runs. A change of a file only costs
+    extracting the figures of that file, running the tests whose figures
+    changed and writing the report."""
+
+    def __init__(
+        self,
+        fnames: list[str],
+        backends: dict[str, Backend],
+        report: str,
+        names: set[str] = None,
+        jobs: int = 1,
+        validator: Validator = None,
+    ):
+        self.fnames = fnames
+        self.backends = backends
+        self.report = report
+        self.names = names
+        self.jobs = jobs
+        self.validator = validator
+        self.reporter = HTMLReporter(backends=[b for b in backends if b is not None])
+        self.tests: dict[str, Test] = {}
+        """Tests of the last run, by name"""
+        self.figures: dict[str, dict[str, tuple[str, str]]] = {}
+        """Figure texts of each file, by test name"""
+        self.stats: dict[str, tuple[int, int]] = {}
+        """Modification time and size of each file"""
+
+    def changed_files(self) -> list[str]:
+        """Returns the files that changed since the last call."""
+        changed = []
+        for fname in self.fnames:
+            try:
+                st = os.stat(fname)
+                stat = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                stat = None
+            if fname not in self.stats or self.stats[fname] != stat:
+                self.stats[fname] = stat
+                changed.append(fname)
+        return changed
+
+    def update(self, fnames: list[str]):
+        """Runs the tests of changed figures in these files and writes the report."""
+        start = time.perf_counter()
+        for fname in fnames:
+            try:
+                self.figures[fname] = {
+                    anchor: (icaltext, jcaltext)
+                    for anchor, icaltext, jcaltext in extract_figures(fname, self.names)
+                }
+            except (OSError, XMLTree.ParseError) as e:
+                # Keep the tests of the last version, it may be mid-save.
+                print(f"{fname}: {e}", file=sys.stderr)
+
+        figures = {}
+        for fname in self.fnames:
+            for anchor, texts in self.figures.get(fname, {}).items():
+                figures.setdefault(anchor, texts)
+        removed = [name for name in self.tests if name not in figures]
+        for name in removed:
+            del self.tests[name]
+            self.reporter.discard(name)
+        changed = []
+        for anchor, (icaltext, jcaltext) in figures.items():
+            test = self.tests.get(anchor)
+            if test and test.icaltext == icaltext and test.jscaltext == jcaltext:
+                continue
+            try:
+                changed.append(Test(anchor, icaltext, jcaltext))
+            except ValueError as e:
+                print(f"{anchor}: {e}, ignoring", file=sys.stderr)
+                self.tests.pop(anchor, None)
+            # The input of a test is reported once for all backends.
+            self.reporter.discard(anchor)
+
+        for test in run_tests(
+            changed, self.backends, jobs=self.jobs, validator=self.validator
+        ):
+            self.tests[test.name] = test
+            self.reporter.add(test)
+        self.reporter.compact()
+        self.write_report()
+        print(
+            f"{len(changed)} tests run, {len(removed)} removed "
+            f"in {time.perf_counter() - start:.3f}s",
+            file=sys.stderr,
+        )
+        print_summary(self.reporter.records.values())
+
+    def write_report(self):
+        tmpname = f"{self.report}.{os.getpid()}.tmp"
+        with open(tmpname, "w", encoding="utf-8") as file:
+            self.reporter.write(file)
+        os.replace(tmpname, self.report)
+
+    def run(self, interval: float = WATCH_INTERVAL):
+        """Watches the files until interrupted."""
+        while True:
+            changed = self.changed_files()
+            if changed:
+                self.update(changed)
+            time.sleep(interval)
 
 
 ENV_BACKEND_URL = "RFCTEST_BACKEND_URL"
 ENV_BACKEND_AUTH = "RFCTEST_BACKEND_AUTH"
 RFC_FILE = "draft-ietf-calext-jscalendar-icalendar.xml"
+CORPUS_SUFFIX = ".corpus"
 REPORT_FILE = "report.html"
+RESULTS_SUFFIX = ".results"
+SYNTH_DIR = "synthetic"
+REGRESSION_THRESHOLD = 20.0
+
+# A backend name prefixed to its URL
+BACKEND_NAME = re.compile(r"([\w.-]+)=")
+
+
+def add_backend_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        "--url",
+        action="append",
+        metavar="[NAME=]URL",
+        help=f"use HTTP backend at this URL (default: {ENV_BACKEND_URL} environment variable). Repeat to run the tests against several backends, named NAME or by the host and port of their URL",
+    )
+    parser.add_argument(
+        "--auth",
+        help=f"use HTTP Basic authentication. AUTH must be username:password. (default: {ENV_BACKEND_AUTH} environment variable)",
+    )
+    parser.add_argument(
+        "--chunked",
+        action="store_true",
+        help="send iCalendar data to the HTTP backend with chunked transfer encoding",
+    )
+    parser.add_argument(
+        "--backend",
+        metavar="MODULE:CALLABLE",
+        help="use in-process Python converter instead of the HTTP backend",
+    )
+    parser.add_argument(
+        "--backend-processes",
+        type=int,
+        default=0,
+        metavar="N",
+        help="run the --backend converter in a pool of N processes (default: 0, run in-process)",
+    )
+
+
+def parse_backend_urls(urls: list[str]) -> dict[str, str]:
+    """Returns the URLs by backend name.
+
+    A single URL without name has the name None."""
+    named = {}
+    for url in urls:
+        m = BACKEND_NAME.match(url) if url else None
+        if m:
+            name, url = m.group(1), url[m.end() :]
+        elif len(urls) > 1:
+            name = urllib.parse.urlsplit(url).netloc or url
+        else:
+            name = None
+        if name in named:
+            raise BackendError(f"duplicate backend name {name}")
+        named[name] = url
+    return named
+
+
+def create_backends(args: argparse.Namespace) -> dict[str, Backend]:
+    """Returns the backends by name, or a single backend named None."""
+    if args.backend:
+        return {None: PluginBackend(args.backend, processes=args.backend_processes)}
+    urls = parse_backend_urls(args.url or [os.getenv(ENV_BACKEND_URL)])
+    auth = args.auth or os.getenv(ENV_BACKEND_AUTH)
+    return {
+        name: HTTPBackend(url, auth, chunked=args.chunked) for name, url in urls.items()
+    }
+
+
+def close_backends(backends: dict[str, Backend]):
+    for backend in backends.values():
+        backend.close()
+
+
+def add_validator_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        "--spec",
+        default=SPEC_FILE,
+        help=f"validate iCalendar responses against this spec (default: {SPEC_FILE})",
+    )
+    parser.add_argument(
+        "--no-validate",
+        action="store_true",
+        help="do not validate iCalendar responses against the spec",
+    )
+
+
+def create_validator(args: argparse.Namespace) -> Validator:
+    if args.no_validate:
+        return None
+    try:
+        return Validator(load_spec(args.spec))
+    except spec_errors() as e:
+        print(f"Not validating against {args.spec}: {e}", file=sys.stderr)
+        return None
+
+
+def merge_main(argv: list[str]):
+    prog = "python -m rfctest merge"
+
+    parser = argparse.ArgumentParser(
+        prog=prog,
+        description="Merge partial test results into one report",
+    )
+    parser.add_argument(
+        "-o",
+        "--report",
+        default=REPORT_FILE,
+        help=f"write report to this file (default: {REPORT_FILE})",
+    )
+    parser.add_argument("results", nargs="+", help="merge this results file")
+    args = parser.parse_args(argv)
+
+    try:
+        with open(args.report, "w", encoding="utf-8") as file:
+            reporter = HTMLReporter(file)
+            for reported in merge_results(args.results):
+                reporter.add_reported(reported)
+            reporter.finish()
+        print_summary(reporter.records.values())
+    except OSError as e:
+        print(f"{e}", file=sys.stderr)
+        raise SystemExit(1) from e
+    # Results of runs with --baseline are marked if their latency regressed.
+    regressions = sum(
+        result.baseline is not None
+        for record in reporter.records.values()
+        for result in (record.i2jresult, record.j2iresult)
+    )
+    if regressions:
+        print(f"{regressions} latency regressions", file=sys.stderr)
+        raise SystemExit(1)
+
+
+def serve_main(argv: list[str]):
+    from .refconv import ReferenceConverter, serve
+
+    prog = "python -m rfctest serve"
+
+    parser = argparse.ArgumentParser(
+        prog=prog,
+        description="Serve the spec-driven reference converter over HTTP",
+    )
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="listen on this address (default: 127.0.0.1)",
+    )
+    parser.add_argument(
+        "-p",
+        "--port",
+        type=int,
+        default=8080,
+        help="listen on this port (default: 8080)",
+    )
+    parser.add_argument(
+        "--spec",
+        default=SPEC_FILE,
+        help=f"derive the conversion from this spec (default: {SPEC_FILE})",
+    )
+    parser.add_argument("-v", "--verbose", action="store_true", help="log each request")
+    args = parser.parse_args(argv)
+
+    try:
+        converter = ReferenceConverter(load_spec(args.spec))
+        serve(converter, args.host, args.port, verbose=args.verbose)
+    except (OSError, ImportError) as e:
+        print(f"{e}", file=sys.stderr)
+        raise SystemExit(1) from e
+
+
+def generate_main(argv: list[str]):
+    from .synth import TIME_ZONES, CalendarGenerator, Sizes
+
+    prog = "python -m rfctest generate"
+
+    parser = argparse.ArgumentParser(
+        prog=prog,
+        description="Generate synthetic iCalendar and JSCalendar example pairs",
+    )
+    parser.add_argument(
+        "-o",
+        "--output-dir",
+        default=SYNTH_DIR,
+        help=f"write example pairs to this directory (default: {SYNTH_DIR})",
+    )
+    parser.add_argument(
+        "-n",
+        "--pairs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="generate N example pairs (default: 1)",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="seed of the first pair, each further pair increments it (default: 0)",
+    )
+    defaults = Sizes()
+    for name, help in (
+        ("events", "events per calendar"),
+        ("overrides", "recurrence overrides per event"),
+        ("participants", "participants per event"),
+        ("alerts", "alerts per event"),
+        ("timezones", f"time zones per calendar, at most {len(TIME_ZONES)}"),
+    ):
+        parser.add_argument(
+            f"--{name}",
+            type=int,
+            default=getattr(defaults, name),
+            metavar="N",
+            help=f"number of {help} (default: {getattr(defaults, name)})",
+        )
+    parser.add_argument(
+        "--spec",
+        default=SPEC_FILE,
+        help=f"generate calendars from this spec (default: {SPEC_FILE})",
+    )
+    args = parser.parse_args(argv)
+    sizes = Sizes(
+        events=args.events,
+        overrides=args.overrides,
+        participants=args.participants,
+        alerts=args.alerts,
+        timezones=args.timezones,
+    )
+
+    try:
+        generator = CalendarGenerator(load_spec(args.spec))
+        os.makedirs(args.output_dir, exist_ok=True)
+        for i in range(args.pairs):
+            seed = args.seed + i
+            generator.write(args.output_dir, f"synthetic-{seed}", seed, sizes)
+    except (OSError, ImportError) as e:
+        print(f"{e}", file=sys.stderr)
+        raise SystemExit(1) from e
+    print(f"Wrote {args.pairs} example pairs to {args.output_dir}", file=sys.stderr)
+
+
+def watch_main(argv: list[str]):
+    prog = "python -m rfctest watch"
+
+    parser = argparse.ArgumentParser(
+        prog=prog,
+        description="Run tests again whenever the XML files change",
+    )
+    parser.add_argument(
+        "-f",
+        "--file",
+        action="extend",
+        nargs="+",
+        help=f"watch these XML files (default: {RFC_FILE})",
+    )
+    parser.add_argument(
+        "-o",
+        "--report",
+        default=REPORT_FILE,
+        help=f"write report to this file (default: {REPORT_FILE})",
+    )
+    add_backend_arguments(parser)
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help="run this many tests concurrently (default: 1 per backend)",
+    )
+    add_validator_arguments(parser)
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=WATCH_INTERVAL,
+        metavar="SECONDS",
+        help=f"check for changes every SECONDS (default: {WATCH_INTERVAL})",
+    )
+    parser.add_argument("test", nargs="*", help="process this test")
+    args = parser.parse_args(argv)
+
+    validator = create_validator(args)
+    try:
+        backends = create_backends(args)
+        try:
+            watcher = Watcher(
+                args.file or [RFC_FILE],
+                backends,
+                args.report,
+                names=set(args.test) if args.test else None,
+                jobs=args.jobs or len(backends),
+                validator=validator,
+            )
+            print(f"Watching {', '.join(watcher.fnames)}", file=sys.stderr)
+            watcher.run(args.interval)
+        finally:
+            close_backends(backends)
+    except KeyboardInterrupt:
+        pass
+    except (BackendError, OSError) as e:
+        print(f"{e}", file=sys.stderr)
+        raise SystemExit(1) from e
 
 
-def main():
+COMMANDS = {
+    "merge": merge_main,
+    "serve": serve_main,
+    "generate": generate_main,
+    "watch": watch_main,
+}
+
+
+def main(argv: list[str] = None):
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] in COMMANDS:
+        return COMMANDS[argv[0]](argv[1:])
+
     prog = "python -m rfctest"
 
     parser = argparse.ArgumentParser(
@@ -533,8 +2328,24 @@ def main():
     parser.add_argument(
         "-f",
         "--file",
-        default=RFC_FILE,
-        help=f"load tests from this file (default: {RFC_FILE})",
+        action="extend",
+        nargs="+",
+        help=f"load tests from these XML files, directories or glob patterns of .ics and .json example pairs (default: {RFC_FILE})",
+    )
+    parser.add_argument(
+        "--cache",
+        help=f"cache compiled tests in this file (default: FILE{CORPUS_SUFFIX} if FILE is a single XML file)",
+    )
+    parser.add_argument(
+        "--load-processes",
+        type=int,
+        metavar="N",
+        help="load test sources in a pool of N processes (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="neither read nor write the compiled test cache",
     )
     parser.add_argument(
         "-o",
@@ -542,29 +2353,178 @@ def main():
         default=REPORT_FILE,
         help=f"write report to this file (default: {REPORT_FILE})",
     )
+    add_backend_arguments(parser)
     parser.add_argument(
-        "--url",
-        help=f"use HTTP backend at this URL (default: {ENV_BACKEND_URL} environment variable)",
+        "-j",
+        "--jobs",
+        type=int,
+        help="run this many tests concurrently (default: 1 per backend)",
     )
     parser.add_argument(
-        "--auth",
-        help=f"use HTTP Basic authentication. AUTH must be username:password. (default: {ENV_BACKEND_AUTH} environment variable)",
+        "--history",
+        metavar="FILE",
+        help="read the elapsed time and outcome of tests in previous runs from this file, and add those of this run",
+    )
+    parser.add_argument(
+        "--order",
+        choices=SCHEDULE_ORDERS,
+        default="name",
+        help="run tests by name, those that took longest first, or those that failed first in the --history (default: name)",
+    )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        metavar="SECONDS",
+        help="start no more tests after SECONDS, and finish the running ones",
+    )
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        metavar="I/N",
+        help="only run the I-th of N deterministic slices of the tests",
+    )
+    parser.add_argument(
+        "--results",
+        help=f"write partial results to this file for the merge command (default: shard-I-of-N{RESULTS_SUFFIX} if --shard is set)",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=1,
+        metavar="N",
+        help="call the backend N times per conversion and measure the median latency (default: 1)",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        metavar="FILE",
+        help="save backend latencies of this run as baseline to this file",
+    )
+    parser.add_argument(
+        "--baseline",
+        metavar="FILE",
+        help="compare backend latencies against the baseline in this file",
+    )
+    parser.add_argument(
+        "--regression-threshold",
+        type=float,
+        default=REGRESSION_THRESHOLD,
+        metavar="PERCENT",
+        help=f"report latencies exceeding the baseline by more than PERCENT as regression (default: {REGRESSION_THRESHOLD})",
+    )
+    add_validator_arguments(parser)
+    parser.add_argument(
+        "--trace",
+        metavar="FILE",
+        help="write a timeline of the run to this file in Chrome Trace Event format",
+    )
+    parser.add_argument(
+        "--memory-profile",
+        metavar="FILE",
+        help="account memory per phase of the run with tracemalloc, and write the profile to this JSON file and the report; runs one job at a time",
     )
     parser.add_argument("test", nargs="*", help="process this test")
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    if args.repeat < 1:
+        parser.error("argument --repeat: must be at least 1")
+    if args.order != "name" and not args.history:
+        parser.error(f"argument --order: {args.order} requires --history")
+
+    if not args.file:
+        args.file = [RFC_FILE]
+    if args.no_cache:
+        args.cache = None
+    elif not args.cache and len(args.file) == 1 and os.path.isfile(args.file[0]):
+        if not args.file[0].endswith((".ics", ".json")):
+            args.cache = args.file[0] + CORPUS_SUFFIX
 
-    if not args.url:
-        args.url = os.getenv(ENV_BACKEND_URL)
-    if not args.auth:
-        args.auth = os.getenv(ENV_BACKEND_AUTH)
+    if args.shard and not args.results:
+        args.results = f"shard-{args.shard[0]}-of-{args.shard[1]}{RESULTS_SUFFIX}"
 
+    if args.trace:
+        trace.start()
+    profiler = None
+    if args.memory_profile:
+        if (args.jobs or 1) > 1 or (args.load_processes or 0) > 1:
+            print("Memory profile runs one job at a time", file=sys.stderr)
+        # Phases must run one at a time, in this process.
+        args.jobs = args.load_processes = 1
+        from .memprof import MemoryProfiler
+
+        profiler = MemoryProfiler()
+        trace.profile_memory(profiler)
+    validator = create_validator(args)
     want_tests = set(args.test) if args.test else None
     try:
-        backend = Backend(args.url, args.auth)
-        tests = find_tests(args.file, names=want_tests)
-        run_tests(tests, backend)
+        baseline = load_baseline(args.baseline) if args.baseline else None
+        regressions = 0
+        backends = create_backends(args)
+        try:
+            tests = find_tests(
+                args.file,
+                names=want_tests,
+                cache=args.cache,
+                processes=args.load_processes,
+            )
+            if args.shard:
+                tests = [test for test in tests if in_shard(test.name, args.shard)]
+            history = load_history(args.history) if args.history else {}
+            tests = schedule_tests(tests, history, args.order, backends)
+            reporter = HTMLReporter(backends=[b for b in backends if b is not None])
+            results = ResultsWriter(args.results) if args.results else None
+            try:
+                # Finished tests are released once they are reported.
+                for test in run_tests(
+                    drain(tests),
+                    backends,
+                    jobs=args.jobs or len(backends),
+                    repeat=args.repeat,
+                    validator=validator,
+                    deadline=args.deadline,
+                ):
+                    record = reporter.add(test)
+                    if baseline is not None:
+                        # Exported results are marked, too.
+                        regressions += compare_baseline(
+                            baseline, [record], args.regression_threshold
+                        )
+                    if results:
+                        results.add(reporter.export(test.key))
+            except BaseException:
+                if results:
+                    results.abort()
+                raise
+            if results:
+                results.close()
+            if tests:
+                print(
+                    f"{len(tests)} tests not run after deadline of {args.deadline}s",
+                    file=sys.stderr,
+                )
+        finally:
+            close_backends(backends)
+        records = sorted(reporter.records.values(), key=attrgetter("key"))
+        if args.save_baseline:
+            save_baseline(args.save_baseline, records)
+        if args.history:
+            save_history(args.history, history, records)
+        if profiler:
+            trace.profile_memory(None)
+            reporter.memory_profile = profiler.profile()
+            profiler.stop()
+            with open(args.memory_profile, "w", encoding="utf-8") as file:
+                json.dump(reporter.memory_profile, file, indent=2)
         with open(args.report, "w", encoding="utf-8") as file:
-            HTMLReporter(file).print(tests)
+            reporter.finish(file)
+        if args.trace:
+            with open(args.trace, "w", encoding="utf-8") as file:
+                trace.write(file)
+        print_summary(records)
+    except BackendError as e:
+        print(f"{e}", file=sys.stderr)
+        raise SystemExit(1) from e
     except OSError as e:
         print(f"{e}", file=sys.stderr)
         raise SystemExit from e
+    if regressions:
+        print(f"{regressions} latency regressions", file=sys.stderr)
+        raise SystemExit(1)
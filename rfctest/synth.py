@@ -0,0 +1,334 @@
+"""Generates synthetic iCalendar and JSCalendar example pairs.
+
+Calendars are built from the components and properties of the spec:
+each generated component gets all properties that the spec requires for
+it, plus the optional properties below that the spec allows, with values
+of the value type that the spec defines. The calendar is converted to
+JSCalendar with the reference converter, and recurrence overrides are
+folded into their main event as the draft defines. The same seed and
+sizes always generate the same pair."""
+
+from __future__ import annotations
+
+import datetime
+import json
+import os
+import random
+import uuid
+
+from collections.abc import Iterator, Mapping
+from dataclasses import dataclass
+
+from .jsical import Component, Parameter, Property
+from .refconv import ReferenceConverter
+from .validate import load_spec
+
+# Optional properties of generated components, if the spec allows them
+OPTIONAL_PROPS = {
+    "VCALENDAR": ("CALSCALE",),
+    "VEVENT": (
+        "SUMMARY",
+        "DESCRIPTION",
+        "LOCATION",
+        "CATEGORIES",
+        "CLASS",
+        "PRIORITY",
+        "SEQUENCE",
+        "DURATION",
+    ),
+    "VALARM": (),
+    "VTIMEZONE": (),
+    "STANDARD": ("TZNAME",),
+    "DAYLIGHT": ("TZNAME",),
+}
+
+# Time zones with their standard and daylight saving time rules. Each rule
+# is the UTC offset, name, onset and recurrence rule.
+TIME_ZONES = (
+    (
+        "Europe/Berlin",
+        ("+0100", "CET", "19701025T030000", "FREQ=YEARLY;BYMONTH=10;BYDAY=-1SU"),
+        ("+0200", "CEST", "19700329T020000", "FREQ=YEARLY;BYMONTH=3;BYDAY=-1SU"),
+    ),
+    (
+        "America/New_York",
+        ("-0500", "EST", "19701101T020000", "FREQ=YEARLY;BYMONTH=11;BYDAY=1SU"),
+        ("-0400", "EDT", "19700308T020000", "FREQ=YEARLY;BYMONTH=3;BYDAY=2SU"),
+    ),
+    (
+        "Europe/London",
+        ("+0000", "GMT", "19701025T020000", "FREQ=YEARLY;BYMONTH=10;BYDAY=-1SU"),
+        ("+0100", "BST", "19700329T010000", "FREQ=YEARLY;BYMONTH=3;BYDAY=-1SU"),
+    ),
+    (
+        "America/Los_Angeles",
+        ("-0800", "PST", "19701101T020000", "FREQ=YEARLY;BYMONTH=11;BYDAY=1SU"),
+        ("-0700", "PDT", "19700308T020000", "FREQ=YEARLY;BYMONTH=3;BYDAY=2SU"),
+    ),
+    (
+        "Australia/Sydney",
+        ("+1000", "AEST", "19700405T030000", "FREQ=YEARLY;BYMONTH=4;BYDAY=1SU"),
+        ("+1100", "AEDT", "19701004T020000", "FREQ=YEARLY;BYMONTH=10;BYDAY=1SU"),
+    ),
+    ("Asia/Tokyo", ("+0900", "JST", "19700101T000000", None), None),
+    ("Asia/Kolkata", ("+0530", "IST", "19700101T000000", None), None),
+    ("America/Sao_Paulo", ("-0300", "-03", "19700101T000000", None), None),
+) + tuple(
+    # Fixed offset zones, whose names have the inverted sign of the offset
+    (f"Etc/GMT{-hours:+d}", (f"{hours:+03d}00", None, "19700101T000000", None), None)
+    for hours in range(-12, 15)
+    if hours
+)
+
+WORDS = (
+    "agenda",
+    "budget",
+    "design",
+    "kickoff",
+    "lunch",
+    "planning",
+    "quarterly",
+    "release",
+    "review",
+    "standup",
+    "sync",
+    "team",
+    "training",
+    "workshop",
+)
+
+PARTSTATS = ("ACCEPTED", "DECLINED", "NEEDS-ACTION", "TENTATIVE")
+
+
+@dataclass(frozen=True)
+class Sizes:
+    """The size of a generated calendar."""
+
+    events: int = 10
+    """Number of events"""
+    overrides: int = 0
+    """Number of recurrence overrides per event"""
+    participants: int = 0
+    """Number of participants per event"""
+    alerts: int = 0
+    """Number of alerts per event"""
+    timezones: int = 0
+    """Number of time zones, or 0 for floating date-times"""
+
+
+def _ical_datetime(dt: datetime.datetime, utc=False) -> str:
+    return dt.strftime("%Y%m%dT%H%M%S") + ("Z" if utc else "")
+
+
+class CalendarGenerator:
+    """Generates reproducible calendars of any size."""
+
+    def __init__(self, spec: Mapping = None):
+        if spec is None:
+            spec = load_spec()
+        self.ical = spec["icalendar"]
+        self.converter = ReferenceConverter(spec)
+
+    def _text(self, rng: random.Random) -> str:
+        words = [rng.choice(WORDS) for _ in range(rng.randint(1, 4))]
+        return " ".join(words).capitalize()
+
+    def _value(self, rng: random.Random, comp_name: str, prop_name: str) -> str:
+        """Returns a random value of the type that the spec defines."""
+        prop = self.ical["properties"].get(prop_name) or {}
+        values = prop.get("values")
+        if values:
+            return rng.choice(values)
+        types = prop.get("types") or ("TEXT",)
+        match types[0]:
+            case "INTEGER":
+                return str(rng.randint(0, 9))
+            case "DURATION":
+                return f"PT{rng.choice((15, 30, 45, 60, 90, 120))}M"
+            case "DATE-TIME":
+                start = datetime.datetime(2024, 1, 1)
+                dt = start + datetime.timedelta(minutes=rng.randrange(525600))
+                return _ical_datetime(dt, utc=True)
+            case "CAL-ADDRESS":
+                return f"mailto:{rng.choice(WORDS)}{rng.randrange(1000)}@example.com"
+            case "URI":
+                return f"https://example.com/{rng.choice(WORDS)}"
+            case _:
+                if prop_name == "CALSCALE":
+                    return "GREGORIAN"
+                return self._text(rng)
+
+    def _complete(self, rng: random.Random, comp: Component) -> Component:
+        """Adds the required and optional properties that comp lacks."""
+        spec_props = self.ical["components"][comp.name].get("properties") or {}
+        names = [
+            name for name, prop in spec_props.items() if (prop or {}).get("required")
+        ]
+        names.extend(
+            name
+            for name in OPTIONAL_PROPS.get(comp.name, ())
+            if name in spec_props and rng.random() < 0.75
+        )
+        for name in names:
+            if not comp.has_prop(name):
+                comp.add_prop(Property(name, self._value(rng, comp.name, name)))
+        return comp
+
+    def _timezone(self, rng: random.Random, zone) -> Component:
+        tzid, *rules = zone
+        comp = Component("VTIMEZONE", [Property("TZID", tzid)])
+        offsets = [rule[0] for rule in rules if rule]
+        for name, rule in zip(("STANDARD", "DAYLIGHT"), rules):
+            if not rule:
+                continue
+            offset, tzname, start, rrule = rule
+            # The offset before the onset is the offset of the other rule.
+            offset_from = next((o for o in offsets if o != offset), offset)
+            props = [
+                Property("DTSTART", start),
+                Property("TZOFFSETFROM", offset_from),
+                Property("TZOFFSETTO", offset),
+            ]
+            if rrule:
+                props.append(Property("RRULE", rrule))
+            if tzname:
+                props.append(Property("TZNAME", tzname))
+            comp.add_comp(Component(name, props))
+        return comp
+
+    def _event(
+        self, rng: random.Random, sizes: Sizes, tzid: str
+    ) -> Iterator[Component]:
+        """Yields an event and its recurrence overrides."""
+        uid = str(uuid.UUID(int=rng.getrandbits(128), version=4)).upper()
+        start = datetime.datetime(2024, 1, 1, rng.randint(7, 18)) + datetime.timedelta(
+            days=rng.randrange(365)
+        )
+        params = (Parameter("TZID", tzid),) if tzid else ()
+        dtstamp = self._value(rng, "VEVENT", "DTSTAMP")
+        # Test runs add a DTSTAMP, and an ORGANIZER if there are attendees,
+        # to any event that lacks them, so every event has them already.
+        event = Component(
+            "VEVENT",
+            [
+                Property("UID", uid),
+                Property("DTSTAMP", dtstamp),
+                Property("DTSTART", _ical_datetime(start), params=params),
+            ],
+        )
+        if sizes.participants:
+            name = rng.choice(WORDS)
+            event.add_prop(Property("ORGANIZER", f"mailto:{name}@example.com"))
+        if sizes.overrides:
+            count = 2 * sizes.overrides + 2
+            event.add_prop(Property("RRULE", f"FREQ=WEEKLY;COUNT={count}"))
+        # Participants are told apart by their address, so all differ.
+        for i in rng.sample(range(1000 * len(WORDS)), sizes.participants):
+            name = f"{WORDS[i % len(WORDS)].capitalize()} {i // len(WORDS)}"
+            address = f"mailto:{name.lower().replace(' ', '.')}@example.com"
+            event.add_prop(
+                Property(
+                    "ATTENDEE",
+                    address,
+                    params=(
+                        Parameter("CN", f'"{name}"'),
+                        Parameter("PARTSTAT", rng.choice(PARTSTATS)),
+                    ),
+                )
+            )
+        self._complete(rng, event)
+        for _ in range(sizes.alerts):
+            minutes = rng.choice((5, 10, 15, 30, 60))
+            alarm = Component(
+                "VALARM",
+                [Property("ACTION", "EMAIL"), Property("TRIGGER", f"-PT{minutes}M")],
+            )
+            event.add_comp(self._complete(rng, alarm))
+        yield event
+
+        # Override every other occurrence, starting with the second. An
+        # override keeps the properties of the event, but is moved by an
+        # hour and renamed.
+        rest = [
+            prop
+            for prop in event.props
+            if prop.name not in ("UID", "DTSTAMP", "DTSTART", "RRULE", "SUMMARY")
+        ]
+        for i in range(sizes.overrides):
+            recurid = start + datetime.timedelta(weeks=2 * i + 1)
+            yield Component(
+                "VEVENT",
+                [
+                    Property("UID", uid),
+                    Property("DTSTAMP", dtstamp),
+                    Property("RECURRENCE-ID", _ical_datetime(recurid), params=params),
+                    Property(
+                        "DTSTART",
+                        _ical_datetime(recurid + datetime.timedelta(hours=1)),
+                        params=params,
+                    ),
+                    Property("SUMMARY", self._text(rng)),
+                    *rest,
+                ],
+                comps=list(event.comps),
+            )
+
+    def calendar(self, seed: int, sizes: Sizes) -> Component:
+        """Returns the iCalendar component of a generated calendar."""
+        rng = random.Random(seed)
+        cal = Component(
+            "VCALENDAR",
+            [Property("VERSION", "2.0"), Property("PRODID", "-//rfctest//synth//EN")],
+        )
+        self._complete(rng, cal)
+        zones = TIME_ZONES[: sizes.timezones]
+        for zone in zones:
+            cal.add_comp(self._timezone(rng, zone))
+        for _ in range(sizes.events):
+            tzid = rng.choice(zones)[0] if zones else None
+            for event in self._event(rng, sizes, tzid):
+                cal.add_comp(event)
+        return cal
+
+    def to_jscal(self, cal: Component) -> dict:
+        """Converts a generated calendar to a JSCalendar Group."""
+        group = self.converter.component_to_json(cal)
+        entries = group.get("entries", [])
+        mains = {
+            entry["uid"]: entry
+            for entry in entries
+            if "recurrenceId" not in entry and "recurrenceRules" in entry
+        }
+        folded = []
+        for entry in entries:
+            main = mains.get(entry.get("uid"))
+            if main is None or "recurrenceId" not in entry:
+                folded.append(entry)
+                continue
+            patch = {
+                name: value
+                for name, value in entry.items()
+                if name not in ("@type", "recurrenceId", "recurrenceIdTimeZone")
+                and main.get(name) != value
+            }
+            patch.update((name, None) for name in main if name not in entry)
+            patch.pop("recurrenceOverrides", None)
+            patch.pop("recurrenceRules", None)
+            overrides = main.setdefault("recurrenceOverrides", {})
+            overrides[entry["recurrenceId"]] = patch
+        group["entries"] = folded
+        return group
+
+    def generate(self, seed: int, sizes: Sizes) -> tuple[Component, dict]:
+        """Returns the iCalendar component and JSCalendar Group of a calendar."""
+        cal = self.calendar(seed, sizes)
+        return cal, self.to_jscal(cal)
+
+    def write(self, outdir: str, name: str, seed: int, sizes: Sizes):
+        """Writes a generated example pair as name.ics and name.json."""
+        cal, group = self.generate(seed, sizes)
+        with open(os.path.join(outdir, f"{name}.ics"), "wb") as f:
+            cal.write_ical(f)
+        with open(os.path.join(outdir, f"{name}.json"), "w", encoding="utf-8") as f:
+            json.dump(group, f, indent=2)
+            f.write("\n")
@@ -0,0 +1,144 @@
+"""Records a timeline of a run in the Chrome Trace Event format.
+
+Tracing is off unless started. Spans are recorded by any thread of this
+process, or by worker processes that start tracing themselves and hand
+their spans back with take_events. Each span records the process and
+thread it ran in, so the trace file shows what each worker did when.
+Open the file in a trace viewer such as Perfetto or chrome://tracing.
+
+Spans also delimit the phases of a memory profile, if one is set."""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import threading
+import time
+
+from collections.abc import Iterator
+
+# A recorded span: name, category, start and duration in nanoseconds,
+# process id, thread id, thread name and arguments
+Event = tuple[str, str, int, int, int, int, str, dict]
+
+_tracer: Tracer = None
+
+_profiler = None
+
+_NO_SPAN = contextlib.nullcontext({})
+
+
+class Tracer:
+    """Records spans of the current process."""
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self.start = time.perf_counter_ns()
+        self.events: list[Event] = []
+
+    @contextlib.contextmanager
+    def span(self, name: str, cat: str, args: dict) -> Iterator[dict]:
+        start = time.perf_counter_ns()
+        try:
+            yield args
+        finally:
+            duration = time.perf_counter_ns() - start
+            thread = threading.current_thread()
+            event = (name, cat, start, duration, self.pid, thread.native_id)
+            # Appending to a list is atomic, so threads need no lock.
+            self.events.append((*event, thread.name, args))
+
+
+def start():
+    """Starts tracing in this process, unless it already is tracing."""
+    global _tracer
+    # A forked worker inherits the tracer of its parent.
+    if _tracer is None or _tracer.pid != os.getpid():
+        _tracer = Tracer()
+
+
+def enabled() -> bool:
+    return _tracer is not None
+
+
+def profile_memory(profiler):
+    """Sets the memory profiler that accounts spans as phases, or None.
+
+    The profiler needs enter() and exit(name) methods."""
+    global _profiler
+    _profiler = profiler
+
+
+def span(name: str, cat: str = "run", **args):
+    """Returns a context manager that records a span if tracing.
+
+    The context manager returns the dict of span arguments, to which the
+    traced code may add."""
+    if _profiler is not None:
+        return _profiled_span(_profiler, name, cat, args)
+    if _tracer is None:
+        return _NO_SPAN
+    return _tracer.span(name, cat, args)
+
+
+@contextlib.contextmanager
+def _profiled_span(profiler, name: str, cat: str, args: dict) -> Iterator[dict]:
+    profiler.enter()
+    try:
+        if _tracer is None:
+            yield args
+        else:
+            with _tracer.span(name, cat, args):
+                yield args
+    finally:
+        profiler.exit(name)
+
+
+def take_events() -> list[Event]:
+    """Returns and forgets the spans recorded so far."""
+    events, _tracer.events = _tracer.events, []
+    return events
+
+
+def add_events(events: list[Event]):
+    """Adds spans that another process recorded."""
+    _tracer.events.extend(events)
+
+
+def write(file):
+    """Writes the recorded spans as JSON trace to a text file."""
+    origin = min((e[2] for e in _tracer.events), default=_tracer.start)
+    origin = min(origin, _tracer.start)
+    trace = []
+    threads = {}
+    for name, cat, start, duration, pid, tid, thread, args in _tracer.events:
+        threads[(pid, tid)] = thread
+        trace.append(
+            {
+                "name": name,
+                "cat": cat,
+                "ph": "X",
+                "ts": (start - origin) / 1000,
+                "dur": duration / 1000,
+                "pid": pid,
+                "tid": tid,
+                "args": args,
+            }
+        )
+    for pid in sorted({pid for pid, _ in threads}):
+        name = "rfctest" if pid == _tracer.pid else f"rfctest worker {pid}"
+        trace.append(
+            {"name": "process_name", "ph": "M", "pid": pid, "args": {"name": name}}
+        )
+    for (pid, tid), thread in sorted(threads.items()):
+        trace.append(
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": pid,
+                "tid": tid,
+                "args": {"name": thread},
+            }
+        )
+    json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, file)
@@ -0,0 +1,281 @@
+"""Resolves local date-times in iCalendar and JSCalendar time zones.
+
+Time zone definitions are compiled to a sorted table of UTC offset
+transitions, which are looked up by bisection. Compiled time zones are
+cached by TZID and the digest of their definition, so resolving a local
+time in a time zone that many events share only costs a lookup in that
+table. Time zones that are not defined in the calendar data are looked up
+in the IANA time zone database, if available."""
+
+from __future__ import annotations
+
+import bisect
+import collections
+import datetime
+import functools
+import hashlib
+import re
+import threading
+import zoneinfo
+
+from . import jsoncodec
+from .recur import RecurrenceError, RecurrenceRule, parse_datetime
+
+# Time zone rules are expanded up to this year. The UTC offset of the last
+# transition applies to any later date-time.
+TZ_WINDOW_END_YEAR = 2100
+
+# Number of compiled time zones to keep
+TZ_CACHE_SIZE = 256
+
+
+class TimeZoneError(ValueError):
+    pass
+
+
+def parse_utcoffset(s: str) -> int:
+    """Parses an iCalendar or JSCalendar UTC offset to seconds."""
+    m = re.fullmatch(r"([+-])(\d{2}):?(\d{2})(?::?(\d{2}))?", s.strip())
+    if not m:
+        raise TimeZoneError(f"invalid UTC offset: {s}")
+    secs = int(m.group(2)) * 3600 + int(m.group(3)) * 60 + int(m.group(4) or 0)
+    return -secs if m.group(1) == "-" else secs
+
+
+def _seconds(dt: datetime.datetime) -> int:
+    return dt.toordinal() * 86400 + dt.hour * 3600 + dt.minute * 60 + dt.second
+
+
+def _datetime(secs: int) -> datetime.datetime:
+    days, secs = divmod(secs, 86400)
+    return datetime.datetime.fromordinal(days) + datetime.timedelta(seconds=secs)
+
+
+class TimeZoneIndex:
+    """A compiled time zone.
+
+    Transitions are sorted by the UTC time at which the UTC offset changes.
+    Local times in a gap or overlap of a transition resolve to the UTC
+    offset before the transition, as defined in RFC 5545, Section 3.3.5."""
+
+    def __init__(self, tzid: str, transitions: list[tuple[int, int, int]]):
+        """Transitions are tuples of UTC seconds, offset from and offset to."""
+        self.tzid = tzid
+        transitions = sorted(transitions)
+        self.utc_starts = [utc for utc, _, _ in transitions]
+        self.local_starts = [utc + max(fr, to) for utc, fr, to in transitions]
+        self.offsets = [oto for _, _, oto in transitions]
+        self.initial_offset = transitions[0][1] if transitions else 0
+
+    def utcoffset(self, local: datetime.datetime) -> int:
+        """Returns the UTC offset in seconds at this local time."""
+        i = bisect.bisect_right(self.local_starts, _seconds(local)) - 1
+        return self.offsets[i] if i >= 0 else self.initial_offset
+
+    def to_utc(self, local: datetime.datetime) -> datetime.datetime:
+        return _datetime(_seconds(local) - self.utcoffset(local))
+
+    def from_utc(self, utc: datetime.datetime) -> datetime.datetime:
+        """Returns the local time at this UTC time."""
+        secs = _seconds(utc)
+        i = bisect.bisect_right(self.utc_starts, secs) - 1
+        return _datetime(secs + (self.offsets[i] if i >= 0 else self.initial_offset))
+
+    @classmethod
+    def from_vtimezone(cls, comp) -> TimeZoneIndex:
+        """Compiles an iCalendar VTIMEZONE component."""
+        tzid = comp.get_value("TZID")
+        if not tzid:
+            raise TimeZoneError("VTIMEZONE without TZID")
+        transitions = []
+        for rule in comp.comps:
+            if rule.name not in ("STANDARD", "DAYLIGHT"):
+                continue
+            try:
+                start = parse_datetime(rule.get_value("DTSTART", ""))
+                offset_from = parse_utcoffset(rule.get_value("TZOFFSETFROM", ""))
+                offset_to = parse_utcoffset(rule.get_value("TZOFFSETTO", ""))
+                onsets = {start}
+                for prop in rule.get_props("RDATE"):
+                    onsets.update(parse_datetime(v) for v in prop.value.split(","))
+                for prop in rule.get_props("RRULE"):
+                    rrule = RecurrenceRule.from_ical(prop.value)
+                    onsets.update(_expand_onsets(rrule, start))
+            except RecurrenceError as e:
+                raise TimeZoneError(f"{tzid}: {e}") from e
+            # Onsets are local times in the offset before the transition.
+            transitions.extend(
+                (_seconds(onset) - offset_from, offset_from, offset_to)
+                for onset in onsets
+            )
+        return TimeZoneIndex(tzid, transitions)
+
+    @classmethod
+    def from_json(cls, tzid: str, obj: dict) -> TimeZoneIndex:
+        """Compiles a JSCalendar TimeZone object."""
+        if not isinstance(obj, dict):
+            raise TimeZoneError(f"{tzid}: invalid TimeZone")
+        transitions = []
+        for rule in (obj.get("standard") or []) + (obj.get("daylight") or []):
+            try:
+                start = parse_datetime(rule["start"])
+                offset_from = parse_utcoffset(rule["offsetFrom"])
+                offset_to = parse_utcoffset(rule["offsetTo"])
+                onsets = {start}
+                onsets.update(
+                    parse_datetime(recurid)
+                    for recurid in (rule.get("recurrenceOverrides") or {})
+                )
+                for rrule in rule.get("recurrenceRules") or []:
+                    rrule = RecurrenceRule.from_json(rrule)
+                    onsets.update(_expand_onsets(rrule, start))
+            except (KeyError, TypeError, AttributeError, RecurrenceError) as e:
+                raise TimeZoneError(f"{tzid}: invalid TimeZoneRule: {e}") from e
+            transitions.extend(
+                (_seconds(onset) - offset_from, offset_from, offset_to)
+                for onset in onsets
+            )
+        return TimeZoneIndex(tzid, transitions)
+
+
+def _expand_onsets(rule: RecurrenceRule, start: datetime.datetime):
+    end = datetime.datetime(TZ_WINDOW_END_YEAR, 1, 1)
+    return rule.expand(start, end)
+
+
+class _ZoneInfoIndex:
+    """Adapts a time zone of the IANA time zone database."""
+
+    def __init__(self, tzid: str, zone: zoneinfo.ZoneInfo):
+        self.tzid = tzid
+        self.zone = zone
+
+    def to_utc(self, local: datetime.datetime) -> datetime.datetime:
+        utc = local.replace(tzinfo=self.zone).astimezone(datetime.timezone.utc)
+        return utc.replace(tzinfo=None)
+
+    def from_utc(self, utc: datetime.datetime) -> datetime.datetime:
+        local = utc.replace(tzinfo=datetime.timezone.utc).astimezone(self.zone)
+        return local.replace(tzinfo=None)
+
+
+# Compiled time zones by TZID and digest of their definition, least
+# recently used first
+_compiled: collections.OrderedDict[tuple[str, bytes], TimeZoneIndex] = (
+    collections.OrderedDict()
+)
+_compiled_lock = threading.Lock()
+
+
+def _cached(tzid: str, definition: bytes, compile) -> TimeZoneIndex:
+    key = (tzid, hashlib.sha256(definition).digest())
+    with _compiled_lock:
+        index = _compiled.get(key)
+        if index is not None:
+            _compiled.move_to_end(key)
+            return index
+    index = compile()
+    with _compiled_lock:
+        _compiled[key] = index
+        if len(_compiled) > TZ_CACHE_SIZE:
+            _compiled.popitem(last=False)
+    return index
+
+
+def compile_vtimezone(comp) -> TimeZoneIndex:
+    """Returns the cached compiled VTIMEZONE component."""
+    return _cached(
+        comp.get_value("TZID"),
+        comp.format().encode("utf-8", "surrogatepass"),
+        lambda: TimeZoneIndex.from_vtimezone(comp),
+    )
+
+
+def compile_json(tzid: str, obj: dict) -> TimeZoneIndex:
+    """Returns the cached compiled JSCalendar TimeZone object."""
+    return _cached(
+        tzid,
+        jsoncodec.dumps(obj, sort_keys=True),
+        lambda: TimeZoneIndex.from_json(tzid, obj),
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _zoneinfo_names() -> dict[str, str]:
+    return {name.casefold(): name for name in zoneinfo.available_timezones()}
+
+
+@functools.lru_cache(maxsize=None)
+def _zoneinfo(tzid: str):
+    # Normalized iCalendar parameter values are upper case.
+    name = _zoneinfo_names().get(tzid.casefold())
+    if not name:
+        return None
+    try:
+        return _ZoneInfoIndex(name, zoneinfo.ZoneInfo(name))
+    except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+        return None
+
+
+class TimeZoneResolver:
+    """Resolves local date-times in the time zones of a calendar object."""
+
+    def __init__(self, definitions: dict[str, object] = None):
+        self.definitions = {
+            tzid.casefold(): definition
+            for tzid, definition in (definitions or {}).items()
+        }
+        self.indexes = {}
+
+    @classmethod
+    def from_component(cls, comp) -> TimeZoneResolver:
+        """Uses the VTIMEZONE subcomponents of an iCalendar component."""
+        definitions = {}
+        for _, tzcomp in comp.comp_index.get("VTIMEZONE", []):
+            tzid = tzcomp.get_value("TZID")
+            if tzid:
+                definitions[tzid] = tzcomp
+        return TimeZoneResolver(definitions)
+
+    @classmethod
+    def from_json(cls, obj: dict) -> TimeZoneResolver:
+        """Uses the timeZones property of a JSCalendar object."""
+        tzs = obj.get("timeZones")
+        return TimeZoneResolver(tzs if isinstance(tzs, dict) else {})
+
+    def get(self, tzid: str):
+        """Returns the compiled time zone, or None if it is unknown."""
+        try:
+            return self.indexes[tzid]
+        except KeyError:
+            pass
+        name = tzid.strip('"')
+        definition = self.definitions.get(name.casefold())
+        index = None
+        try:
+            if isinstance(definition, dict):
+                index = compile_json(name, definition)
+            elif definition is not None:
+                index = compile_vtimezone(definition)
+        except TimeZoneError:
+            index = None
+        if index is None and definition is None:
+            index = _zoneinfo(name)
+        self.indexes[tzid] = index
+        return index
+
+    def to_utc(self, value: str, tzid: str = None) -> datetime.datetime:
+        """Returns the UTC time of a date-time value.
+
+        Value is an iCalendar DATE-TIME or JSCalendar date-time. Returns
+        None for floating date-times and unknown time zones."""
+        try:
+            dt = parse_datetime(value)
+        except RecurrenceError:
+            return None
+        if value.strip().endswith("Z"):
+            return dt
+        if not tzid or not isinstance(tzid, str):
+            return None
+        index = self.get(tzid)
+        return index.to_utc(dt) if index else None
@@ -0,0 +1,142 @@
+"""Validates iCalendar components against the conversion spec.
+
+The spec is compiled once into per-component tables of allowed and
+required properties, allowed subcomponents and allowed parameters. A
+component tree is then validated in a single pass, which only looks up
+the distinct property and component names of each component."""
+
+from __future__ import annotations
+
+import importlib.util
+import os
+import sys
+
+from collections.abc import Iterator, Mapping
+from dataclasses import dataclass
+
+SPEC_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "spec"
+)
+"""Directory of the spec and its model in this source tree"""
+SPEC_FILE = os.path.join(SPEC_DIR, "spec.yaml")
+
+# Module name of the spec model, which is private to this package
+_SPECMODEL = f"{__package__}._specmodel"
+
+# Properties that any component may have, as defined by this document
+GENERIC_PROPS = frozenset(("JSID", "JSPROP"))
+
+# Parameters that any property may have
+GENERIC_PARAMS = frozenset(("VALUE", "JSID"))
+
+# Stop validating after this many issues.
+MAX_ISSUES = 100
+
+
+def _is_extension(name: str) -> bool:
+    return name.startswith("X-")
+
+
+@dataclass(frozen=True)
+class _ComponentRule:
+    props: frozenset[str]
+    required: tuple[str, ...]
+    comps: frozenset[str]
+
+
+class Validator:
+    """Validates iCalendar components against the spec."""
+
+    def __init__(self, spec: Mapping):
+        """Compiles the icalendar section of the spec data."""
+        ical = spec["icalendar"]
+        self.rules = {}
+        for name, comp in ical["components"].items():
+            props = comp.get("properties") or {}
+            self.rules[name] = _ComponentRule(
+                props=frozenset(props) | GENERIC_PROPS,
+                required=tuple(
+                    sorted(p for p, v in props.items() if (v or {}).get("required"))
+                ),
+                comps=frozenset(comp.get("components") or {}),
+            )
+        self.params = {
+            name: frozenset((prop or {}).get("parameters") or {}) | GENERIC_PARAMS
+            for name, prop in ical["properties"].items()
+        }
+
+    def issues(self, comp) -> Iterator[str]:
+        """Yields the issues of a component and all its subcomponents.
+
+        Issues start with the path of component names to the component,
+        so the same issue of equally structured components is equal."""
+        stack = [(comp, comp.name)]
+        while stack:
+            comp, path = stack.pop()
+            rule = self.rules.get(comp.name)
+            if rule is None:
+                if not _is_extension(comp.name):
+                    yield f"{path}: unknown component"
+                continue
+            for name in rule.required:
+                if name not in comp.prop_index:
+                    yield f"{path}: missing required property {name}"
+            for name, props in comp.prop_index.items():
+                if name not in rule.props:
+                    if not _is_extension(name):
+                        yield f"{path}: unexpected property {name}"
+                    continue
+                allowed = self.params.get(name)
+                if allowed is None:
+                    continue
+                for _, prop in props:
+                    for param in prop.params:
+                        if param.name not in allowed and not _is_extension(param.name):
+                            yield f"{path}: unexpected parameter {param.name} of {name}"
+            for name, comps in comp.comp_index.items():
+                if name not in rule.comps and not _is_extension(name):
+                    yield f"{path}: unexpected component {name}"
+                    continue
+                subpath = f"{path}/{name}"
+                stack.extend((subcomp, subpath) for _, subcomp in reversed(comps))
+
+    def validate(self, comp, limit=MAX_ISSUES) -> list[str]:
+        """Returns up to limit distinct issues of a component tree."""
+        issues = {}
+        for issue in self.issues(comp):
+            issues[issue] = None
+            if len(issues) >= limit:
+                break
+        return list(issues)
+
+
+def load_spec(fname: str = SPEC_FILE) -> Mapping:
+    """Returns the read-only spec data in this file.
+
+    The spec is loaded with the spec model in the spec directory of this
+    source tree, never with code next to the file."""
+    specmodel = sys.modules.get(_SPECMODEL)
+    if specmodel is None:
+        modfile = os.path.join(SPEC_DIR, "specmodel.py")
+        modspec = importlib.util.spec_from_file_location(_SPECMODEL, modfile)
+        if modspec is None:
+            raise ImportError(f"cannot load {modfile}")
+        specmodel = importlib.util.module_from_spec(modspec)
+        sys.modules[_SPECMODEL] = specmodel
+        try:
+            modspec.loader.exec_module(specmodel)
+        except BaseException:
+            del sys.modules[_SPECMODEL]
+            raise
+    return specmodel.load(fname).data
+
+
+def spec_errors() -> tuple[type[Exception], ...]:
+    """Returns the exceptions that load_spec raises for a missing or
+    malformed spec.
+
+    YAML errors are only included once PyYAML was imported to parse a spec."""
+    yaml = sys.modules.get("yaml")
+    if yaml is None:
+        return (OSError, ImportError)
+    return (OSError, ImportError, yaml.YAMLError)
@@ -0,0 +1,300 @@
+"""Renders the templates in xmlsrc from the spec.
+
+Every output records the templates it was rendered from and the parts of
+the spec it read. An output is only rendered again if any of these have
+changed since the last build, and only rewritten if its content changed."""
+
+import argparse
+import functools
+import hashlib
+import json
+import os
+import sys
+
+from collections.abc import Callable, Mapping
+
+from jinja2 import (
+    Environment,
+    FileSystemBytecodeCache,
+    FileSystemLoader,
+    TemplateError,
+    meta,
+)
+
+import specmodel
+
+SPEC_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMPLATE_DIR = os.path.join(SPEC_DIR, "xmlsrc")
+OUTPUT_DIR = os.path.join(SPEC_DIR, "build")
+MANIFEST_FILE = ".manifest.json"
+BYTECODE_DIR = ".jinja"
+
+# Bump when the manifest format changes.
+MANIFEST_VERSION = 1
+
+
+def _json_default(obj):
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _digest(value) -> str:
+    s = json.dumps(value, default=_json_default, sort_keys=True)
+    return hashlib.sha256(s.encode("utf-8")).hexdigest()
+
+
+def environment(bytecode_dir=None) -> Environment:
+    """Returns the Jinja environment for the templates in xmlsrc."""
+    env = Environment(
+        loader=FileSystemLoader(TEMPLATE_DIR),
+        bytecode_cache=FileSystemBytecodeCache(bytecode_dir) if bytecode_dir else None,
+    )
+    # The spec data is read-only and consists of mappings, not dicts.
+    env.policies["json.dumps_function"] = lambda obj, **kwargs: json.dumps(
+        obj, default=_json_default, **kwargs
+    )
+    return env
+
+
+class SpecRecorder(Mapping):
+    """A view of the spec data that records which parts are read.
+
+    Dependencies map a path in the spec to the digest of its value, or
+    of its keys if only the keys of a mapping were read."""
+
+    def __init__(self, data: Mapping, path: tuple[str, ...], deps: dict[str, str]):
+        self._data = data
+        self._path = path
+        self._deps = deps
+
+    def _record_keys(self):
+        key = json.dumps(["keys", *self._path])
+        if key not in self._deps:
+            self._deps[key] = _digest(list(self._data))
+
+    def __getitem__(self, name):
+        try:
+            value = self._data[name]
+        except KeyError:
+            self._record_keys()
+            raise
+        path = (*self._path, name)
+        if isinstance(value, Mapping):
+            return SpecRecorder(value, path, self._deps)
+        self._deps[json.dumps(["value", *path])] = _digest(value)
+        return value
+
+    def __iter__(self):
+        self._record_keys()
+        return iter(self._data)
+
+    def __len__(self):
+        self._record_keys()
+        return len(self._data)
+
+    def __contains__(self, name):
+        self._record_keys()
+        return name in self._data
+
+
+def _resolve(data: Mapping, path: list[str]):
+    for name in path:
+        if not isinstance(data, Mapping) or name not in data:
+            return None
+        data = data[name]
+    return data
+
+
+def deps_changed(deps: dict[str, str], data: Mapping, digests: dict) -> bool:
+    """Returns true if any recorded part of the spec data has changed.
+
+    The digests of the current spec data are memoized in digests."""
+    for key, digest in deps.items():
+        try:
+            current = digests[key]
+        except KeyError:
+            kind, *path = json.loads(key)
+            value = _resolve(data, path)
+            if kind == "keys":
+                value = list(value) if isinstance(value, Mapping) else None
+            current = digests[key] = _digest(value)
+        if current != digest:
+            return True
+    return False
+
+
+@functools.lru_cache(maxsize=None)
+def template_digests(env: Environment, name: str) -> dict[str, str]:
+    """Returns the digests of a template and the templates it references."""
+    digests = {}
+    pending = [name]
+    while pending:
+        name = pending.pop()
+        if name in digests:
+            continue
+        source, _, _ = env.loader.get_source(env, name)
+        digests[name] = hashlib.sha256(source.encode("utf-8")).hexdigest()
+        pending.extend(
+            ref
+            for ref in meta.find_referenced_templates(env.parse(source))
+            if ref is not None
+        )
+    return digests
+
+
+def targets(data: Mapping) -> list[tuple[str, str, Callable]]:
+    """Returns the outputs with their template and context function.
+
+    The context function is called with the spec data to render."""
+
+    def objprops(spec, name):
+        return [
+            dict(prop, name=prop_name)
+            for prop_name, prop in spec["jscalendar"]["properties"].items()
+            if name in prop["objects"]
+        ]
+
+    def js2ical(name):
+        return lambda spec: {
+            "spec": spec,
+            "anchor": f"jscal-{name.lower()}",
+            "title": name,
+            "objprops": objprops(spec, name),
+        }
+
+    l = [
+        (
+            "inconvertible.xml",
+            "inconvertible.xml",
+            lambda spec: {
+                "spec": spec,
+                "props": specmodel.inconvertible_properties(spec),
+            },
+        ),
+        ("comptables.xml", "comptables.xml", lambda spec: {"spec": spec}),
+        (
+            "main.xml",
+            "main.xml",
+            lambda spec: {
+                "spec": spec,
+                "conv_props": specmodel.converted_properties(spec),
+            },
+        ),
+    ]
+    for name in sorted(data["jscalendar"]["properties"]["@type"]["objects"]):
+        l.append((f"js2ical-{name}.xml", "js2ical.xml", js2ical(name)))
+    return l
+
+
+def load_manifest(fname: str) -> dict:
+    try:
+        with open(fname, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") == MANIFEST_VERSION:
+            return manifest["outputs"]
+    except (OSError, ValueError, KeyError, AttributeError):
+        pass
+    return {}
+
+
+def save_manifest(fname: str, outputs: dict):
+    tmpname = f"{fname}.{os.getpid()}.tmp"
+    with open(tmpname, "w", encoding="utf-8") as f:
+        json.dump({"version": MANIFEST_VERSION, "outputs": outputs}, f, indent=1)
+    os.replace(tmpname, fname)
+
+
+def build(outdir=OUTPUT_DIR, force=False, verbose=False) -> tuple[int, int, int, int]:
+    """Renders all outputs whose inputs changed.
+
+    Returns the number of rewritten, unchanged, skipped and failed
+    outputs. Failed outputs are reported on stderr."""
+    os.makedirs(os.path.join(outdir, BYTECODE_DIR), exist_ok=True)
+    spec = specmodel.load(os.path.join(SPEC_DIR, "spec.yaml"))
+    env = environment(os.path.join(outdir, BYTECODE_DIR))
+    manifest_file = os.path.join(outdir, MANIFEST_FILE)
+    manifest = load_manifest(manifest_file)
+
+    written = unchanged = skipped = failed = 0
+    outputs = {}
+    digests = {}
+    for output, template, context in targets(spec.data):
+        fname = os.path.join(outdir, output)
+        templates = template_digests(env, template)
+        entry = manifest.get(output)
+        if (
+            not force
+            and entry
+            and entry["templates"] == templates
+            and os.path.exists(fname)
+            and not deps_changed(entry["deps"], spec.data, digests)
+        ):
+            outputs[output] = entry
+            skipped += 1
+            continue
+
+        deps = {}
+        try:
+            text = env.get_template(template).render(
+                context(SpecRecorder(spec.data, (), deps))
+            )
+        except TemplateError as e:
+            print(f"{output}: {e}", file=sys.stderr)
+            failed += 1
+            continue
+        outputs[output] = {"templates": templates, "deps": deps}
+        try:
+            with open(fname, "r", encoding="utf-8") as f:
+                if f.read() == text:
+                    unchanged += 1
+                    continue
+        except OSError:
+            pass
+        with open(fname, "w", encoding="utf-8") as f:
+            f.write(text)
+        written += 1
+        if verbose:
+            print(f"Wrote {fname}", file=sys.stderr)
+
+    save_manifest(manifest_file, outputs)
+    return written, unchanged, skipped, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Renders the XML sources from the spec.",
+    )
+    parser.add_argument(
+        "-o",
+        "--output-dir",
+        help="The directory to write the rendered files to",
+        default=OUTPUT_DIR,
+    )
+    parser.add_argument(
+        "--force",
+        help="Render all files, even if their inputs did not change",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-v", "--verbose", help="Print the names of written files", action="store_true"
+    )
+    args = parser.parse_args()
+
+    try:
+        written, unchanged, skipped, failed = build(
+            args.output_dir, args.force, args.verbose
+        )
+    except OSError as e:
+        raise SystemExit(e)
+    print(
+        f"{written} written, {unchanged} unchanged, {skipped} up to date, "
+        f"{failed} failed",
+        file=sys.stderr,
+    )
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
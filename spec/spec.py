@@ -1,4 +1,3 @@
-import yaml
 import os
 import pprint
 
@@ -6,26 +5,14 @@ from collections import defaultdict
 
 from jinja2 import Environment, FileSystemLoader
 
+import specmodel
+
 
 def load(fname="spec.yaml"):
-    with open(fname, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f)
+    return specmodel.load(fname)
 
 def inconvprops(s):
-    props = []
-    for prop_name, prop in s["icalendar"]["properties"].items():
-        prop["name"] = prop_name
-        params = []
-        for param_name, param in prop["parameters"].items():
-            if not "convert" in param:
-                param = s["icalendar"]["parameters"][param_name]
-                param["name"] = param_name
-                params.append(param)
-        if len(params) > 0:
-            prop["parameters"] = params
-            props.append(prop)
-    props.sort(key=lambda p: p["name"])
-    return props
+    return s.inconvertible_properties()
 
 
 def main():
@@ -33,7 +20,7 @@ def main():
     env = Environment(loader=FileSystemLoader("xmlsrc"))
     template = env.get_template("inconvertible.xml")
     #pprint.pp(inconvprops(spec))
-    print(template.render({"spec": spec, "props": inconvprops(spec) }))
+    print(template.render({"spec": spec.data, "props": inconvprops(spec) }))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,279 @@
+"""Read-only model of the conversion specification in spec.yaml.
+
+The YAML file is parsed once and the compiled model is cached as JSON
+next to it, keyed by the hash of the YAML file. The model data is read-only, so
+the same model can be shared by any template or tool."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+
+from collections import defaultdict
+from dataclasses import dataclass
+from types import MappingProxyType
+
+SPEC_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "spec.yaml")
+
+CACHE_SUFFIX = ".cache"
+
+# Bump when the compiled model changes.
+MODEL_VERSION = 1
+
+
+@dataclass(frozen=True)
+class Conversion:
+    """An iCalendar element and the JSCalendar element it converts to."""
+
+    kind: str
+    """One of component, property or parameter"""
+    name: str
+    """Name of the iCalendar element"""
+    parent: str
+    """Name of the enclosing component or property, or empty"""
+    property: str = None
+    """Name of the JSCalendar property"""
+    object: str = None
+    """Type of the JSCalendar object"""
+    note: str = None
+
+
+def _freeze(data):
+    if isinstance(data, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in data.items()})
+    if isinstance(data, list):
+        return tuple(_freeze(v) for v in data)
+    return data
+
+
+def _sorted(index: dict[str, set]) -> dict[str, tuple[str, ...]]:
+    return {name: tuple(sorted(names)) for name, names in sorted(index.items())}
+
+
+class Spec:
+    """The conversion specification and its reverse indexes."""
+
+    def __init__(self, data: dict):
+        self.data = _freeze(data)
+        ical = data.get("icalendar", {})
+
+        param_props = defaultdict(set)
+        for prop_name, prop in ical.get("properties", {}).items():
+            for param_name in (prop or {}).get("parameters") or {}:
+                param_props[param_name].add(prop_name)
+        self._param_props = _sorted(param_props)
+
+        prop_comps = defaultdict(set)
+        comp_parents = defaultdict(set)
+        for comp_name, comp in ical.get("components", {}).items():
+            for prop_name in (comp or {}).get("properties") or {}:
+                prop_comps[prop_name].add(comp_name)
+            for subcomp_name in (comp or {}).get("components") or {}:
+                comp_parents[subcomp_name].add(comp_name)
+        self._prop_comps = _sorted(prop_comps)
+        self._comp_parents = _sorted(comp_parents)
+
+        conversions = defaultdict(list)
+
+        def add_conversion(kind, name, parent, elem):
+            convert = (elem or {}).get("convert")
+            if isinstance(convert, dict):
+                for target in convert_targets(convert):
+                    conversions[(kind, name)].append(
+                        (
+                            kind,
+                            name,
+                            parent,
+                            target,
+                            convert.get("object"),
+                            convert.get("note"),
+                        )
+                    )
+
+        for comp_name, comp in ical.get("components", {}).items():
+            add_conversion("component", comp_name, "", comp)
+            for prop_name, prop in ((comp or {}).get("properties") or {}).items():
+                add_conversion("property", prop_name, comp_name, prop)
+            for subcomp_name, subcomp in ((comp or {}).get("components") or {}).items():
+                add_conversion("component", subcomp_name, comp_name, subcomp)
+        for prop_name, prop in ical.get("properties", {}).items():
+            for param_name, param in ((prop or {}).get("parameters") or {}).items():
+                add_conversion("parameter", param_name, prop_name, param)
+        self._conversions = {k: tuple(v) for k, v in conversions.items()}
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def to_json(self) -> dict:
+        """Returns the compiled model as JSON data."""
+        return {
+            "data": _thaw(self.data),
+            "param_props": self._param_props,
+            "prop_comps": self._prop_comps,
+            "comp_parents": self._comp_parents,
+            "conversions": [
+                [list(key), [list(conv) for conv in convs]]
+                for key, convs in self._conversions.items()
+            ],
+        }
+
+    @classmethod
+    def from_json(cls, state: dict) -> Spec:
+        """Returns the model of JSON data from to_json.
+
+        Raises KeyError, TypeError or ValueError if state is malformed."""
+        spec = Spec.__new__(Spec)
+        spec.data = _freeze(state["data"])
+        spec._param_props = _tuples(state["param_props"])
+        spec._prop_comps = _tuples(state["prop_comps"])
+        spec._comp_parents = _tuples(state["comp_parents"])
+        spec._conversions = {
+            tuple(key): tuple(tuple(conv) for conv in convs)
+            for key, convs in state["conversions"]
+        }
+        return spec
+
+    @property
+    def icalendar(self):
+        return self.data["icalendar"]
+
+    @property
+    def jscalendar(self):
+        return self.data["jscalendar"]
+
+    def ical_component(self, name: str):
+        return self.icalendar["components"].get(name)
+
+    def ical_property(self, name: str):
+        return self.icalendar["properties"].get(name)
+
+    def ical_parameter(self, name: str):
+        return self.icalendar["parameters"].get(name)
+
+    def jscal_type(self, name: str):
+        return self.jscalendar["types"].get(name)
+
+    def jscal_property(self, name: str):
+        return self.jscalendar["properties"].get(name)
+
+    def properties_with_parameter(self, name: str) -> tuple[str, ...]:
+        """Returns the names of the properties that define this parameter."""
+        return self._param_props.get(name, ())
+
+    def components_with_property(self, name: str) -> tuple[str, ...]:
+        """Returns the names of the components that define this property."""
+        return self._prop_comps.get(name, ())
+
+    def parent_components(self, name: str) -> tuple[str, ...]:
+        """Returns the names of the components that contain this component."""
+        return self._comp_parents.get(name, ())
+
+    def conversions(self, kind: str, name: str) -> tuple[Conversion, ...]:
+        """Returns the JSCalendar conversion targets of an iCalendar element.
+
+        Kind is one of component, property or parameter."""
+        return tuple(
+            Conversion(*conv) for conv in self._conversions.get((kind, name), ())
+        )
+
+    def inconvertible_properties(self) -> list[dict]:
+        """Returns the properties that have parameters without conversion."""
+        return inconvertible_properties(self.data)
+
+
+def inconvertible_properties(data) -> list[dict]:
+    """Returns the properties that have parameters without conversion.
+
+    Each property is a new dict with its name, and its parameters as a
+    list of the parameter definitions, each with its name."""
+    props = []
+    params = data["icalendar"]["parameters"]
+    for prop_name, prop in sorted(data["icalendar"]["properties"].items()):
+        inconv = [
+            dict(params[param_name], name=param_name)
+            for param_name, param in (prop.get("parameters") or {}).items()
+            if "convert" not in param
+        ]
+        if inconv:
+            props.append(dict(prop, name=prop_name, parameters=inconv))
+    return props
+
+
+def convert_targets(convert: dict) -> list[str | None]:
+    """Returns the JSCalendar properties of a convert definition.
+
+    A definition may name several properties, separated by commas. The
+    list contains None if the definition names no property."""
+    prop = convert.get("property")
+    if not prop:
+        return [None]
+    return re.split(r",\s*", prop)
+
+
+def converted_properties(data) -> dict[str, dict[str, dict]]:
+    """Returns the JSCalendar properties each iCalendar property converts to.
+
+    Each JSCalendar property maps to a dict with the names of the
+    components in which the iCalendar property converts to it, and the
+    type of the JSCalendar object it converts to, if any."""
+    props = {prop_name: {} for prop_name in data["icalendar"]["properties"]}
+    for comp_name, comp in data["icalendar"]["components"].items():
+        for prop_name, prop in (comp.get("properties") or {}).items():
+            convert = (prop or {}).get("convert")
+            if not convert or prop_name not in props:
+                continue
+            for target_name in convert_targets(convert):
+                target = props[prop_name].setdefault(
+                    target_name, {"comps": [], "object": convert.get("object")}
+                )
+                target["comps"].append(comp_name)
+    return props
+
+
+def _tuples(index: dict[str, list]) -> dict[str, tuple[str, ...]]:
+    return {name: tuple(names) for name, names in index.items()}
+
+
+def _thaw(data):
+    if isinstance(data, MappingProxyType):
+        return {k: _thaw(v) for k, v in data.items()}
+    if isinstance(data, tuple):
+        return [_thaw(v) for v in data]
+    return data
+
+
+def _yaml_load(data: bytes) -> dict:
+    import yaml
+
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    return yaml.load(data, Loader=loader)
+
+
+def load(fname=SPEC_FILE, cache=True) -> Spec:
+    """Loads the spec from a YAML file, or from its cached compiled model."""
+    with open(fname, "rb") as f:
+        data = f.read()
+    key = hashlib.sha256(data).hexdigest()
+    cache_file = fname + CACHE_SUFFIX
+    if cache:
+        try:
+            with open(cache_file, "rb") as f:
+                cached = json.load(f)
+            if cached["version"] == MODEL_VERSION and cached["key"] == key:
+                return Spec.from_json(cached["state"])
+        except (OSError, KeyError, ValueError, TypeError):
+            pass
+    spec = Spec(_yaml_load(data))
+    if cache:
+        tmpname = f"{cache_file}.{os.getpid()}.tmp"
+        try:
+            with open(tmpname, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"version": MODEL_VERSION, "key": key, "state": spec.to_json()}, f
+                )
+            os.replace(tmpname, cache_file)
+        except OSError:
+            pass
+    return spec
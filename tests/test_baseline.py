@@ -0,0 +1,86 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from rfctest import rfctest
+
+ICAL = "BEGIN:VEVENT\r\nUID:1\r\nSUMMARY:Lunch\r\nEND:VEVENT\r\n"
+JSCAL = {"@type": "Event", "uid": "1", "title": "Lunch"}
+
+
+class Converter:
+    """Converts any data to the example."""
+
+    def to_jgroup(self, ical: bytes):
+        return {"@type": "Group", "entries": [JSCAL]}
+
+    def to_ical(self, jscal: dict):
+        return "BEGIN:VCALENDAR\r\n" + ICAL + "END:VCALENDAR\r\n"
+
+
+def record(name: str, i2j: float, j2i: float = None) -> rfctest.TestRecord:
+    return rfctest.TestRecord(
+        name, rfctest.ResultRecord("success", i2j), rfctest.ResultRecord("error", j2i)
+    )
+
+
+class BaselineTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.fname = os.path.join(self.dir.name, "baseline.json")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_save_and_compare(self):
+        rfctest.save_baseline(self.fname, [record("a", 0.010, 0.020), record("b", 0.1)])
+        baseline = rfctest.load_baseline(self.fname)
+        self.assertEqual(baseline, {"a": {"i2j": 0.010}, "b": {"i2j": 0.1}})
+
+        records = [record("a", 0.013), record("b", 0.11), record("c", 1.0)]
+        with contextlib.redirect_stderr(io.StringIO()):
+            self.assertEqual(rfctest.compare_baseline(baseline, records, 20.0), 1)
+        self.assertEqual(records[0].i2jresult.baseline, 0.010)
+        self.assertIsNone(records[1].i2jresult.baseline)
+        self.assertIsNone(records[2].i2jresult.baseline)
+
+    def test_unsupported(self):
+        with open(self.fname, "w") as f:
+            json.dump({"version": 0, "tests": {}}, f)
+        with self.assertRaises(OSError):
+            rfctest.load_baseline(self.fname)
+
+    def test_shard_results_are_marked(self):
+        with open(os.path.join(self.dir.name, "lunch.ics"), "w") as f:
+            f.write(ICAL)
+        with open(os.path.join(self.dir.name, "lunch.json"), "w") as f:
+            json.dump(JSCAL, f)
+        with open(self.fname, "w") as f:
+            json.dump({"version": 1, "tests": {"lunch": {"i2j": 1e-9}}}, f)
+        results = os.path.join(self.dir.name, "shard.results")
+        argv = [
+            *("-f", os.path.join(self.dir.name, "*.ics")),
+            *("--backend", f"{__name__}:Converter", "--backend-processes", "1"),
+            *("--baseline", self.fname, "--results", results),
+            *("-o", os.path.join(self.dir.name, "report.html"), "--no-cache"),
+        ]
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(out):
+            with self.assertRaises(SystemExit) as cm:
+                rfctest.main(argv)
+        self.assertEqual(cm.exception.code, 1, out.getvalue())
+        (reported,) = rfctest.load_results(results)
+        self.assertEqual(reported.record.i2jresult.baseline, 1e-9)
+
+        report = os.path.join(self.dir.name, "merged.html")
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(out):
+            with self.assertRaises(SystemExit) as cm:
+                rfctest.merge_main(["-o", report, results])
+        self.assertEqual(cm.exception.code, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
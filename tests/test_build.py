@@ -0,0 +1,50 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "spec"))
+
+import build  # noqa: E402
+
+DATA = {"a": {"b": 1, "c": {"d": 2}}, "e": [3]}
+
+
+class RecorderTest(unittest.TestCase):
+    def record(self, read) -> dict:
+        deps = {}
+        read(build.SpecRecorder(DATA, (), deps))
+        return deps
+
+    def test_value(self):
+        deps = self.record(lambda spec: spec["a"]["b"])
+        self.assertFalse(build.deps_changed(deps, DATA, {}))
+        self.assertTrue(build.deps_changed(deps, {"a": {"b": 2}}, {}))
+        # Only the value that was read matters.
+        self.assertFalse(build.deps_changed(deps, {"a": {"b": 1}}, {}))
+
+    def test_keys(self):
+        deps = self.record(lambda spec: list(spec["a"]))
+        self.assertFalse(build.deps_changed(deps, {"a": {"b": 0, "c": 0}}, {}))
+        self.assertTrue(build.deps_changed(deps, {"a": {"b": 1}}, {}))
+
+    def test_missing(self):
+        deps = self.record(lambda spec: spec["a"].get("x"))
+        self.assertFalse(build.deps_changed(deps, {"a": {"b": 0, "c": 0}}, {}))
+        self.assertTrue(build.deps_changed(deps, {"a": {"x": 1}}, {}))
+
+
+class BuildTest(unittest.TestCase):
+    def test_incremental(self):
+        with tempfile.TemporaryDirectory() as outdir:
+            written, unchanged, skipped, failed = build.build(outdir)
+            self.assertGreater(written, 0)
+            self.assertEqual((unchanged, skipped, failed), (0, 0, 0))
+            self.assertEqual(build.build(outdir), (0, 0, written, 0))
+            os.remove(os.path.join(outdir, "main.xml"))
+            self.assertEqual(build.build(outdir), (1, 0, written - 1, 0))
+            self.assertEqual(build.build(outdir, force=True), (0, written, 0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+
+from rfctest.jsical import Component, Property
+
+ICAL = (
+    "BEGIN:VEVENT\r\n"
+    "UID:1\r\n"
+    "ATTENDEE:mailto:a@example.com\r\n"
+    "SUMMARY:Lunch\r\n"
+    "ATTENDEE:mailto:b@example.com\r\n"
+    "BEGIN:VALARM\r\n"
+    "TRIGGER:-PT5M\r\n"
+    "END:VALARM\r\n"
+    "END:VEVENT\r\n"
+)
+
+
+class ComponentIndexTest(unittest.TestCase):
+    def test_parse(self):
+        comp = Component.parse(ICAL)
+        self.assertEqual(
+            [i for i, _ in comp.prop_index["ATTENDEE"]],
+            [1, 3],
+        )
+        self.assertEqual(
+            [prop.value for prop in comp.get_props("ATTENDEE")],
+            ["mailto:a@example.com", "mailto:b@example.com"],
+        )
+        self.assertEqual(comp.get_value("SUMMARY"), "Lunch")
+        self.assertEqual(comp.get_value("LOCATION", "none"), "none")
+        self.assertTrue(comp.has_comp("VALARM"))
+        self.assertFalse(comp.has_prop("LOCATION"))
+
+    def test_build(self):
+        comp = Component("VEVENT", props=[Property("UID", "1")])
+        comp.add_prop(Property("uid", "2"))
+        comp.add_comp(Component("valarm"))
+        self.assertEqual([prop.value for prop in comp.get_props("UID")], ["1", "2"])
+        self.assertEqual(comp.comp_index, {"VALARM": [(0, comp.comps[0])]})
+
+    def test_derived(self):
+        comp = Component.parse(ICAL).normalized().with_default_props()
+        for name, props in comp.prop_index.items():
+            self.assertEqual(props, [(i, comp.props[i]) for i, _ in props])
+            self.assertTrue(all(prop.name == name for _, prop in props))
+        self.assertEqual(len(comp.props), sum(map(len, comp.prop_index.values())))
+
+
+if __name__ == "__main__":
+    unittest.main()
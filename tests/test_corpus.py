@@ -0,0 +1,53 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from rfctest import rfctest
+
+ICAL = "BEGIN:VEVENT\r\nUID:{name}\r\nEND:VEVENT\r\n"
+JSCAL = '{{"@type": "Event", "uid": "{name}"}}'
+
+
+def make_test(name: str) -> rfctest.Test:
+    return rfctest.Test(name, ICAL.format(name=name), JSCAL.format(name=name))
+
+
+class CorpusTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.corpus = rfctest.Corpus(os.path.join(self.dir.name, "tests.corpus"))
+        self.corpus.save("key", [make_test("b"), make_test("a")])
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_load(self):
+        tests = self.corpus.load("key")
+        self.assertEqual([test.name for test in tests], ["a", "b"])
+        self.assertEqual(
+            tests[1].expanded_jscal["entries"], [{"@type": "Event", "uid": "b"}]
+        )
+        self.assertEqual([test.name for test in self.corpus.load("key", {"b"})], ["b"])
+
+    def test_stale(self):
+        self.assertIsNone(self.corpus.load("other"))
+        self.assertIsNone(rfctest.Corpus(self.corpus.path + ".missing").load("key"))
+
+    def test_corrupt(self):
+        with open(self.corpus.path, "r+b") as f:
+            f.truncate(12)
+        self.assertIsNone(self.corpus.load("key"))
+
+    @unittest.skipUnless(hasattr(os, "getuid"), "no file owners")
+    def test_untrusted(self):
+        os.chmod(self.corpus.path, 0o666)
+        err = io.StringIO()
+        with contextlib.redirect_stderr(err):
+            self.assertIsNone(self.corpus.load("key"))
+        self.assertIn("untrusted", err.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
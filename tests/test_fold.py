@@ -0,0 +1,61 @@
+import io
+import unittest
+
+from rfctest.jsical import ICAL_LINE_LENGTH, Component, fold_line
+
+
+class FoldLineTest(unittest.TestCase):
+    def test_short(self):
+        self.assertEqual(fold_line("UID:1"), b"UID:1\r\n")
+        line = "X:" + "a" * (ICAL_LINE_LENGTH - 2)
+        self.assertEqual(fold_line(line), line.encode() + b"\r\n")
+
+    def test_long(self):
+        line = "DESCRIPTION:" + "a" * 200
+        folded = fold_line(line)
+        parts = folded[:-2].split(b"\r\n")
+        self.assertEqual(len(parts[0]), ICAL_LINE_LENGTH)
+        for part in parts[1:]:
+            self.assertTrue(part.startswith(b" "))
+            self.assertLessEqual(len(part), ICAL_LINE_LENGTH)
+        self.assertEqual(folded.replace(b"\r\n ", b""), line.encode() + b"\r\n")
+
+    def test_multibyte(self):
+        # Folding must not split the four octets of any emoji.
+        line = "SUMMARY:" + "\U0001f600" * 60
+        folded = fold_line(line)
+        for part in folded[:-2].split(b"\r\n"):
+            self.assertLessEqual(len(part), ICAL_LINE_LENGTH)
+            part.decode()
+        self.assertEqual(folded.replace(b"\r\n ", b"").decode(), line + "\r\n")
+
+
+class IterIcalTest(unittest.TestCase):
+    def setUp(self):
+        self.comp = Component.parse(
+            "BEGIN:VEVENT\r\n"
+            "UID:1\r\n"
+            f"DESCRIPTION:{'Grüße ' * 40}\r\n"
+            "BEGIN:VALARM\r\n"
+            "TRIGGER:-PT5M\r\n"
+            "END:VALARM\r\n"
+            "END:VEVENT\r\n"
+        )
+
+    def test_chunks(self):
+        data = self.comp.to_ical().encode()
+        chunks = list(self.comp.iter_ical(chunk_size=64))
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(b"".join(chunks), data)
+        self.assertEqual(
+            Component.parse(data.decode()).normalized(), self.comp.normalized()
+        )
+
+    def test_write_ical(self):
+        f = io.BytesIO()
+        self.comp.write_ical(f, chunk_size=16)
+        self.assertEqual(f.getvalue(), self.comp.to_ical().encode())
+
+
+if __name__ == "__main__":
+    unittest.main()
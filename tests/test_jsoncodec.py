@@ -0,0 +1,56 @@
+import json
+import unittest
+from unittest import mock
+
+from rfctest import jsoncodec
+from rfctest.rfctest import HTTPBackend
+
+DATA = {"title": "Grüße", "count": 2**70, "nested": [1.5, None, True]}
+
+
+class CodecTest(unittest.TestCase):
+    def check(self):
+        encoded = jsoncodec.dumps(DATA, sort_keys=True)
+        self.assertEqual(
+            encoded,
+            json.dumps(
+                DATA, sort_keys=True, ensure_ascii=False, separators=(",", ":")
+            ).encode(),
+        )
+        self.assertEqual(jsoncodec.loads(encoded), DATA)
+        self.assertEqual(jsoncodec.loads(memoryview(encoded)), DATA)
+        self.assertEqual(jsoncodec.loads(encoded.decode()), DATA)
+        self.assertEqual(jsoncodec.dumps("\ud800"), b'"\\ud800"')
+        with self.assertRaises(ValueError):
+            jsoncodec.loads(b"{")
+
+    def test_default(self):
+        self.check()
+
+    def test_stdlib(self):
+        with mock.patch.object(jsoncodec, "orjson", None):
+            self.check()
+
+
+class RecordingBackend(HTTPBackend):
+    def __init__(self):
+        super().__init__("http://localhost")
+        self.bodies = []
+
+    def http_post(self, data, headers=None):
+        self.bodies.append(data)
+        return b""
+
+
+class HTTPBackendTest(unittest.TestCase):
+    def test_convert_to_ical(self):
+        backend = RecordingBackend()
+        encoded = backend.encode_jscal(DATA)
+        backend.convert_to_ical(encoded)
+        backend.convert_to_ical(DATA)
+        self.assertIs(backend.bodies[0], encoded)
+        self.assertEqual(backend.bodies[1], encoded)
+
+
+if __name__ == "__main__":
+    unittest.main()
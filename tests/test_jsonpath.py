@@ -0,0 +1,50 @@
+import pickle
+import unittest
+
+from rfctest.jsical import JsonDiff, JsonPath
+
+
+class JsonPathTest(unittest.TestCase):
+    def test_child(self):
+        root = JsonPath()
+        path = root.child("entries").child("0").child("title")
+        self.assertEqual(len(root), 0)
+        self.assertEqual(len(path), 3)
+        self.assertEqual(path.segments(), ("entries", "0", "title"))
+        self.assertEqual(list(path), ["entries", "0", "title"])
+        self.assertEqual(path[-1], "title")
+        self.assertEqual(path[0], "entries")
+        self.assertEqual(path.parent.parent, JsonPath(["entries"]))
+
+    def test_equality(self):
+        path = JsonPath(["a"]).child("b")
+        other = JsonPath(["a", "b"])
+        self.assertEqual(path, other)
+        self.assertEqual(hash(path), hash(other))
+        self.assertNotEqual(path, JsonPath(["a"]))
+        self.assertNotEqual(path, JsonPath(["a", "c"]))
+        self.assertEqual(pickle.loads(pickle.dumps(path)), other)
+
+    def test_encode(self):
+        path = JsonPath().child("a/b").child("~c").child("0")
+        self.assertEqual(path.encode(), "a~1b/~0c/0")
+        self.assertEqual(JsonPath.decode(path.encode()), path)
+        self.assertEqual(JsonPath().encode(), "")
+        self.assertEqual(JsonPath(["x", "y"]).encode(), "x/y")
+
+    def test_diff_paths(self):
+        a = {"entries": [{"title": "a", "x": 1}], "y/z": 1}
+        b = {"entries": [{"title": "b", "w": 1}]}
+        diff = JsonDiff.diff_json(a, b)
+        self.assertEqual(
+            sorted(p.encode() for p in diff.missing), ["entries/0/x", "y~1z"]
+        )
+        self.assertEqual(
+            [(p.encode(), q.encode()) for p, q in diff.notequal],
+            [("entries/0/title", "entries/0/title")],
+        )
+        self.assertEqual([p.encode() for p in diff.unexpected], ["entries/0/w"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import json
+import unittest
+
+from rfctest.jsical import JsonDiff
+from rfctest.jsonstream import GroupDecoder, GroupStreamDiff, JsonStreamError
+
+GROUP = {
+    "@type": "Group",
+    "entries": [
+        {"@type": "Event", "uid": "a", "title": 'Say "}" \\ ]', "duration": "PT1H"},
+        {"@type": "Task", "uid": "b", "keywords": {"x": True}, "priority": 5},
+    ],
+    "title": "Calendar [1]",
+    "x": [1, {"y": None}, "z"],
+    "n": -1.5e3,
+}
+
+
+def chunks(data: bytes, size: int):
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+class GroupDecoderTest(unittest.TestCase):
+    def decode(self, data: bytes, size: int):
+        decoder = GroupDecoder()
+        elements = []
+        for chunk in chunks(data, size):
+            elements.extend(decoder.feed(chunk))
+        return elements, decoder.close()
+
+    def test_chunks(self):
+        for indent in (None, 2):
+            data = json.dumps(GROUP, indent=indent).encode()
+            rest = {k: v for k, v in GROUP.items() if k != "entries"}
+            for size in (1, 2, 7, len(data)):
+                elements, members = self.decode(data, size)
+                self.assertEqual(elements, GROUP["entries"])
+                self.assertEqual(members, {**rest, "entries": []})
+
+    def test_empty(self):
+        self.assertEqual(self.decode(b"{}", 1), ([], {}))
+        self.assertEqual(self.decode(b'{"entries": []}', 1), ([], {"entries": []}))
+
+    def test_buffer(self):
+        decoder = GroupDecoder()
+        data = json.dumps(GROUP).encode()
+        for chunk in chunks(data, 1):
+            decoder.feed(chunk)
+            self.assertLess(len(decoder._buf), len(json.dumps(GROUP["entries"][0])))
+
+    def test_invalid(self):
+        for data in (b"[]", b'{"a" 1}', b'{"a": 1]', b'{"a": 1} {', b'{"a": tru}'):
+            with self.subTest(data=data):
+                with self.assertRaises(JsonStreamError):
+                    self.decode(data, 1)
+        with self.assertRaises(JsonStreamError):
+            self.decode(b'{"entries": [{}', 1)
+
+
+class GroupStreamDiffTest(unittest.TestCase):
+    def diff(self, expected: dict, actual: dict) -> bool:
+        diff = GroupStreamDiff(JsonDiff.normalize_json(expected))
+        for chunk in chunks(json.dumps(actual).encode(), 3):
+            diff.feed(chunk)
+        return diff.close()
+
+    def test_supports(self):
+        self.assertTrue(GroupStreamDiff.supports(GROUP))
+        self.assertFalse(GroupStreamDiff.supports({"entries": []}))
+        entries = [GROUP["entries"][0]] * 2
+        self.assertFalse(GroupStreamDiff.supports({"entries": entries}))
+
+    def test_match(self):
+        reordered = {**GROUP, "entries": GROUP["entries"][::-1]}
+        self.assertTrue(self.diff(GROUP, reordered))
+
+    def test_differ(self):
+        first, second = GROUP["entries"]
+        for actual in (
+            {**GROUP, "entries": [first]},
+            {**GROUP, "entries": [first, second, first]},
+            {**GROUP, "entries": [first, {**second, "priority": 1}]},
+            {**GROUP, "title": "Other"},
+        ):
+            with self.subTest(actual=actual):
+                self.assertFalse(self.diff(GROUP, actual))
+
+
+if __name__ == "__main__":
+    unittest.main()
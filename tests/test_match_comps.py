@@ -0,0 +1,63 @@
+import unittest
+
+from rfctest.jsical import Component, ComponentDiff
+
+
+def event(uid: str, recurid: str = None, summary: str = "x", jsid: str = None):
+    lines = ["BEGIN:VEVENT", f"UID:{uid}"]
+    if recurid is not None:
+        lines.append(f"RECURRENCE-ID:{recurid}")
+    if jsid is not None:
+        lines.append(f"JSID:{jsid}")
+    lines += [f"SUMMARY:{summary}", "END:VEVENT"]
+    return lines
+
+
+def calendar(*events: list[str]) -> Component:
+    lines = ["BEGIN:VCALENDAR"] + [line for e in events for line in e]
+    return Component.parse("\r\n".join(lines + ["END:VCALENDAR"]) + "\r\n")
+
+
+RECURIDS = [f"2024010{i}T090000Z" for i in range(1, 6)]
+
+
+class MatchCompsTest(unittest.TestCase):
+    def test_missing_override(self):
+        a = calendar(event("1"), *(event("1", r) for r in RECURIDS))
+        b = calendar(event("1"), *(event("1", r) for r in RECURIDS if r != RECURIDS[1]))
+        diff = ComponentDiff(a, b)
+        self.assertEqual(len(diff.del_comp_a), 1)
+        self.assertEqual(diff.diff_comps, [])
+        self.assertEqual(diff.add_comp_b, [])
+
+    def test_reordered(self):
+        a = calendar(event("1"), event("2"), event("1", RECURIDS[0]))
+        b = calendar(event("1", RECURIDS[0]), event("2"), event("1"))
+        self.assertTrue(ComponentDiff(a, b).empty())
+
+    def test_changed(self):
+        a = calendar(event("1"), event("1", RECURIDS[0]))
+        b = calendar(event("1"), event("1", RECURIDS[0], summary="y"))
+        diff = ComponentDiff(a, b)
+        self.assertEqual(len(diff.diff_comps), 1)
+        self.assertEqual(diff.del_comp_a + diff.add_comp_b, [])
+
+    def test_jsid(self):
+        # A JSID that equals the UID may be omitted.
+        a = calendar(event("1", jsid="1"), event("1", jsid="2"))
+        b = calendar(event("1", jsid="2", summary="y"), event("1"))
+        diff = ComponentDiff(a, b)
+        self.assertEqual(len(diff.diff_comps), 1)
+        _, _, comp_diff = diff.diff_comps[0]
+        self.assertEqual([d[:2] for d in comp_diff.diff_props], [(1, 1)])
+
+    def test_unkeyed(self):
+        a = calendar(event("1"), ["BEGIN:VTODO", "SUMMARY:a", "END:VTODO"])
+        b = calendar(["BEGIN:VTODO", "SUMMARY:b", "END:VTODO"], event("1"))
+        diff = ComponentDiff(a, b)
+        self.assertEqual(len(diff.diff_comps), 1)
+        self.assertEqual(diff.del_comp_a + diff.add_comp_b, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
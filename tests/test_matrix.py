@@ -0,0 +1,60 @@
+import json
+import unittest
+
+from rfctest import rfctest
+
+ICAL = "BEGIN:VEVENT\r\nUID:1\r\nSUMMARY:Lunch\r\nEND:VEVENT\r\n"
+JSCAL = '{"@type": "Event", "uid": "1", "title": "Lunch"}'
+
+
+class Converter:
+    """Converts any data to the example."""
+
+    def to_jgroup(self, ical: bytes):
+        return {"@type": "Group", "entries": [json.loads(JSCAL)]}
+
+    def to_ical(self, jscal: dict):
+        return "BEGIN:VCALENDAR\r\n" + ICAL + "END:VCALENDAR\r\n"
+
+
+class Broken(Converter):
+    def to_jgroup(self, ical: bytes):
+        raise ValueError("broken")
+
+
+class MatrixTest(unittest.TestCase):
+    def test_parse_backend_urls(self):
+        self.assertEqual(
+            rfctest.parse_backend_urls(["http://a.example/"]),
+            {None: "http://a.example/"},
+        )
+        self.assertEqual(
+            rfctest.parse_backend_urls(["x=http://a.example/", "http://b.example/"]),
+            {"x": "http://a.example/", "b.example": "http://b.example/"},
+        )
+        with self.assertRaises(rfctest.BackendError):
+            rfctest.parse_backend_urls(["x=http://a.example/", "x=http://b.example/"])
+
+    def test_for_backend(self):
+        test = rfctest.Test("lunch", ICAL, JSCAL)
+        copy = test.for_backend("x")
+        self.assertEqual(copy.key, "lunch@x")
+        self.assertIsNone(test.backend)
+        self.assertIs(copy.expanded_vobject, test.expanded_vobject)
+
+    def test_run(self):
+        backends = {
+            "good": rfctest.PluginBackend(f"{__name__}:Converter"),
+            "bad": rfctest.PluginBackend(f"{__name__}:Broken"),
+        }
+        self.addCleanup(rfctest.close_backends, backends)
+        tests = [rfctest.Test("lunch", ICAL, JSCAL)]
+        ran = {test.key: test for test in rfctest.run_tests(tests, backends)}
+        self.assertEqual(sorted(ran), ["lunch@bad", "lunch@good"])
+        self.assertEqual(ran["lunch@good"].i2jresult.outcome(), "success")
+        self.assertEqual(ran["lunch@bad"].i2jresult.outcome(), "error")
+        self.assertIsNone(tests[0].i2jresult)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+
+from rfctest import trace
+from rfctest.jsical import Component
+from rfctest.memprof import MiB, MemoryProfiler
+
+ICAL = "BEGIN:VCALENDAR\r\n" + "X-DATA:x\r\n" * 1000 + "END:VCALENDAR\r\n"
+
+
+class MemoryProfilerTest(unittest.TestCase):
+    def setUp(self):
+        self.profiler = MemoryProfiler()
+        trace.profile_memory(self.profiler)
+
+    def tearDown(self):
+        trace.profile_memory(None)
+        self.profiler.stop()
+
+    def test_phases(self):
+        kept = []
+        with trace.span("outer"):
+            with trace.span("inner"):
+                kept.append(bytearray(MiB))
+            with trace.span("temporary"):
+                bytearray(2 * MiB)
+        with trace.span("inner"):
+            pass
+        phases = {p["name"]: p for p in self.profiler.profile()["phases"]}
+        self.assertEqual(phases["inner"]["count"], 2)
+        self.assertEqual(phases["outer"]["count"], 1)
+        self.assertGreaterEqual(phases["inner"]["retained"], MiB)
+        self.assertLess(phases["inner"]["retained"], 2 * MiB)
+        self.assertLess(phases["temporary"]["retained"], MiB)
+        self.assertGreaterEqual(phases["temporary"]["peak"], 2 * MiB)
+        # Nested phases count towards the enclosing phase.
+        self.assertGreaterEqual(phases["outer"]["peak"], 3 * MiB)
+        self.assertGreaterEqual(phases["outer"]["retained"], MiB)
+
+    def test_sites(self):
+        with trace.span("parse"):
+            comp = Component.parse(ICAL)
+        sites = self.profiler.sites()
+        self.assertTrue(sites)
+        self.assertEqual(sites[0].file, "jsical.py")
+        self.assertGreater(sites[0].size, 0)
+        self.assertEqual(len(comp.props), 1000)
+
+
+if __name__ == "__main__":
+    unittest.main()
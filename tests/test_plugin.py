@@ -0,0 +1,68 @@
+import json
+import unittest
+
+from rfctest.rfctest import BackendError, PluginBackend, load_converter
+
+
+class Converter:
+    """Echoes the data it converts."""
+
+    def to_jgroup(self, ical: bytes):
+        return {"@type": "Group", "ical": ical.decode()}
+
+    def to_ical(self, jscal: dict):
+        return jscal["ical"]
+
+
+converter = Converter()
+
+
+def make_converter():
+    return Converter()
+
+
+class Plugins:
+    echo = converter
+
+
+class LoadConverterTest(unittest.TestCase):
+    def test_load(self):
+        self.assertIsInstance(load_converter(f"{__name__}:Converter"), Converter)
+        self.assertIs(load_converter(f"{__name__}:converter"), converter)
+        self.assertIsInstance(load_converter(f"{__name__}:make_converter"), Converter)
+        self.assertIs(load_converter(f"{__name__}:Plugins.echo"), converter)
+
+    def test_invalid(self):
+        for spec in (
+            "Converter",
+            f"{__name__}:",
+            "no_such_module:Converter",
+            f"{__name__}:NoSuchConverter",
+            "json:decoder",
+        ):
+            with self.subTest(spec=spec), self.assertRaises(BackendError):
+                load_converter(spec)
+
+
+class PluginBackendTest(unittest.TestCase):
+    def check(self, backend: PluginBackend):
+        try:
+            jgroup = backend.convert_to_jgroup(b"BEGIN:VCALENDAR")
+            self.assertEqual(
+                json.loads(jgroup), {"@type": "Group", "ical": "BEGIN:VCALENDAR"}
+            )
+            self.assertEqual(
+                backend.convert_to_ical({"ical": "BEGIN:VCALENDAR"}), b"BEGIN:VCALENDAR"
+            )
+        finally:
+            backend.close()
+
+    def test_in_process(self):
+        self.check(PluginBackend(f"{__name__}:Converter"))
+
+    def test_process_pool(self):
+        self.check(PluginBackend(f"{__name__}:Converter", processes=1))
+
+
+if __name__ == "__main__":
+    unittest.main()
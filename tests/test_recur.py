@@ -0,0 +1,279 @@
+import datetime
+import unittest
+
+from rfctest.jsical import Component, ComponentDiff, JsonDiff
+from rfctest.recur import (
+    RecurrenceError,
+    RecurrenceRule,
+    RecurrenceSet,
+    parse_datetime,
+)
+
+
+def dt(*args):
+    return datetime.datetime(*args)
+
+
+def expand(rule: str, start: str, **kwargs):
+    return RecurrenceRule.from_ical(rule).expand(parse_datetime(start), **kwargs)
+
+
+class ParseTest(unittest.TestCase):
+    def test_parse_datetime(self):
+        self.assertEqual(parse_datetime("20240101T083000Z"), dt(2024, 1, 1, 8, 30))
+        self.assertEqual(parse_datetime("2024-01-01T08:30:00"), dt(2024, 1, 1, 8, 30))
+        self.assertEqual(parse_datetime("20240101"), dt(2024, 1, 1))
+        with self.assertRaises(RecurrenceError):
+            parse_datetime("2024-13-01")
+
+    def test_from_ical(self):
+        rule = RecurrenceRule.from_ical("FREQ=MONTHLY;BYDAY=-1FR,MO;UNTIL=20241231")
+        self.assertEqual(rule.byday, ((0, 0), (4, -1)))
+        self.assertEqual(rule.until, datetime.date(2024, 12, 31))
+        self.assertFalse(rule.until_utc)
+        rule = RecurrenceRule.from_ical("FREQ=DAILY;UNTIL=20240930T120000Z")
+        self.assertEqual(rule.until, dt(2024, 9, 30, 12))
+        self.assertTrue(rule.until_utc)
+        for value in ("FREQ=FOO", "FREQ=DAILY;BYHOUR=24", "FREQ=DAILY;COUNT"):
+            with self.assertRaises(RecurrenceError):
+                RecurrenceRule.from_ical(value)
+
+    def test_from_json(self):
+        rule = RecurrenceRule.from_json(
+            {
+                "frequency": "yearly",
+                "byMonth": ["1", "5L"],
+                "byDay": [{"day": "su", "nthOfPeriod": -1}],
+                "until": "2030-01-01T00:00:00",
+            }
+        )
+        self.assertEqual(
+            rule,
+            RecurrenceRule.from_ical(
+                "FREQ=YEARLY;BYMONTH=1;BYDAY=-1SU;UNTIL=20300101T000000"
+            ),
+        )
+        with self.assertRaises(RecurrenceError):
+            RecurrenceRule.from_json({"frequency": "daily", "interval": 0})
+
+
+class ExpandTest(unittest.TestCase):
+    def test_daily(self):
+        self.assertEqual(
+            expand("FREQ=DAILY;INTERVAL=2;COUNT=3", "20240130T090000"),
+            [dt(2024, 1, 30, 9), dt(2024, 2, 1, 9), dt(2024, 2, 3, 9)],
+        )
+
+    def test_until_is_inclusive(self):
+        self.assertEqual(
+            expand("FREQ=WEEKLY;UNTIL=20240115T090000", "20240101T090000"),
+            [dt(2024, 1, 1, 9), dt(2024, 1, 8, 9), dt(2024, 1, 15, 9)],
+        )
+        self.assertEqual(
+            expand("FREQ=WEEKLY;UNTIL=20240115", "20240101T090000")[-1],
+            dt(2024, 1, 15, 9),
+        )
+
+    def test_count_includes_start(self):
+        # The start does not match BYDAY, but is the first of two occurrences.
+        self.assertEqual(
+            expand("FREQ=WEEKLY;BYDAY=FR;COUNT=2", "20240101T090000"),
+            [dt(2024, 1, 1, 9), dt(2024, 1, 5, 9)],
+        )
+        self.assertEqual(
+            expand("FREQ=DAILY;COUNT=1", "20240101T090000"), [dt(2024, 1, 1, 9)]
+        )
+
+    def test_monthly_nth_weekday(self):
+        self.assertEqual(
+            expand("FREQ=MONTHLY;BYDAY=-1FR;COUNT=3", "20240126T100000"),
+            [dt(2024, 1, 26, 10), dt(2024, 2, 23, 10), dt(2024, 3, 29, 10)],
+        )
+
+    def test_monthly_skips_short_months(self):
+        self.assertEqual(
+            expand("FREQ=MONTHLY;COUNT=3", "20240131"),
+            [dt(2024, 1, 31), dt(2024, 3, 31), dt(2024, 5, 31)],
+        )
+
+    def test_bysetpos(self):
+        # The last weekday of each month
+        self.assertEqual(
+            expand(
+                "FREQ=MONTHLY;BYDAY=MO,TU,WE,TH,FR;BYSETPOS=-1;COUNT=3",
+                "20240131T170000",
+            ),
+            [dt(2024, 1, 31, 17), dt(2024, 2, 29, 17), dt(2024, 3, 29, 17)],
+        )
+
+    def test_byweekno(self):
+        # Week 1 of 2026 starts on Monday, December 29th, 2025.
+        self.assertEqual(
+            expand("FREQ=YEARLY;BYWEEKNO=1;BYDAY=MO;COUNT=2", "20251229"),
+            [dt(2025, 12, 29), dt(2027, 1, 4)],
+        )
+
+    def test_hourly(self):
+        self.assertEqual(
+            expand("FREQ=HOURLY;INTERVAL=5;BYMINUTE=0,30;COUNT=4", "20240101T220000"),
+            [
+                dt(2024, 1, 1, 22),
+                dt(2024, 1, 1, 22, 30),
+                dt(2024, 1, 2, 3),
+                dt(2024, 1, 2, 3, 30),
+            ],
+        )
+
+    def test_window(self):
+        occurrences = expand("FREQ=YEARLY", "20240229")
+        self.assertEqual(
+            occurrences, [dt(2024, 2, 29), dt(2028, 2, 29), dt(2032, 2, 29)]
+        )
+        self.assertEqual(len(expand("FREQ=DAILY", "20240101", end=dt(2024, 2, 1))), 31)
+        self.assertEqual(len(expand("FREQ=SECONDLY", "20240101", limit=100)), 100)
+
+
+class RecurrenceSetTest(unittest.TestCase):
+    def test_from_component(self):
+        comp = Component.parse(
+            "BEGIN:VEVENT\r\n"
+            "DTSTART:20240101T090000\r\n"
+            "RRULE:FREQ=DAILY;COUNT=5\r\n"
+            "EXRULE:FREQ=DAILY;INTERVAL=2;COUNT=2\r\n"
+            "RDATE:20240301T090000,20240302T090000/PT1H\r\n"
+            "EXDATE:20240105T090000\r\n"
+            "END:VEVENT\r\n"
+        )
+        self.assertEqual(
+            RecurrenceSet.from_component(comp).expand(),
+            [
+                dt(2024, 1, 2, 9),
+                dt(2024, 1, 4, 9),
+                dt(2024, 3, 1, 9),
+                dt(2024, 3, 2, 9),
+            ],
+        )
+
+    def test_from_json(self):
+        recur_set = RecurrenceSet.from_json(
+            {
+                "start": "2024-01-01T09:00:00",
+                "recurrenceRules": [{"frequency": "daily", "count": 3}],
+                "recurrenceOverrides": {
+                    "2024-01-02T09:00:00": {"excluded": True},
+                    "2024-01-10T09:00:00": {"title": "extra"},
+                },
+            }
+        )
+        self.assertEqual(
+            recur_set.expand(),
+            [dt(2024, 1, 1, 9), dt(2024, 1, 3, 9), dt(2024, 1, 10, 9)],
+        )
+        with self.assertRaises(RecurrenceError):
+            RecurrenceSet.from_json({"recurrenceRules": []})
+
+    def test_bounds(self):
+        # Both rules have the same occurrences within the expansion window.
+        a = RecurrenceSet.from_json(
+            {
+                "start": "2024-01-01T09:00:00",
+                "recurrenceRules": [{"frequency": "yearly", "until": "2100-01-01"}],
+            }
+        )
+        b = RecurrenceSet.from_json(
+            {
+                "start": "2024-01-01T09:00:00",
+                "recurrenceRules": [{"frequency": "yearly", "until": "2200-01-01"}],
+            }
+        )
+        self.assertEqual(a.expand(), b.expand())
+        self.assertNotEqual(a.bounds(), b.bounds())
+
+    def test_utc_until_needs_time_zone(self):
+        comp = Component.parse(
+            "BEGIN:VEVENT\r\n"
+            "DTSTART;TZID=Europe/Berlin:20240101T090000\r\n"
+            "RRULE:FREQ=DAILY;UNTIL=20240103T080000Z\r\n"
+            "END:VEVENT\r\n"
+        )
+        with self.assertRaises(RecurrenceError):
+            RecurrenceSet.from_component(comp)
+
+    def test_utc_until_with_utc_start(self):
+        comp = Component.parse(
+            "BEGIN:VEVENT\r\n"
+            "DTSTART:20240101T090000Z\r\n"
+            "RRULE:FREQ=DAILY;UNTIL=20240103T090000Z\r\n"
+            "END:VEVENT\r\n"
+        )
+        self.assertEqual(len(RecurrenceSet.from_component(comp).expand()), 3)
+
+
+class DiffTest(unittest.TestCase):
+    def test_equal_json_rules(self):
+        a = {
+            "start": "2024-01-01T09:00:00",
+            "recurrenceRules": [
+                {"frequency": "weekly", "byDay": [{"day": "mo"}, {"day": "fr"}]}
+            ],
+        }
+        b = {
+            "start": "2024-01-01T09:00:00",
+            "recurrenceRules": [
+                {"frequency": "daily", "byDay": [{"day": "fr"}, {"day": "mo"}]}
+            ],
+        }
+        self.assertTrue(JsonDiff.diff_json(a, b).empty())
+
+    def test_json_rule_bounds(self):
+        a = {
+            "start": "2024-01-01T09:00:00",
+            "recurrenceRule": {"frequency": "yearly", "until": "2024-09-30T14:00:00"},
+        }
+        b = {
+            "start": "2024-01-01T09:00:00",
+            "recurrenceRule": {"frequency": "yearly", "until": "2024-09-30T12:00:00"},
+        }
+        self.assertFalse(JsonDiff.diff_json(a, b).empty())
+
+    def test_json_rule_keys(self):
+        rule = {"frequency": "daily", "count": 3}
+        a = {"start": "2024-01-01T09:00:00", "recurrenceRule": rule}
+        b = {"start": "2024-01-01T09:00:00", "recurrenceRules": [rule]}
+        diff = JsonDiff.diff_json(a, b)
+        self.assertEqual([list(p) for p in diff.missing], [["recurrenceRule"]])
+        self.assertEqual([list(p) for p in diff.unexpected], [["recurrenceRules"]])
+
+    def test_equal_ical_rules(self):
+        a = Component.parse(
+            "BEGIN:VEVENT\r\n"
+            "DTSTART:20240101T090000\r\n"
+            "RRULE:FREQ=DAILY;COUNT=3\r\n"
+            "END:VEVENT\r\n"
+        )
+        b = Component.parse(
+            "BEGIN:VEVENT\r\n"
+            "DTSTART:20240101T090000\r\n"
+            "RRULE:COUNT=3;FREQ=DAILY;INTERVAL=1\r\n"
+            "END:VEVENT\r\n"
+        )
+        self.assertTrue(ComponentDiff(a, b).empty())
+
+    def test_ical_rule_names(self):
+        a = Component.parse(
+            "BEGIN:VEVENT\r\n"
+            "DTSTART:20240101T090000\r\n"
+            "RRULE:FREQ=DAILY;COUNT=2\r\n"
+            "END:VEVENT\r\n"
+        )
+        b = Component.parse(
+            "BEGIN:VEVENT\r\n"
+            "DTSTART:20240101T090000\r\n"
+            "RDATE:20240102T090000\r\n"
+            "END:VEVENT\r\n"
+        )
+        self.assertFalse(ComponentDiff(a, b).empty())
+
+
+if __name__ == "__main__":
+    unittest.main()
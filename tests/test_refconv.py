@@ -0,0 +1,116 @@
+import http.client
+import http.server
+import json
+import threading
+import unittest
+from unittest import mock
+
+from rfctest.refconv import ConversionError, ReferenceConverter, _Handler
+
+ICAL = (
+    "BEGIN:VCALENDAR\r\n"
+    "BEGIN:VEVENT\r\n"
+    "UID:1\r\n"
+    "SUMMARY:Lunch\r\n"
+    "DTSTART:20240101T120000\r\n"
+    "RRULE:FREQ=WEEKLY;BYDAY=MO,FR\r\n"
+    "END:VEVENT\r\n"
+    "END:VCALENDAR\r\n"
+)
+
+EVENT = {
+    "@type": "Event",
+    "uid": "1",
+    "title": "Lunch",
+    "start": "2024-01-01T12:00:00",
+    "recurrenceRules": [
+        {
+            "@type": "RecurrenceRule",
+            "frequency": "weekly",
+            "byDay": [{"@type": "NDay", "day": "mo"}, {"@type": "NDay", "day": "fr"}],
+        }
+    ],
+}
+
+
+class ConverterTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.converter = ReferenceConverter()
+
+    def test_to_jgroup(self):
+        group = self.converter.to_jgroup(ICAL.encode())
+        self.assertEqual(group["@type"], "Group")
+        (event,) = group["entries"]
+        self.assertEqual(event["title"], "Lunch")
+        self.assertEqual(event["recurrenceRules"], EVENT["recurrenceRules"])
+        with self.assertRaises(ConversionError):
+            self.converter.to_jgroup(b"BEGIN:VEVENT\xff\r\n")
+
+    def test_to_ical(self):
+        ical = self.converter.to_ical(EVENT)
+        self.assertIn("SUMMARY:Lunch\r\n", ical)
+        self.assertIn("RRULE:FREQ=WEEKLY;BYDAY=MO,FR\r\n", ical)
+
+    def test_invalid_types(self):
+        for obj in (
+            [EVENT],
+            {"@type": "Group", "entries": 5},
+            dict(EVENT, recurrenceRules=5),
+            dict(EVENT, recurrenceRules=[{"frequency": "weekly", "byDay": "mo"}]),
+            dict(EVENT, recurrenceRules=[{"frequency": "daily", "until": 5}]),
+            dict(EVENT, recurrenceOverrides={"2024-01-05T12:00:00": "x"}),
+            dict(EVENT, keywords=["a"]),
+        ):
+            with self.subTest(obj=obj), self.assertRaises(ConversionError):
+                self.converter.to_ical(obj)
+
+
+class ServerTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        cls.server.converter = ReferenceConverter()
+        cls.server.verbose = False
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.conn = http.client.HTTPConnection(*self.server.server_address[:2])
+
+    def tearDown(self):
+        self.conn.close()
+
+    def post(self, data, content_type="application/jscalendar+json"):
+        self.conn.request(
+            "POST", "/", body=json.dumps(data), headers={"Content-Type": content_type}
+        )
+        res = self.conn.getresponse()
+        return res, res.read()
+
+    def test_keep_alive(self):
+        rrule = {"frequency": "weekly", "byDay": "mo"}
+        res, body = self.post(dict(EVENT, recurrenceRules=[rrule]))
+        self.assertEqual(res.status, 400)
+        res, body = self.post(EVENT)
+        self.assertEqual(res.status, 200)
+        self.assertIn(b"SUMMARY:Lunch", body)
+        res, body = self.post(EVENT, "text/plain")
+        self.assertEqual(res.status, 415)
+
+    def test_unexpected_error(self):
+        with mock.patch.object(
+            ReferenceConverter, "to_ical", side_effect=RuntimeError("bug")
+        ), mock.patch("sys.stderr"):
+            res, body = self.post(EVENT)
+        self.assertEqual(res.status, 500)
+        self.assertEqual(res.getheader("Connection"), "close")
+        self.assertIn(b"bug", body)
+
+
+if __name__ == "__main__":
+    unittest.main()
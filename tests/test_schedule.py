@@ -0,0 +1,86 @@
+import json
+import os
+import tempfile
+import unittest
+
+from rfctest import rfctest
+
+ICAL = "BEGIN:VEVENT\r\nUID:1\r\nEND:VEVENT\r\n"
+JSCAL = '{"@type": "Event", "uid": "1"}'
+
+
+def record(name: str, elapsed: float, status: str = "success") -> rfctest.TestRecord:
+    return rfctest.TestRecord(
+        name,
+        rfctest.ResultRecord(status),
+        rfctest.ResultRecord("success"),
+        elapsed=elapsed,
+    )
+
+
+def make_tests(*names: str) -> list[rfctest.Test]:
+    return [rfctest.Test(name, ICAL, JSCAL) for name in names]
+
+
+class HistoryTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.fname = os.path.join(self.dir.name, "history.json")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_save_and_load(self):
+        self.assertEqual(rfctest.load_history(self.fname), {})
+        history = {"old": {"elapsed": 1.0, "failed": False}}
+        records = [record("a", 0.5, "invalid"), record("b", None)]
+        rfctest.save_history(self.fname, history, records)
+        self.assertEqual(
+            rfctest.load_history(self.fname),
+            {
+                "a": {"elapsed": 0.5, "failed": True},
+                "old": {"elapsed": 1.0, "failed": False},
+            },
+        )
+
+    def test_unsupported(self):
+        with open(self.fname, "w") as f:
+            json.dump({"version": 0, "tests": {}}, f)
+        with self.assertRaises(OSError):
+            rfctest.load_history(self.fname)
+        with open(self.fname, "w") as f:
+            f.write("{")
+        with self.assertRaises(OSError):
+            rfctest.load_history(self.fname)
+
+
+class ScheduleTest(unittest.TestCase):
+    HISTORY = {
+        "a": {"elapsed": 0.1, "failed": False},
+        "b": {"elapsed": 3.0, "failed": False},
+        "c": {"elapsed": 2.0, "failed": True},
+        "a@x": {"elapsed": 5.0, "failed": True},
+    }
+
+    def order(self, order: str, backends=(None,)) -> list[str]:
+        scheduled = rfctest.schedule_tests(
+            make_tests("a", "b", "c", "d"), self.HISTORY, order, backends
+        )
+        return [test.name for test in scheduled]
+
+    def test_orders(self):
+        self.assertEqual(self.order("name"), ["a", "b", "c", "d"])
+        self.assertEqual(self.order("longest"), ["d", "b", "c", "a"])
+        self.assertEqual(self.order("failed"), ["d", "c", "a", "b"])
+
+    def test_backends(self):
+        # Tests lack history unless they ran against all backends.
+        self.assertEqual(self.order("longest", (None, "x")), ["b", "c", "d", "a"])
+
+    def test_deadline(self):
+        ran = rfctest.run_tests(make_tests("a", "b"), {None: None}, deadline=0)
+        self.assertEqual(list(ran), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from rfctest import rfctest
+
+ICAL = "BEGIN:VEVENT\r\nUID:{name}\r\nEND:VEVENT\r\n"
+JSCAL = '{{"@type": "Event", "uid": "{name}"}}'
+NAMES = [f"case{i}" for i in range(8)]
+
+
+class Converter:
+    def to_jgroup(self, ical: bytes):
+        return {"@type": "Group", "entries": []}
+
+    def to_ical(self, jscal: dict):
+        return "BEGIN:VCALENDAR\r\nEND:VCALENDAR\r\n"
+
+
+class ShardTest(unittest.TestCase):
+    def test_parse_shard(self):
+        self.assertEqual(rfctest.parse_shard("2/3"), (2, 3))
+        for s in ("0/3", "4/3", "1/0", "1", "a/b"):
+            with self.subTest(s=s), self.assertRaises(argparse.ArgumentTypeError):
+                rfctest.parse_shard(s)
+
+    def test_in_shard(self):
+        for name in NAMES:
+            shards = [i for i in (1, 2, 3) if rfctest.in_shard(name, (i, 3))]
+            self.assertEqual(len(shards), 1)
+
+
+class MergeTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        for name in NAMES:
+            with open(self.path(f"{name}.ics"), "w") as f:
+                f.write(ICAL.format(name=name))
+            with open(self.path(f"{name}.json"), "w") as f:
+                f.write(JSCAL.format(name=name))
+        self.out = io.StringIO()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.dir.name, name)
+
+    def run_main(self, argv: list[str], main=rfctest.main):
+        with contextlib.redirect_stdout(self.out), contextlib.redirect_stderr(self.out):
+            main(argv)
+
+    def run_shard(self, shard: str) -> str:
+        i = shard.partition("/")[0]
+        results = self.path(f"{i}.results")
+        self.run_main(
+            [
+                *("-f", self.dir.name, "--no-cache", "--shard", shard),
+                *("--backend", f"{__name__}:Converter", "--results", results),
+                *("-o", self.path(f"{i}.html")),
+            ]
+        )
+        return results
+
+    def test_merge(self):
+        results = [self.run_shard("1/2"), self.run_shard("2/2")]
+        names = [
+            [reported.record.name for reported in rfctest.load_results(fname)]
+            for fname in results
+        ]
+        self.assertEqual(sorted(names[0] + names[1]), NAMES)
+        self.assertTrue(all(names))
+
+        report = self.path("report.html")
+        self.run_main(["-o", report, *results, results[0]], rfctest.merge_main)
+        self.assertIn("duplicate test", self.out.getvalue())
+        with open(report) as f:
+            html = f.read()
+        for name in NAMES:
+            self.assertEqual(html.count(f"<h2 id={name}>"), 1)
+
+    def test_invalid(self):
+        fname = self.path("invalid.results")
+        for lines in ([{"version": 0}], [{"version": rfctest.RESULTS_VERSION}, {}]):
+            with open(fname, "w") as f:
+                f.writelines(json.dumps(line) + "\n" for line in lines)
+            with self.assertRaises(SystemExit) as cm:
+                self.run_main(
+                    ["-o", self.path("report.html"), fname], rfctest.merge_main
+                )
+            self.assertEqual(cm.exception.code, 1)
+            self.assertIn("results file", self.out.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
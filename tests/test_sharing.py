@@ -0,0 +1,86 @@
+import dataclasses
+import unittest
+
+from rfctest.jsical import Component, JObject, JsonDiff, Parameter, Property
+
+ICAL = (
+    "BEGIN:VCALENDAR\r\n"
+    "PRODID:x\r\n"
+    "VERSION:2.0\r\n"
+    "BEGIN:VEVENT\r\n"
+    "DTSTAMP:20240101T000000Z\r\n"
+    "DTSTART:20240101T090000\r\n"
+    "UID:1\r\n"
+    "BEGIN:VALARM\r\n"
+    "TRIGGER:-PT5M\r\n"
+    "END:VALARM\r\n"
+    "END:VEVENT\r\n"
+    "BEGIN:VTODO\r\n"
+    "UID:2\r\n"
+    "SUMMARY;language=de:Einkaufen\r\n"
+    "END:VTODO\r\n"
+    "END:VCALENDAR\r\n"
+)
+
+
+class ComponentTest(unittest.TestCase):
+    def test_frozen(self):
+        prop = Property("SUMMARY", "x", (Parameter("LANGUAGE", "de"),))
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            prop.value = "y"
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            prop.params[0].value = "en"
+
+    def test_normalized(self):
+        comp = Component.parse(ICAL)
+        norm = comp.normalized()
+        vevent, vtodo = comp.comps
+        self.assertIsNot(norm, comp)
+        # Only the VTODO needs its properties sorted and normalized.
+        self.assertIs(norm.comps[0], vevent)
+        self.assertIsNot(norm.comps[1], vtodo)
+        summary, uid = norm.comps[1].props
+        self.assertEqual(summary.params, (Parameter("LANGUAGE", "DE"),))
+        self.assertIs(uid, vtodo.props[0])
+        self.assertIs(norm.normalized(), norm)
+        self.assertEqual(comp.comps[1].props[1].params[0].value, "de")
+
+    def test_with_default_props(self):
+        comp = Component.parse(ICAL)
+        expanded = comp.with_default_props()
+        self.assertIs(expanded.comps[0], comp.comps[0])
+        self.assertIsNot(expanded.comps[1], comp.comps[1])
+        self.assertIn("DTSTAMP", [prop.name for prop in expanded.comps[1].props])
+        self.assertNotIn("DTSTAMP", [prop.name for prop in comp.comps[1].props])
+
+
+class JsonTest(unittest.TestCase):
+    DATA = {
+        "@type": "Group",
+        "entries": [
+            {"@type": "Event", "uid": "1", "title": "", "locations": {"1": {}}},
+            {"@type": "Event", "uid": "2", "keywords": {"a": True}},
+        ],
+    }
+
+    def test_normalize_json(self):
+        norm = JsonDiff.normalize_json(self.DATA)
+        self.assertIsNot(norm, self.DATA)
+        first, second = norm["entries"]
+        self.assertNotIn("title", first)
+        self.assertIs(first["locations"], self.DATA["entries"][0]["locations"])
+        self.assertIs(second, self.DATA["entries"][1])
+        self.assertEqual(self.DATA["entries"][0]["title"], "")
+        self.assertIs(JsonDiff.normalize_json(norm), norm)
+
+    def test_with_default_props(self):
+        data = {"@type": "Group", "...": "", "entries": self.DATA["entries"]}
+        expanded = JObject(data).with_default_props().to_json()
+        self.assertNotIn("...", expanded)
+        self.assertIn("uid", expanded)
+        self.assertIs(expanded["entries"], data["entries"])
+        self.assertIn("...", data)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from rfctest import rfctest
+
+ICAL = "BEGIN:VEVENT\r\nUID:{name}\r\nEND:VEVENT\r\n"
+JSCAL = '{{"@type": "Event", "uid": "{name}"}}'
+
+
+class SourcesTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.write_pair("case")
+        self.write_pair("sub/case")
+        self.write_pair("sub/deeper/other")
+        self.write("sub/lonely.ics", ICAL.format(name="lonely"))
+        self.write("tests.xml", "<rfc/>")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.dir.name, name)
+
+    def write(self, name: str, data: str):
+        os.makedirs(os.path.dirname(self.path(name)), exist_ok=True)
+        with open(self.path(name), "w") as f:
+            f.write(data)
+
+    def write_pair(self, name: str):
+        self.write(f"{name}.ics", ICAL.format(name=name))
+        self.write(f"{name}.json", JSCAL.format(name=name))
+
+    def find_names(self, *patterns: str) -> list[str]:
+        err = io.StringIO()
+        with contextlib.redirect_stderr(err):
+            xmlfiles, pairs = rfctest.find_sources([self.path(p) for p in patterns])
+        self.errors = err.getvalue()
+        self.xmlfiles = xmlfiles
+        return [name for name, _, _ in pairs]
+
+    def test_directory(self):
+        self.assertEqual(self.find_names("."), ["case", "sub/case", "sub/deeper/other"])
+        self.assertIn("lonely.ics: no matching example pair", self.errors)
+        self.assertEqual(self.find_names("sub"), ["case", "deeper/other"])
+
+    def test_glob(self):
+        self.assertEqual(self.find_names("sub/*.ics"), ["case"])
+        self.assertEqual(self.find_names("sub/**/*.json"), ["case", "deeper/other"])
+        self.assertEqual(self.find_names("*/deeper/*.ics"), ["sub/deeper/other"])
+
+    def test_files(self):
+        self.assertEqual(self.find_names("sub/case.json", "tests.xml"), ["case"])
+        self.assertEqual(self.xmlfiles, [self.path("tests.xml")])
+
+    def test_find_tests(self):
+        cache = self.path("tests.corpus")
+        for _ in range(2):
+            tests = rfctest.find_tests(
+                [self.path("sub"), self.path("case.ics")], cache=cache, processes=2
+            )
+            self.assertEqual([test.name for test in tests], ["case", "deeper/other"])
+            # Of the pairs named case, the one with the first file name is kept.
+            self.assertEqual(tests[0].expanded_jscal["entries"][0]["uid"], "case")
+        self.assertTrue(os.path.exists(cache))
+
+
+if __name__ == "__main__":
+    unittest.main()
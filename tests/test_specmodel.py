@@ -0,0 +1,121 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "spec"))
+
+import specmodel  # noqa: E402
+
+SPEC = {
+    "icalendar": {
+        "components": {
+            "VEVENT": {
+                "properties": {
+                    "DTSTAMP": {"convert": {"property": "updated, scheduleUpdated"}},
+                    "SUMMARY": {"convert": {"property": "title"}},
+                },
+                "components": {"VALARM": {"convert": {"property": "alerts"}}},
+            },
+            "VALARM": {"properties": {}},
+        },
+        "properties": {
+            "DTSTAMP": {},
+            "SUMMARY": {
+                "parameters": {
+                    "LANGUAGE": {"convert": {"property": "locale"}},
+                    "ALTREP": {},
+                }
+            },
+        },
+        "parameters": {"LANGUAGE": {}, "ALTREP": {}},
+    },
+    "jscalendar": {"types": {}, "properties": {}},
+}
+
+
+class SpecTest(unittest.TestCase):
+    def test_convert_targets(self):
+        self.assertEqual(
+            specmodel.convert_targets({"property": "updated, scheduleUpdated"}),
+            ["updated", "scheduleUpdated"],
+        )
+        self.assertEqual(specmodel.convert_targets({"object": "Alert"}), [None])
+
+    def test_conversions(self):
+        spec = specmodel.Spec(SPEC)
+        self.assertEqual(
+            [conv.property for conv in spec.conversions("property", "DTSTAMP")],
+            ["updated", "scheduleUpdated"],
+        )
+        self.assertEqual(
+            [conv.parent for conv in spec.conversions("component", "VALARM")],
+            ["VEVENT"],
+        )
+        self.assertEqual(spec.conversions("property", "UID"), ())
+
+    def test_indexes(self):
+        spec = specmodel.Spec(SPEC)
+        self.assertEqual(spec.properties_with_parameter("LANGUAGE"), ("SUMMARY",))
+        self.assertEqual(spec.components_with_property("SUMMARY"), ("VEVENT",))
+        self.assertEqual(spec.parent_components("VALARM"), ("VEVENT",))
+
+    def test_read_only(self):
+        spec = specmodel.Spec(SPEC)
+        with self.assertRaises(TypeError):
+            spec["icalendar"]["components"]["VTODO"] = {}
+
+    def test_json_round_trip(self):
+        spec = specmodel.Spec(SPEC)
+        state = json.loads(json.dumps(spec.to_json()))
+        cached = specmodel.Spec.from_json(state)
+        self.assertEqual(cached.to_json(), spec.to_json())
+        self.assertEqual(
+            cached.conversions("property", "DTSTAMP"),
+            spec.conversions("property", "DTSTAMP"),
+        )
+
+    def test_converted_properties(self):
+        props = specmodel.converted_properties(SPEC)
+        self.assertEqual(set(props["DTSTAMP"]), {"updated", "scheduleUpdated"})
+        self.assertEqual(props["SUMMARY"]["title"]["comps"], ["VEVENT"])
+
+
+class LoadTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.fname = os.path.join(self.dir.name, "spec.yaml")
+        with open(self.fname, "w") as f:
+            json.dump(SPEC, f)  # JSON is YAML, too
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_cache(self):
+        spec = specmodel.load(self.fname)
+        with open(self.fname + specmodel.CACHE_SUFFIX) as f:
+            cached = json.load(f)
+        self.assertEqual(cached["version"], specmodel.MODEL_VERSION)
+        self.assertEqual(specmodel.load(self.fname).to_json(), spec.to_json())
+
+    def test_invalid_cache(self):
+        spec = specmodel.load(self.fname, cache=False)
+        with open(self.fname + specmodel.CACHE_SUFFIX, "wb") as f:
+            f.write(b"\x80\x04K\x01.")
+        self.assertEqual(specmodel.load(self.fname).to_json(), spec.to_json())
+
+    def test_stale_cache(self):
+        specmodel.load(self.fname)
+        with open(self.fname, "a") as f:
+            f.write("\n")
+        with open(self.fname + specmodel.CACHE_SUFFIX) as f:
+            cached = json.load(f)
+        cached["state"]["data"] = {}
+        with open(self.fname + specmodel.CACHE_SUFFIX, "w") as f:
+            json.dump(cached, f)
+        self.assertIn("icalendar", specmodel.load(self.fname).data)
+
+
+if __name__ == "__main__":
+    unittest.main()
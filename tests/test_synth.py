@@ -0,0 +1,48 @@
+import os
+import tempfile
+import unittest
+
+from rfctest.synth import CalendarGenerator, Sizes
+from rfctest.validate import Validator, load_spec
+
+SIZES = Sizes(events=5, overrides=2, participants=3, alerts=1, timezones=2)
+
+
+class GeneratorTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.spec = load_spec()
+        cls.generator = CalendarGenerator(cls.spec)
+
+    def test_reproducible(self):
+        cal = self.generator.calendar(1, SIZES)
+        self.assertEqual(self.generator.calendar(1, SIZES).to_ical(), cal.to_ical())
+        self.assertNotEqual(self.generator.calendar(2, SIZES).to_ical(), cal.to_ical())
+
+    def test_sizes(self):
+        cal = self.generator.calendar(0, SIZES)
+        names = [comp.name for comp in cal.comps]
+        self.assertEqual(names.count("VTIMEZONE"), SIZES.timezones)
+        events = [comp for comp in cal.comps if comp.name == "VEVENT"]
+        self.assertEqual(len(events), SIZES.events * (1 + SIZES.overrides))
+        for event in events:
+            self.assertEqual(len(event.get_props("ATTENDEE")), SIZES.participants)
+            self.assertEqual(len(event.comps), SIZES.alerts)
+        self.assertEqual(Validator(self.spec).validate(cal), [])
+
+    def test_to_jscal(self):
+        _, group = self.generator.generate(0, SIZES)
+        entries = group["entries"]
+        self.assertEqual(len(entries), SIZES.events)
+        for entry in entries:
+            self.assertEqual(len(entry["recurrenceOverrides"]), SIZES.overrides)
+            self.assertEqual(len(entry["participants"]), SIZES.participants)
+
+    def test_write(self):
+        with tempfile.TemporaryDirectory() as outdir:
+            self.generator.write(outdir, "pair", 0, Sizes(events=1))
+            self.assertEqual(sorted(os.listdir(outdir)), ["pair.ics", "pair.json"])
+
+
+if __name__ == "__main__":
+    unittest.main()
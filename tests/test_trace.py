@@ -0,0 +1,71 @@
+import io
+import json
+import os
+import threading
+import unittest
+
+from rfctest import trace
+
+
+class TraceTest(unittest.TestCase):
+    def tearDown(self):
+        trace._tracer = None
+
+    def test_disabled(self):
+        self.assertFalse(trace.enabled())
+        with trace.span("test", uid="1") as args:
+            args["result"] = "success"
+        self.assertIsNone(trace._tracer)
+
+    def test_spans(self):
+        trace.start()
+        self.assertTrue(trace.enabled())
+        with trace.span("test", uid="1") as args:
+            with trace.span("convert", "backend"):
+                pass
+            args["result"] = "success"
+
+        def record():
+            with trace.span("worker"):
+                pass
+
+        thread = threading.Thread(target=record, name="worker-1")
+        thread.start()
+        thread.join()
+        events = trace.take_events()
+        self.assertEqual(trace.take_events(), [])
+        self.assertEqual(
+            [e[:2] for e in events],
+            [("convert", "backend"), ("test", "run"), ("worker", "run")],
+        )
+        convert, test, worker = events
+        self.assertGreaterEqual(convert[2], test[2])
+        self.assertLessEqual(convert[2] + convert[3], test[2] + test[3])
+        self.assertEqual(test[4], os.getpid())
+        self.assertNotEqual(worker[5], test[5])
+        self.assertEqual(worker[6], "worker-1")
+        self.assertEqual(test[7], {"uid": "1", "result": "success"})
+
+    def test_write(self):
+        trace.start()
+        with trace.span("test", uid="1"):
+            pass
+        worker = ("convert", "backend", trace._tracer.start, 2000, 1, 7, "main", {})
+        trace.add_events([worker])
+        f = io.StringIO()
+        trace.write(f)
+        events = json.loads(f.getvalue())["traceEvents"]
+        spans = [e for e in events if e["ph"] == "X"]
+        self.assertEqual([e["name"] for e in spans], ["test", "convert"])
+        self.assertEqual(spans[1]["dur"], 2)
+        self.assertTrue(all(e["ts"] >= 0 for e in spans))
+        names = {
+            (e["pid"], e["name"]): e["args"]["name"] for e in events if e["ph"] == "M"
+        }
+        self.assertEqual(names[(os.getpid(), "process_name")], "rfctest")
+        self.assertEqual(names[(1, "process_name")], "rfctest worker 1")
+        self.assertEqual(names[(1, "thread_name")], "main")
+
+
+if __name__ == "__main__":
+    unittest.main()
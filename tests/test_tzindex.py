@@ -0,0 +1,186 @@
+import datetime
+import unittest
+
+from rfctest import tzindex
+from rfctest.jsical import Component, ComponentDiff
+from rfctest.recur import RecurrenceSet
+from rfctest.tzindex import TimeZoneIndex, TimeZoneResolver, parse_utcoffset
+
+VTIMEZONE = (
+    "BEGIN:VTIMEZONE\r\n"
+    "TZID:Europe/Berlin\r\n"
+    "BEGIN:DAYLIGHT\r\n"
+    "DTSTART:19810329T020000\r\n"
+    "TZOFFSETFROM:+0100\r\n"
+    "TZOFFSETTO:+0200\r\n"
+    "RRULE:FREQ=YEARLY;BYMONTH=3;BYDAY=-1SU\r\n"
+    "END:DAYLIGHT\r\n"
+    "BEGIN:STANDARD\r\n"
+    "DTSTART:19961027T030000\r\n"
+    "TZOFFSETFROM:+0200\r\n"
+    "TZOFFSETTO:+0100\r\n"
+    "RRULE:FREQ=YEARLY;BYMONTH=10;BYDAY=-1SU\r\n"
+    "END:STANDARD\r\n"
+    "END:VTIMEZONE\r\n"
+)
+
+TIMEZONE = {
+    "@type": "TimeZone",
+    "tzId": "Europe/Berlin",
+    "standard": [
+        {
+            "@type": "TimeZoneRule",
+            "start": "1996-10-27T03:00:00",
+            "offsetFrom": "+0200",
+            "offsetTo": "+0100",
+            "recurrenceRules": [
+                {
+                    "@type": "RecurrenceRule",
+                    "frequency": "yearly",
+                    "byMonth": ["10"],
+                    "byDay": [{"@type": "NDay", "day": "su", "nthOfPeriod": -1}],
+                }
+            ],
+        }
+    ],
+    "daylight": [
+        {
+            "@type": "TimeZoneRule",
+            "start": "1981-03-29T02:00:00",
+            "offsetFrom": "+0100",
+            "offsetTo": "+0200",
+            "recurrenceRules": [
+                {
+                    "@type": "RecurrenceRule",
+                    "frequency": "yearly",
+                    "byMonth": ["3"],
+                    "byDay": [{"@type": "NDay", "day": "su", "nthOfPeriod": -1}],
+                }
+            ],
+        }
+    ],
+}
+
+
+def dt(*args):
+    return datetime.datetime(*args)
+
+
+class TimeZoneIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = TimeZoneIndex.from_vtimezone(Component.parse(VTIMEZONE))
+
+    def test_parse_utcoffset(self):
+        self.assertEqual(parse_utcoffset("+0200"), 7200)
+        self.assertEqual(parse_utcoffset("-03:30"), -12600)
+        self.assertEqual(parse_utcoffset("+053045"), 19845)
+        with self.assertRaises(tzindex.TimeZoneError):
+            parse_utcoffset("0200")
+
+    def assertUtc(self, local, utc):
+        self.assertEqual(self.index.to_utc(local), utc)
+
+    def test_to_utc(self):
+        self.assertUtc(dt(2024, 1, 15, 12), dt(2024, 1, 15, 11))
+        self.assertUtc(dt(2024, 7, 15, 12), dt(2024, 7, 15, 10))
+
+    def test_gap(self):
+        # 02:30 does not exist on March 31st, 2024, and resolves to the
+        # offset before the transition.
+        self.assertUtc(dt(2024, 3, 31, 1, 59), dt(2024, 3, 31, 0, 59))
+        self.assertUtc(dt(2024, 3, 31, 2, 30), dt(2024, 3, 31, 1, 30))
+        self.assertUtc(dt(2024, 3, 31, 3), dt(2024, 3, 31, 1))
+
+    def test_overlap(self):
+        # 02:30 occurs twice on October 27th, 2024, and resolves to the
+        # offset before the transition.
+        self.assertUtc(dt(2024, 10, 27, 2, 30), dt(2024, 10, 27, 0, 30))
+        self.assertUtc(dt(2024, 10, 27, 3), dt(2024, 10, 27, 2))
+
+    def test_from_utc(self):
+        from_utc = self.index.from_utc
+        self.assertEqual(from_utc(dt(2024, 9, 30, 12)), dt(2024, 9, 30, 14))
+        self.assertEqual(from_utc(dt(2024, 10, 27, 0, 30)), dt(2024, 10, 27, 2, 30))
+        self.assertEqual(from_utc(dt(2024, 10, 27, 1, 30)), dt(2024, 10, 27, 2, 30))
+
+    def test_before_first_transition(self):
+        self.assertUtc(dt(1970, 6, 1), dt(1970, 5, 31, 23))
+
+    def test_from_json(self):
+        index = TimeZoneIndex.from_json("Europe/Berlin", TIMEZONE)
+        for local in (dt(2024, 1, 15, 12), dt(2024, 3, 31, 2, 30), dt(2030, 7, 1)):
+            self.assertEqual(index.to_utc(local), self.index.to_utc(local))
+        with self.assertRaises(tzindex.TimeZoneError):
+            TimeZoneIndex.from_json("X", {"standard": [{"start": "x"}]})
+
+
+class TimeZoneResolverTest(unittest.TestCase):
+    def test_defined(self):
+        resolver = TimeZoneResolver({"Europe/Berlin": Component.parse(VTIMEZONE)})
+        self.assertEqual(
+            resolver.to_utc("20240715T120000", '"europe/berlin"'), dt(2024, 7, 15, 10)
+        )
+        self.assertEqual(resolver.to_utc("20240715T120000Z"), dt(2024, 7, 15, 12))
+        self.assertIsNone(resolver.to_utc("20240715T120000"))
+
+    def test_zoneinfo(self):
+        resolver = TimeZoneResolver()
+        if resolver.get("America/New_York") is None:
+            self.skipTest("no IANA time zone database")
+        self.assertEqual(
+            resolver.to_utc("2024-07-15T12:00:00", "America/New_York"),
+            dt(2024, 7, 15, 16),
+        )
+        self.assertEqual(
+            resolver.get("America/New_York").from_utc(dt(2024, 7, 15, 16)),
+            dt(2024, 7, 15, 12),
+        )
+        self.assertIsNone(resolver.get("Nowhere/Special"))
+
+    def test_cache_is_bounded(self):
+        for i in range(tzindex.TZ_CACHE_SIZE + 10):
+            obj = dict(TIMEZONE, tzId=f"Zone/{i}")
+            tzindex.compile_json(f"Zone/{i}", obj)
+        self.assertEqual(len(tzindex._compiled), tzindex.TZ_CACHE_SIZE)
+        index = tzindex.compile_json("Europe/Berlin", TIMEZONE)
+        self.assertIs(tzindex.compile_json("Europe/Berlin", TIMEZONE), index)
+
+
+class UtcUntilTest(unittest.TestCase):
+    EVENT = (
+        "BEGIN:VEVENT\r\n"
+        "DTSTART;TZID=Europe/Berlin:20240927T140000\r\n"
+        "RRULE:FREQ=DAILY;UNTIL={until}\r\n"
+        "END:VEVENT\r\n"
+    )
+
+    def event(self, until: str) -> Component:
+        return Component.parse(
+            "BEGIN:VCALENDAR\r\n"
+            + VTIMEZONE
+            + self.EVENT.format(until=until)
+            + "END:VCALENDAR\r\n"
+        )
+
+    def test_until_in_time_zone(self):
+        cal = self.event("20240930T120000Z")
+        resolver = TimeZoneResolver.from_component(cal)
+        recur_set = RecurrenceSet.from_component(cal.comps[1], timezones=resolver)
+        self.assertEqual(recur_set.rules[0].until, dt(2024, 9, 30, 14))
+        self.assertEqual(recur_set.expand()[-1], dt(2024, 9, 30, 14))
+
+    def test_diff(self):
+        self.assertTrue(
+            ComponentDiff(
+                self.event("20240930T120000Z"), self.event("20240930T140000")
+            ).empty()
+        )
+        self.assertFalse(
+            ComponentDiff(
+                self.event("20240930T120000Z"), self.event("20240930T120000")
+            ).empty()
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+
+from rfctest.jsical import Component
+from rfctest.validate import Validator, load_spec, spec_errors
+
+SPEC = {
+    "icalendar": {
+        "components": {
+            "VCALENDAR": {
+                "properties": {"PRODID": {"required": True}, "VERSION": {}},
+                "components": {"VEVENT": {}},
+            },
+            "VEVENT": {
+                "properties": {"UID": {"required": True}, "SUMMARY": None},
+                "components": {"VALARM": {}},
+            },
+            "VALARM": {"properties": {"TRIGGER": {"required": True}}},
+        },
+        "properties": {
+            "SUMMARY": {"parameters": {"LANGUAGE": {}}},
+            "UID": None,
+        },
+    }
+}
+
+
+def parse(*lines: str) -> Component:
+    return Component.parse("\r\n".join(lines), strict=True)
+
+
+class ValidatorTest(unittest.TestCase):
+    def setUp(self):
+        self.validator = Validator(SPEC)
+
+    def test_valid(self):
+        comp = parse(
+            "BEGIN:VCALENDAR",
+            "PRODID:x",
+            "X-FOO:bar",
+            "BEGIN:VEVENT",
+            "UID:1",
+            "SUMMARY;LANGUAGE=de;X-BAR=1;VALUE=TEXT:Mittagessen",
+            "JSID:a",
+            "END:VEVENT",
+            "BEGIN:X-THING",
+            "FOO:1",
+            "END:X-THING",
+            "END:VCALENDAR",
+        )
+        self.assertEqual(self.validator.validate(comp), [])
+
+    def test_issues(self):
+        comp = parse(
+            "BEGIN:VCALENDAR",
+            "PRODID:x",
+            "BEGIN:VEVENT",
+            "SUMMARY;ALTREP=x:Lunch",
+            "DTSTART:20240101",
+            "BEGIN:VALARM",
+            "END:VALARM",
+            "END:VEVENT",
+            "BEGIN:VTODO",
+            "END:VTODO",
+            "BEGIN:VEVENT",
+            "END:VEVENT",
+            "END:VCALENDAR",
+        )
+        self.assertEqual(
+            self.validator.validate(comp),
+            [
+                "VCALENDAR: unexpected component VTODO",
+                "VCALENDAR/VEVENT: missing required property UID",
+                "VCALENDAR/VEVENT: unexpected parameter ALTREP of SUMMARY",
+                "VCALENDAR/VEVENT: unexpected property DTSTART",
+                "VCALENDAR/VEVENT/VALARM: missing required property TRIGGER",
+            ],
+        )
+        self.assertEqual(len(self.validator.validate(comp, limit=2)), 2)
+
+    def test_unknown_component(self):
+        comp = parse("BEGIN:VFOO", "END:VFOO")
+        self.assertEqual(self.validator.validate(comp), ["VFOO: unknown component"])
+
+
+class SpecTest(unittest.TestCase):
+    def test_load_spec(self):
+        spec = load_spec()
+        self.assertIn("VEVENT", spec["icalendar"]["components"])
+        validator = Validator(spec)
+        comp = parse(
+            "BEGIN:VCALENDAR",
+            "PRODID:x",
+            "VERSION:2.0",
+            "BEGIN:VEVENT",
+            "UID:1",
+            "DTSTAMP:20240101T000000Z",
+            "DTSTART:20240101T090000",
+            "END:VEVENT",
+            "END:VCALENDAR",
+        )
+        self.assertEqual(validator.validate(comp), [])
+
+    def test_missing_spec(self):
+        with self.assertRaises(spec_errors()):
+            load_spec("/nonexistent/spec.yaml")
+
+
+if __name__ == "__main__":
+    unittest.main()